@@ -43,7 +43,6 @@ import gimpenums
 from export_layers import exportlayers
 from export_layers import settings_plugin
 from export_layers import update
-from export_layers.gui import main as gui_main
 
 
 SETTINGS = settings_plugin.create_settings()
@@ -123,6 +122,10 @@ def _run_noninteractive(layer_tree, args):
   for setting, arg in zip(main_settings, pg.setting.iter_args(args, main_settings)):
     setting.set_value(arg)
   
+  # Save options cannot be passed as arguments, hence the last saved values are
+  # used.
+  SETTINGS["main/save_options"].load()
+  
   _run_plugin_noninteractive(gimpenums.RUN_NONINTERACTIVE, layer_tree)
 
 
@@ -133,10 +136,16 @@ def _run_with_last_vals(layer_tree):
 
 
 def _run_export_layers_interactive(layer_tree):
+  # The GUI is imported only here so that querying the plug-in and running it
+  # non-interactively do not import modules needed only for the dialogs.
+  from export_layers.gui import main as gui_main
+  
   gui_main.ExportLayersDialog(layer_tree, SETTINGS)
 
 
 def _run_export_layers_repeat_interactive(layer_tree):
+  from export_layers.gui import main as gui_main
+  
   gui_main.ExportLayersRepeatDialog(layer_tree, SETTINGS)
 
 
@@ -57,7 +57,13 @@ def insert_foreground_layer(image, layer, layer_exporter, tag):
   _insert_tagged_layer(image, layer_exporter, tag, position=0)
 
 
-def copy_and_insert_layer(image, layer, parent=None, position=0):
+def copy_and_insert_layer(
+      image, layer, parent=None, position=0, group_composite_cache=None):
+  if group_composite_cache is not None and pdb.gimp_item_is_group(layer):
+    layer_copy = group_composite_cache.insert_composite(image, layer, parent, position)
+    if layer_copy is not None:
+      return layer_copy
+  
   layer_copy = pdb.gimp_layer_new_from_drawable(layer, image)
   pdb.gimp_image_insert_layer(image, layer_copy, parent, position)
   pdb.gimp_item_set_visible(layer_copy, True)
@@ -80,12 +86,51 @@ def autocrop_tagged_layer(image, layer, layer_exporter, tag):
   tagged_layer = layer_exporter.inserted_tagged_layers[tag]
   if tagged_layer is not None:
     image.active_layer = tagged_layer
-    pdb.plug_in_autocrop_layer(image, tagged_layer)
+    
+    # Tagged layers do not change during export, hence the autocrop bounds are
+    # computed only once from the unmodified cached copy.
+    if tag not in layer_exporter.tagged_layer_autocrop_bounds:
+      layer_exporter.tagged_layer_autocrop_bounds[tag] = _get_autocrop_bounds(
+        image, layer_exporter.tagged_layer_copies[tag])
+    
+    bounds = layer_exporter.tagged_layer_autocrop_bounds[tag]
+    
+    if bounds is not None and bounds != (0, 0, tagged_layer.width, tagged_layer.height):
+      x1, y1, x2, y2 = bounds
+      pdb.gimp_layer_resize(tagged_layer, x2 - x1, y2 - y1, -x1, -y1)
+    
     return True
   else:
     return False
 
 
+def _get_autocrop_bounds(image, layer):
+  """
+  Return the bounding box `(x1, y1, x2, y2)` of the contents of `layer` relative
+  to the layer, or `None` if the layer has no contents.
+  """
+  if pg.pixels.is_available():
+    return pg.pixels.get_autocrop_bounds(
+      pg.pixels.get_pixels(layer), pdb.gimp_drawable_has_alpha(layer))
+  
+  layer_copy = pdb.gimp_layer_copy(layer, True)
+  pdb.gimp_image_insert_layer(image, layer_copy, None, 0)
+  
+  orig_offset_x, orig_offset_y = layer_copy.offsets
+  pdb.plug_in_autocrop_layer(image, layer_copy)
+  offset_x, offset_y = layer_copy.offsets
+  
+  bounds = (
+    offset_x - orig_offset_x,
+    offset_y - orig_offset_y,
+    offset_x - orig_offset_x + layer_copy.width,
+    offset_y - orig_offset_y + layer_copy.height)
+  
+  pdb.gimp_image_remove_layer(image, layer_copy)
+  
+  return bounds
+
+
 def _insert_tagged_layer(image, layer_exporter, tag, position=0):
   if not layer_exporter.tagged_layer_elems[tag]:
     return
@@ -97,10 +142,18 @@ def _insert_tagged_layer(image, layer_exporter, tag, position=0):
     layer_exporter.tagged_layer_copies[tag] = (
       pdb.gimp_layer_copy(layer_exporter.inserted_tagged_layers[tag], True))
   else:
-    layer_exporter.inserted_tagged_layers[tag] = (
-      pdb.gimp_layer_copy(layer_exporter.tagged_layer_copies[tag], True))
-    pdb.gimp_image_insert_layer(
-      image, layer_exporter.inserted_tagged_layers[tag], None, position)
+    tagged_layer_copy = None
+    
+    if layer_exporter.can_crop_tagged_layer(tag):
+      tagged_layer_copy = _copy_and_insert_layer_within_image(
+        image, layer_exporter.tagged_layer_copies[tag], position)
+    
+    if tagged_layer_copy is None:
+      tagged_layer_copy = pdb.gimp_layer_copy(
+        layer_exporter.tagged_layer_copies[tag], True)
+      pdb.gimp_image_insert_layer(image, tagged_layer_copy, None, position)
+    
+    layer_exporter.inserted_tagged_layers[tag] = tagged_layer_copy
 
 
 def _insert_merged_tagged_layer(image, layer_exporter, tag, position=0):
@@ -108,7 +161,8 @@ def _insert_merged_tagged_layer(image, layer_exporter, tag, position=0):
   
   for i, layer_elem in enumerate(layer_exporter.tagged_layer_elems[tag]):
     layer_copy = copy_and_insert_layer(
-      image, layer_elem.item, None, first_tagged_layer_position + i)
+      image, layer_elem.item, None, first_tagged_layer_position + i,
+      layer_exporter.group_composite_cache)
     layer_copy.visible = True
     layer_exporter.operation_executor.execute(
       ["after_insert_layer"], [image, layer_copy, layer_exporter])
@@ -129,6 +183,42 @@ def _insert_merged_tagged_layer(image, layer_exporter, tag, position=0):
   return merged_layer_for_tag
 
 
+def _copy_and_insert_layer_within_image(image, layer, position=0):
+  """
+  Insert a copy of the part of `layer` within the image bounds. Only the pixels
+  within the image bounds are copied. Return the copy, or `None` if the layer
+  lies outside the image bounds or has a mask.
+  """
+  if layer.mask is not None:
+    return None
+  
+  layer_offset_x, layer_offset_y = layer.offsets
+  x1 = max(layer_offset_x, 0)
+  y1 = max(layer_offset_y, 0)
+  x2 = min(layer_offset_x + layer.width, image.width)
+  y2 = min(layer_offset_y + layer.height, image.height)
+  
+  if x1 >= x2 or y1 >= y2:
+    return None
+  
+  width, height = x2 - x1, y2 - y1
+  
+  layer_copy = pdb.gimp_layer_new(
+    image, width, height, layer.type, layer.name, layer.opacity, layer.mode)
+  pdb.gimp_image_insert_layer(image, layer_copy, None, position)
+  pdb.gimp_layer_set_offsets(layer_copy, x1, y1)
+  
+  src_x, src_y = x1 - layer_offset_x, y1 - layer_offset_y
+  src_region = layer.get_pixel_rgn(src_x, src_y, width, height, False, False)
+  dest_region = layer_copy.get_pixel_rgn(0, 0, width, height, True, False)
+  dest_region[0:width, 0:height] = (
+    src_region[src_x:src_x + width, src_y:src_y + height])
+  
+  layer_copy.flush()
+  
+  return layer_copy
+
+
 _BUILTIN_PROCEDURES_LIST = [
   {
     "name": "insert_background_layers",
@@ -53,6 +53,11 @@ class LayerExporter(object):
     For subsequent layers, `gimpenums.RUN_WITH_LAST_VALS` is used. If the file
     format in which the layer is exported to cannot handle
     `gimpenums.RUN_WITH_LAST_VALS`, `gimpenums.RUN_INTERACTIVE` is used.
+    
+    If the file format defines save options (see `pygimplib.fileformats`),
+    layers are always saved non-interactively with the save options from the
+    `"save_options"` group in `export_settings`, regardless of the run mode.
+    Failed exports are then not retried interactively.
   
   * `image` - GIMP image to export layers from.
   
@@ -67,6 +72,14 @@ class LayerExporter(object):
   * `progress_updater` - `ProgressUpdater` instance that indicates the number of
     layers exported. If no progress update is desired, pass `None`.
   
+  * `save_options_editor` - Function allowing the user to edit save options of
+    a file format before the first layer in that file format is saved. The
+    function is invoked at most once per file format during `export()` and only
+    if the run mode is `gimpenums.RUN_INTERACTIVE`. Required parameters:
+    `setting.Group` instance containing the save options of the file format.
+    The function returns `False` to cancel the export, `True` otherwise. If
+    `None`, the save options are used as they are.
+  
   * `layer_tree` - `LayerTree` instance containing layers to be exported.
     Defaults to `None` if no export has been performed yet.
   
@@ -88,6 +101,9 @@ class LayerExporter(object):
     manage operations applied on layers. This property is not `None` only during
     `export()` and can be used to modify the execution of operations while
     processing layers.
+  
+  * `export_engine` (read-only) - The `ExportEngines` item used in the last
+    export.
   """
   
   def __init__(
@@ -99,7 +115,8 @@ class LayerExporter(object):
         progress_updater=None,
         layer_tree=None,
         export_context_manager=None,
-        export_context_manager_args=None):
+        export_context_manager_args=None,
+        save_options_editor=None):
     
     self.initial_run_mode = initial_run_mode
     self.image = image
@@ -123,6 +140,8 @@ class LayerExporter(object):
     self.export_context_manager_args = (
       export_context_manager_args if export_context_manager_args is not None else [])
     
+    self.save_options_editor = save_options_editor
+    
     self._exported_layers = []
     self._exported_layers_ids = set()
     self._current_layer_elem = None
@@ -137,7 +156,7 @@ class LayerExporter(object):
         self._preprocess_layer_name, self._preprocess_empty_group_name,
         self._process_layer_name],
       "_postprocess_layer_name": [self._postprocess_layer_name],
-      "export": [self._make_dirs, self._export]
+      "export": [self._make_dirs, self._export, self._scale_layer]
     }
     
     self._processing_groups_functions = {}
@@ -147,6 +166,8 @@ class LayerExporter(object):
     
     self._operation_executor = None
     self._initial_operation_executor = pg.operations.OperationExecutor()
+    
+    self._export_engine = None
   
   @property
   def layer_tree(self):
@@ -176,11 +197,25 @@ class LayerExporter(object):
   def tagged_layer_copies(self):
     return self._tagged_layer_copies
   
+  @property
+  def group_composite_cache(self):
+    return self._group_composite_cache
+  
+  @property
+  def tagged_layer_autocrop_bounds(self):
+    return self._tagged_layer_autocrop_bounds
+  
   @property
   def operation_executor(self):
     return self._operation_executor
   
-  def export(self, processing_groups=None, layer_tree=None, keep_image_copy=False):
+  @property
+  def export_engine(self):
+    return self._export_engine
+  
+  def export(
+        self, processing_groups=None, layer_tree=None, keep_image_copy=False,
+        engine=None):
     """
     Export layers as separate images from the specified image.
     
@@ -211,19 +246,37 @@ class LayerExporter(object):
     copy, pass `True` to `keep_image_copy`. In that case, this method returns
     the image copy. If an exception was raised or if no layer was exported, this
     method returns `None` and the image copy will be destroyed.
+    
+    `engine` is an `ExportEngines` item determining how layers are processed:
+    
+    * `ExportEngines.COPY_LAYERS` - Copy each layer (and tagged layers) into an
+      empty image copy, apply procedures and merge the copies.
+    
+    * `ExportEngines.TOGGLE_VISIBILITY` - Duplicate the image once, hide all
+      layers and make only the exported layer (and tagged layers) visible. This
+      engine avoids copying layers, but can only be used for top-level layers
+      and if no procedures other than inserting tagged layers and using layer
+      size are enabled. If the engine cannot be used, `ValueError` is raised.
+    
+    If `engine` is `None`, the engine is chosen automatically based on the
+    estimated cost of processing the layers.
     """
     self._init_attributes(processing_groups, layer_tree, keep_image_copy)
     self._preprocess_layers()
     
+    self._export_engine = self._get_export_engine(engine)
+    
     exception_occurred = False
     
     self._setup()
     try:
       self._export_layers()
+      self._wait_for_png_writer()
     except Exception:
       exception_occurred = True
       raise
     finally:
+      self._close_png_writer()
       self._cleanup(exception_occurred)
     
     if self._keep_image_copy:
@@ -234,6 +287,17 @@ class LayerExporter(object):
     else:
       return None
   
+  def can_crop_tagged_layer(self, tag):
+    """
+    Return `True` if layers with the specified tag may be inserted into the
+    image copy cropped to the current image bounds, `False` otherwise.
+    
+    This is only possible if the image copy is cropped to the bounds of the
+    processed layer before applying procedures and the tagged layers are not
+    autocropped afterwards.
+    """
+    return self._should_crop_image_to_layer_bounds and tag not in self._tags_to_autocrop
+  
   def has_exported_layer(self, layer):
     """
     Return `True` if the specified `gimp.Layer` was exported in the last export,
@@ -297,6 +361,7 @@ class LayerExporter(object):
         self.image, name=pg.config.SOURCE_NAME, is_filtered=True)
     
     self._keep_image_copy = keep_image_copy
+    self._is_full_export = not processing_groups
     
     self._should_stop = False
     
@@ -315,13 +380,41 @@ class LayerExporter(object):
     self._use_another_image_copy = False
     self._another_image_copy = None
     
+    self._group_composite_cache = pg.pdbutils.GroupCompositeCache()
+    
+    self._should_crop_image_to_layer_bounds = self._can_crop_image_to_layer_bounds()
+    self._tags_to_autocrop = self._get_tags_to_autocrop()
+    self._tagged_layer_autocrop_bounds = {}
+    
+    self._use_layer_size = any(
+      procedure.get_value("function") == builtin_procedures.resize_to_layer_size
+      for procedure in operations.walk_records(self.export_settings["procedures"])
+      if procedure.get_value("enabled"))
+    self._tags_to_insert = self._get_tags_to_insert()
+    self._tags_inserted_before_resizing = self._get_tags_inserted_before_resizing()
+    self._layer_copies_in_image_copy = {}
+    self._tagged_layers_in_image_copy = []
+    self._current_layer_copy_in_image_copy = None
+    
+    self._output_scales = sorted(
+      set(self.export_settings["output_scales"].value), reverse=True)
+    self._current_output_scale = 1.0
+    self._scaled_image = None
+    self._scaled_image_scale = None
+    
     self.progress_updater.reset()
     
     self._file_extension_properties = _get_prefilled_file_extension_properties()
     self._default_file_extension = (
       self.export_settings["file_extension"].value.lstrip(".").lower())
     self._current_file_extension = self._default_file_extension
+    self._additional_file_extensions = self._get_additional_file_extensions()
+    self._is_exporting_in_additional_file_format = False
     self._current_layer_export_status = ExportStatuses.NOT_EXPORTED_YET
+    self._png_writer = None
+    self._num_pending_png_writes = collections.defaultdict(int)
+    self._layers_waiting_for_png_writes = {}
+    self._edited_save_options = set()
     self._current_overwrite_mode = None
     
     if self.export_settings["layer_filename_pattern"].value:
@@ -331,6 +424,213 @@ class LayerExporter(object):
     
     self._layer_name_renamer = renamer.LayerNameRenamer(self, pattern)
   
+  def _get_additional_file_extensions(self):
+    additional_file_extensions = []
+    
+    for file_extension in self.export_settings["additional_file_extensions"].value:
+      file_extension = file_extension.lstrip(".").lower()
+      if file_extension and file_extension not in additional_file_extensions:
+        additional_file_extensions.append(file_extension)
+    
+    return additional_file_extensions
+  
+  def _can_crop_image_to_layer_bounds(self):
+    """
+    Return `True` if the image copy can be cropped to the bounds of each layer
+    before applying procedures, `False` if procedures may require the entire
+    canvas.
+    
+    This is the case if "Use layer size" is enabled and all other enabled
+    procedures are built-in procedures that modify neither the bounds of the
+    processed layer nor the image canvas. Tagged layers are inserted uncropped
+    and thus may still be autocropped. Custom procedures and procedures added
+    via `add_procedure()` may depend on the entire canvas.
+    
+    Tagged layers inserted before "Use layer size" are moved along with the
+    processed layer when the image is resized. Cropping the image before
+    inserting them would leave them at their original offsets, hence "Use layer
+    size" must precede all procedures inserting tagged layers.
+    """
+    initial_procedures = self._initial_operation_executor.list_operations(
+      group=operations.DEFAULT_PROCEDURES_GROUP)
+    if initial_procedures:
+      return False
+    
+    enabled_procedures = [
+      procedure
+      for procedure in operations.walk_records(self.export_settings["procedures"])
+      if procedure.get_value("enabled")]
+    
+    if any(procedure.get_value("is_pdb_procedure", False)
+           or procedure.get_value("function") not in _LAYER_BOUNDS_PRESERVING_PROCEDURES
+           for procedure in enabled_procedures):
+      return False
+    
+    functions = [procedure.get_value("function") for procedure in enabled_procedures]
+    
+    if builtin_procedures.resize_to_layer_size not in functions:
+      return False
+    
+    resize_index = functions.index(builtin_procedures.resize_to_layer_size)
+    
+    return not any(
+      function in _TAGGED_LAYER_INSERTING_PROCEDURES
+      for function in functions[:resize_index])
+  
+  def _get_tags_to_autocrop(self):
+    return set(
+      procedure.get_value("arguments/tag")
+      for procedure in operations.walk_records(self.export_settings["procedures"])
+      if (procedure.get_value("enabled")
+          and (procedure.get_value("function")
+               == builtin_procedures.autocrop_tagged_layer)))
+  
+  def _get_tags_to_insert(self):
+    return [
+      (procedure.get_value("arguments/tag"), procedure.get_value("function"))
+      for procedure in operations.walk_records(self.export_settings["procedures"])
+      if (procedure.get_value("enabled")
+          and procedure.get_value("function") in _TAGGED_LAYER_INSERTING_PROCEDURES)]
+  
+  def _get_tags_inserted_before_resizing(self):
+    tags = set()
+    
+    for procedure in operations.walk_records(self.export_settings["procedures"]):
+      if procedure.get_value("enabled"):
+        if procedure.get_value("function") == builtin_procedures.resize_to_layer_size:
+          break
+        elif procedure.get_value("function") in _TAGGED_LAYER_INSERTING_PROCEDURES:
+          tags.add(procedure.get_value("arguments/tag"))
+    
+    return tags
+  
+  def _get_export_engine(self, engine):
+    if engine is None:
+      layer_elems = self._get_layer_elems_to_process()
+      if (self._can_toggle_visibility(layer_elems)
+          and (self._estimate_toggle_visibility_cost(layer_elems)
+               < self._estimate_copy_layers_cost(layer_elems))):
+        return ExportEngines.TOGGLE_VISIBILITY
+      else:
+        return ExportEngines.COPY_LAYERS
+    elif engine == ExportEngines.COPY_LAYERS:
+      return engine
+    elif engine == ExportEngines.TOGGLE_VISIBILITY:
+      if not self._can_toggle_visibility(self._get_layer_elems_to_process()):
+        raise ValueError(
+          "layers cannot be exported by toggling visibility with the current "
+          "procedures, constraints or layer structure")
+      return engine
+    else:
+      raise ValueError("invalid export engine '{}'".format(engine))
+  
+  def _get_layer_elems_to_process(self):
+    return [
+      layer_elem for layer_elem in self._layer_tree
+      if layer_elem.item_type != layer_elem.EMPTY_GROUP]
+  
+  def _can_toggle_visibility(self, layer_elems):
+    """
+    Return `True` if toggling visibility of layers in a duplicate of the image
+    produces the same output as copying layers, `False` otherwise.
+    
+    This is the case if only top-level layers are exported, tagged layers to be
+    inserted are top-level layers that are not exported and have one such tag
+    each, and no procedures other than inserting tagged layers and "Use layer
+    size" are enabled.
+    """
+    if not self._is_full_export or self._keep_image_copy:
+      return False
+    
+    if self._initial_operation_executor.list_groups(include_empty_groups=False):
+      return False
+    
+    if any((procedure.get_value("is_pdb_procedure", False)
+            or procedure.get_value("function") not in _TOGGLE_VISIBILITY_PROCEDURES)
+           for procedure in operations.walk_records(self.export_settings["procedures"])
+           if procedure.get_value("enabled")):
+      return False
+    
+    top_level_layer_ids = set(layer.ID for layer in self.image.layers)
+    tagged_layer_ids = set()
+    
+    tags = [tag for tag, unused_ in self._tags_to_insert]
+    if len(set(tags)) != len(tags):
+      return False
+    
+    for tag in tags:
+      for layer_elem in self._tagged_layer_elems[tag]:
+        if (layer_elem.item.ID not in top_level_layer_ids
+            or layer_elem.item.ID in tagged_layer_ids):
+          return False
+        
+        tagged_layer_ids.add(layer_elem.item.ID)
+    
+    return all(
+      (layer_elem.item_type == layer_elem.ITEM
+       and layer_elem.item.ID in top_level_layer_ids
+       and layer_elem.item.ID not in tagged_layer_ids)
+      for layer_elem in layer_elems)
+  
+  def _estimate_copy_layers_cost(self, layer_elems):
+    image_num_pixels = self.image.width * self.image.height
+    tagged_layers_num_pixels = [
+      sum(
+        _get_num_pixels(layer_elem.item)
+        for layer_elem in self._tagged_layer_elems[tag])
+      for tag, unused_ in self._tags_to_insert]
+    
+    cost = 0
+    
+    for layer_elem in layer_elems:
+      layer_num_pixels = _get_num_pixels(layer_elem.item)
+      if self._use_layer_size:
+        output_num_pixels = layer_num_pixels
+      else:
+        output_num_pixels = image_num_pixels
+      
+      # Copy, insert and merge the layer, resize and remove the merged layer.
+      cost += 6 * _PDB_CALL_COST + layer_num_pixels + output_num_pixels
+      
+      for num_pixels in tagged_layers_num_pixels:
+        if self._should_crop_image_to_layer_bounds:
+          num_pixels = min(num_pixels, output_num_pixels)
+        
+        cost += 2 * _PDB_CALL_COST + num_pixels
+    
+    return cost
+  
+  def _estimate_toggle_visibility_cost(self, layer_elems):
+    image_num_pixels = self.image.width * self.image.height
+    num_tagged_layers = sum(
+      len(self._tagged_layer_elems[tag]) for tag, unused_ in self._tags_to_insert)
+    
+    # Duplicate the image and hide all layers.
+    cost = (
+      sum(_get_num_pixels(layer) for layer in self.image.layers)
+      + len(self.image.layers) * _PDB_CALL_COST)
+    
+    for layer_elem in layer_elems:
+      # Show and hide the layer.
+      cost += 2 * _PDB_CALL_COST
+      
+      if self._use_layer_size:
+        output_num_pixels = _get_num_pixels(layer_elem.item)
+        # Resizing the image moves all layers, tagged layers are then moved.
+        cost += (
+          _PDB_CALL_COST + len(self.image.layers) * _LAYER_TRANSLATION_COST
+          + num_tagged_layers * _PDB_CALL_COST)
+      else:
+        output_num_pixels = image_num_pixels
+      
+      if num_tagged_layers:
+        # Create, insert and remove a layer from the visible layers.
+        cost += 3 * _PDB_CALL_COST + output_num_pixels
+      elif not self._use_layer_size:
+        cost += _PDB_CALL_COST + output_num_pixels
+    
+    return cost
+  
   def _add_operations(self):
     self._operation_executor.add(
       builtin_procedures.set_active_layer, [operations.DEFAULT_PROCEDURES_GROUP])
@@ -344,10 +644,10 @@ class LayerExporter(object):
       self._initial_operation_executor,
       self._initial_operation_executor.list_groups(include_empty_groups=True))
     
-    for procedure in operations.walk(self.export_settings["procedures"]):
+    for procedure in operations.walk_records(self.export_settings["procedures"]):
       add_operation_from_settings(procedure, self._operation_executor)
     
-    for constraint in operations.walk(self.export_settings["constraints"]):
+    for constraint in operations.walk_records(self.export_settings["constraints"]):
       add_operation_from_settings(constraint, self._operation_executor)
   
   def _enable_disable_processing_groups(self, processing_groups):
@@ -369,8 +669,7 @@ class LayerExporter(object):
     if self._layer_tree.filter:
       self._layer_tree.reset_filter()
     
-    if self.export_settings.get_value(
-         "procedures/added/ignore_folder_structure/enabled", False):
+    if self._is_procedure_enabled("ignore_folder_structure"):
       self._remove_parents_in_layer_elems()
     else:
       self._reset_parents_in_layer_elems()
@@ -388,6 +687,12 @@ class LayerExporter(object):
         elif num_layers_and_nonempty_groups < 1:
           self._keep_image_copy = False
   
+  def _is_procedure_enabled(self, procedure_name):
+    return any(
+      procedure.get_value("enabled")
+      for procedure in operations.walk_records(self.export_settings["procedures"])
+      if procedure.name == procedure_name)
+  
   def _remove_parents_in_layer_elems(self):
     for layer_elem in self._layer_tree:
       layer_elem.parents = []
@@ -443,16 +748,24 @@ class LayerExporter(object):
     layer = layer_elem.item
     layer_copy = self._process_layer(layer_elem, self._image_copy, layer)
     self._preprocess_layer_name(layer_elem)
-    self._export_layer(layer_elem, self._image_copy, layer_copy)
+    is_exported = self._export_layer_at_output_scales(
+      layer_elem, self._image_copy, layer_copy)
     self._postprocess_layer(self._image_copy, layer_copy)
     self._postprocess_layer_name(layer_elem)
     
     self.progress_updater.update_tasks()
     
-    if self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP:
-      self._exported_layers.append(layer)
-      self._exported_layers_ids.add(layer.ID)
-      self._file_extension_properties[self._current_file_extension].processed_count += 1
+    if is_exported:
+      # Layers saved via the PNG writer are exported once all their images are
+      # written.
+      if self._num_pending_png_writes[layer.ID] > 0:
+        self._layers_waiting_for_png_writes[layer.ID] = layer
+      else:
+        self._add_exported_layer(layer)
+  
+  def _add_exported_layer(self, layer):
+    self._exported_layers.append(layer)
+    self._exported_layers_ids.add(layer.ID)
   
   def _process_empty_group(self, layer_elem):
     self._preprocess_empty_group_name(layer_elem)
@@ -467,7 +780,10 @@ class LayerExporter(object):
   def _setup(self):
     pdb.gimp_context_push()
     
-    self._image_copy = pg.pdbutils.create_image_from_metadata(self.image)
+    if self._export_engine == ExportEngines.TOGGLE_VISIBILITY:
+      self._image_copy = self._create_image_copy_with_hidden_layers()
+    else:
+      self._image_copy = pg.pdbutils.create_image_from_metadata(self.image)
     pdb.gimp_image_undo_freeze(self._image_copy)
     
     self._operation_executor.execute(
@@ -500,13 +816,63 @@ class LayerExporter(object):
       if tagged_layer_copy is not None:
         pdb.gimp_item_delete(tagged_layer_copy)
     
+    if self._scaled_image is not None:
+      pg.pdbutils.try_delete_image(self._scaled_image)
+      self._scaled_image = None
+    
+    self._group_composite_cache.clear()
+    
     pdb.gimp_context_pop()
   
+  def _create_image_copy_with_hidden_layers(self):
+    image_copy = pdb.gimp_image_duplicate(self.image)
+    
+    for layer, layer_copy in zip(self.image.layers, image_copy.layers):
+      self._layer_copies_in_image_copy[layer.ID] = layer_copy
+      pdb.gimp_item_set_visible(layer_copy, False)
+    
+    # Arrange tagged layers as if they were inserted by the procedures.
+    for tag, function in self._tags_to_insert:
+      tagged_layers = [
+        self._layer_copies_in_image_copy[layer_elem.item.ID]
+        for layer_elem in self._tagged_layer_elems[tag]]
+      
+      if function == builtin_procedures.insert_background_layer:
+        for tagged_layer in tagged_layers:
+          pdb.gimp_image_reorder_item(
+            image_copy, tagged_layer, None, len(image_copy.layers) - 1)
+      else:
+        for tagged_layer in reversed(tagged_layers):
+          pdb.gimp_image_reorder_item(image_copy, tagged_layer, None, 0)
+      
+      for tagged_layer in tagged_layers:
+        pdb.gimp_item_set_visible(tagged_layer, True)
+        self._tagged_layers_in_image_copy.append((
+          tagged_layer,
+          tagged_layer.offsets,
+          tag in self._tags_inserted_before_resizing))
+    
+    return image_copy
+  
   def _process_layer(self, layer_elem, image, layer):
-    layer_copy = builtin_procedures.copy_and_insert_layer(image, layer, None, 0)
+    if self._export_engine == ExportEngines.TOGGLE_VISIBILITY:
+      return self._process_layer_by_toggling_visibility(image, layer)
+    
+    layer_copy = builtin_procedures.copy_and_insert_layer(
+      image, layer, None, 0, self._group_composite_cache)
+    # Layer groups are processed before their children, so the composite of
+    # this group is no longer needed.
+    self._group_composite_cache.remove(layer)
+    
     self._operation_executor.execute(
       ["after_insert_layer"], [image, layer_copy, self], additional_args_position=0)
     
+    if self._should_crop_image_to_layer_bounds:
+      # Limit merging layers to the pixels within the layer bounds. Procedures
+      # cannot change the bounds as ensured by
+      # `_can_crop_image_to_layer_bounds`.
+      builtin_procedures.resize_to_layer_size(image, layer_copy, self)
+    
     self._operation_executor.execute(
       [operations.DEFAULT_PROCEDURES_GROUP],
       [image, layer_copy, self],
@@ -523,7 +889,52 @@ class LayerExporter(object):
     
     return layer_copy
   
+  def _process_layer_by_toggling_visibility(self, image, layer):
+    layer_copy = self._layer_copies_in_image_copy[layer.ID]
+    self._current_layer_copy_in_image_copy = layer_copy
+    
+    pdb.gimp_item_set_visible(layer_copy, True)
+    
+    if self._use_layer_size:
+      builtin_procedures.resize_to_layer_size(image, layer_copy, self)
+      self._move_tagged_layers_in_image_copy(layer)
+    
+    if self._tagged_layers_in_image_copy:
+      layer_copy = pdb.gimp_layer_new_from_visible(image, image, layer.name)
+      pdb.gimp_image_insert_layer(image, layer_copy, None, 0)
+    else:
+      pdb.gimp_layer_resize_to_image_size(layer_copy)
+    
+    image.active_layer = layer_copy
+    
+    return layer_copy
+  
+  def _move_tagged_layers_in_image_copy(self, layer):
+    """
+    Move tagged layers in the image copy to the offsets they would have if they
+    were inserted by procedures. Tagged layers inserted before "Use layer size"
+    are moved along with the layer when the image is resized. Tagged layers
+    inserted afterwards keep their original offsets.
+    """
+    layer_offset_x, layer_offset_y = layer.offsets
+    
+    for tagged_layer, offsets, is_inserted_before_resizing in (
+          self._tagged_layers_in_image_copy):
+      offset_x, offset_y = offsets
+      
+      if is_inserted_before_resizing:
+        pdb.gimp_layer_set_offsets(
+          tagged_layer, offset_x - layer_offset_x, offset_y - layer_offset_y)
+      else:
+        pdb.gimp_layer_set_offsets(tagged_layer, offset_x, offset_y)
+  
   def _postprocess_layer(self, image, layer):
+    if self._export_engine == ExportEngines.TOGGLE_VISIBILITY:
+      pdb.gimp_item_set_visible(self._current_layer_copy_in_image_copy, False)
+      if layer is not self._current_layer_copy_in_image_copy:
+        pdb.gimp_image_remove_layer(image, layer)
+      return
+    
     if not self._keep_image_copy:
       pdb.gimp_image_remove_layer(image, layer)
     else:
@@ -540,7 +951,12 @@ class LayerExporter(object):
         pdb.gimp_image_remove_layer(image, layer)
   
   def _merge_and_resize_layer(self, image, layer):
-    layer = pdb.gimp_image_merge_visible_layers(image, gimpenums.EXPAND_AS_NECESSARY)
+    if self._should_crop_image_to_layer_bounds:
+      merge_type = gimpenums.CLIP_TO_IMAGE
+    else:
+      merge_type = gimpenums.EXPAND_AS_NECESSARY
+    
+    layer = pdb.gimp_image_merge_visible_layers(image, merge_type)
     pdb.gimp_layer_resize_to_image_size(layer)
     return layer
   
@@ -562,8 +978,7 @@ class LayerExporter(object):
       self._layer_tree.reset_name(layer_elem)
   
   def _set_file_extension(self, layer_elem):
-    if self.export_settings.get_value(
-         "procedures/added/use_file_extensions_in_layer_names/enabled", False):
+    if self._is_procedure_enabled("use_file_extensions_in_layer_names"):
       orig_file_extension = layer_elem.get_file_extension_from_orig_name()
       if (orig_file_extension
           and self._file_extension_properties[orig_file_extension].is_valid):
@@ -578,6 +993,62 @@ class LayerExporter(object):
   def _get_uniquifier_position(self, str_):
     return len(str_) - len("." + self._current_file_extension)
   
+  def _export_layer_at_output_scales(self, layer_elem, image, layer):
+    """
+    Export the layer once for each output scale, largest scale first. Return
+    `True` if the layer was exported at least once, `False` if all exports were
+    skipped.
+    
+    All scaled variants are derived from the already processed layer, so that
+    the layer is processed only once regardless of the number of output scales.
+    """
+    is_exported = False
+    self._scaled_image_scale = None
+    
+    for scale in self._output_scales:
+      self._current_output_scale = scale
+      
+      if scale == 1.0:
+        self._export_layer(layer_elem, image, layer)
+      else:
+        scaled_layer = self._scale_layer(image, layer, scale)
+        self._export_layer(layer_elem, self._scaled_image, scaled_layer)
+      
+      if self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP:
+        self._file_extension_properties[self._current_file_extension].processed_count += 1
+        is_exported = True
+    
+    self._current_output_scale = 1.0
+    
+    return is_exported
+  
+  def _scale_layer(self, image, layer, scale):
+    if self._scaled_image is None:
+      self._scaled_image = pg.pdbutils.create_image_from_metadata(image)
+      pdb.gimp_image_undo_freeze(self._scaled_image)
+    
+    # Downscale the previous variant if possible to scale fewer pixels. Upscaled
+    # variants are never downscaled further to avoid compounding interpolation.
+    if not (self._scaled_image_scale is not None
+            and scale < self._scaled_image_scale <= 1.0):
+      for scaled_layer in self._scaled_image.layers:
+        pdb.gimp_image_remove_layer(self._scaled_image, scaled_layer)
+      
+      pdb.gimp_image_resize(self._scaled_image, image.width, image.height, 0, 0)
+      
+      scaled_layer = pdb.gimp_layer_new_from_drawable(layer, self._scaled_image)
+      pdb.gimp_image_insert_layer(self._scaled_image, scaled_layer, None, 0)
+      scaled_layer.name = layer.name
+    
+    pdb.gimp_image_scale(
+      self._scaled_image,
+      max(int(round(image.width * scale)), 1),
+      max(int(round(image.height * scale)), 1))
+    
+    self._scaled_image_scale = scale
+    
+    return self._scaled_image.layers[0]
+  
   def _export_layer(self, layer_elem, image, layer):
     self._process_layer_name(layer_elem)
     self._export(layer_elem, image, layer)
@@ -588,13 +1059,17 @@ class LayerExporter(object):
       self._export(layer_elem, image, layer)
   
   def _export(self, layer_elem, image, layer):
-    output_filepath = layer_elem.get_filepath(self._output_directory)
+    output_filepath = self._get_output_filepath(layer_elem)
     
     self.progress_updater.update_text(_('Saving "{}"').format(output_filepath))
     
+    additional_file_extensions = [
+      file_extension for file_extension in self._additional_file_extensions
+      if file_extension != self._current_file_extension]
+    
     self._current_overwrite_mode, output_filepath = pg.overwrite.handle_overwrite(
       output_filepath, self.overwrite_chooser,
-      self._get_uniquifier_position(output_filepath))
+      self._get_uniquifier_position(output_filepath), additional_file_extensions)
     
     if self._current_overwrite_mode == pg.overwrite.OverwriteModes.CANCEL:
       raise ExportLayersCancelError("cancelled")
@@ -602,6 +1077,8 @@ class LayerExporter(object):
     if self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP:
       self._make_dirs(os.path.dirname(output_filepath), self)
       
+      self._edit_save_options()
+      
       self._export_once_wrapper(
         self._get_export_func(), self._get_run_mode(), image, layer, output_filepath)
       if self._current_layer_export_status == ExportStatuses.FORCE_INTERACTIVE:
@@ -611,6 +1088,67 @@ class LayerExporter(object):
           image,
           layer,
           output_filepath)
+      
+      if self._current_layer_export_status in (
+           ExportStatuses.EXPORT_SUCCESSFUL, ExportStatuses.EXPORT_PENDING):
+        self._export_in_additional_file_formats(
+          image, layer, output_filepath, additional_file_extensions)
+  
+  def _export_in_additional_file_formats(
+        self, image, layer, output_filepath, file_extensions):
+    """
+    Save the same layer in each of the specified file formats. The file paths
+    are derived from `output_filepath` so that file names only differ in their
+    file extensions.
+    """
+    file_extension = self._current_file_extension
+    self._is_exporting_in_additional_file_format = True
+    
+    try:
+      for additional_file_extension in file_extensions:
+        self._current_file_extension = additional_file_extension
+        
+        additional_output_filepath = pg.path.get_filename_with_new_file_extension(
+          output_filepath, additional_file_extension)
+        
+        self.progress_updater.update_text(
+          _('Saving "{}"').format(additional_output_filepath))
+        
+        self._edit_save_options()
+        
+        self._export_once_wrapper(
+          self._get_export_func(),
+          self._get_run_mode(),
+          image,
+          layer,
+          additional_output_filepath)
+        if self._current_layer_export_status == ExportStatuses.FORCE_INTERACTIVE:
+          self._export_once_wrapper(
+            self._get_export_func(),
+            gimpenums.RUN_INTERACTIVE,
+            image,
+            layer,
+            additional_output_filepath)
+        
+        self._file_extension_properties[additional_file_extension].processed_count += 1
+    finally:
+      self._current_file_extension = file_extension
+      self._is_exporting_in_additional_file_format = False
+  
+  def _get_output_filepath(self, layer_elem):
+    if self._current_output_scale == 1.0:
+      return layer_elem.get_filepath(self._output_directory)
+    
+    scale_str = "{:g}x".format(self._current_output_scale)
+    output_scale_naming = self.export_settings["output_scale_naming"]
+    
+    if output_scale_naming.value == output_scale_naming.items["subdirectory"]:
+      return layer_elem.get_filepath(os.path.join(self._output_directory, scale_str))
+    else:
+      output_filepath = layer_elem.get_filepath(self._output_directory)
+      suffix_position = self._get_uniquifier_position(output_filepath)
+      return "{}@{}{}".format(
+        output_filepath[:suffix_position], scale_str, output_filepath[suffix_position:])
   
   def _make_dirs(self, dirpath, layer_exporter):
     try:
@@ -632,6 +1170,9 @@ class LayerExporter(object):
       self._export_once(export_func, run_mode, image, layer, output_filepath)
   
   def _get_run_mode(self):
+    if self._get_export_func_with_save_options() is not None:
+      return gimpenums.RUN_NONINTERACTIVE
+    
     file_extension = self._file_extension_properties[self._current_file_extension]
     if file_extension.is_valid and file_extension.processed_count > 0:
       return gimpenums.RUN_WITH_LAST_VALS
@@ -639,7 +1180,91 @@ class LayerExporter(object):
       return self.initial_run_mode
   
   def _get_export_func(self):
-    return pg.fileformats.get_save_procedure(self._current_file_extension)
+    if (self._current_file_extension == "png"
+        and self.export_settings["use_builtin_png_writer"].value):
+      return self._save_with_png_writer
+    
+    export_func_with_save_options = self._get_export_func_with_save_options()
+    if export_func_with_save_options is not None:
+      return export_func_with_save_options
+    else:
+      return pg.fileformats.get_save_procedure(self._current_file_extension)
+  
+  def _get_export_func_with_save_options(self):
+    return pg.fileformats.get_save_procedure_with_options(
+      self._current_file_extension, self.export_settings["save_options"])
+  
+  def _edit_save_options(self):
+    if (self.save_options_editor is None
+        or self.initial_run_mode != gimpenums.RUN_INTERACTIVE):
+      return
+    
+    format_save_options = pg.fileformats.get_save_options_for_file_extension(
+      self._current_file_extension, self.export_settings["save_options"])
+    
+    if (format_save_options is None
+        or format_save_options.name in self._edited_save_options):
+      return
+    
+    self._edited_save_options.add(format_save_options.name)
+    
+    if not self.save_options_editor(format_save_options):
+      raise ExportLayersCancelError("cancelled")
+  
+  def _save_with_png_writer(self, run_mode, image, layer, filepath, raw_filepath):
+    png_save_options = pg.fileformats.get_save_options_for_file_extension(
+      "png", self.export_settings["save_options"])
+    
+    if (not pg.pngwriter.is_drawable_supported(layer)
+        or not self._can_save_with_png_writer_options(png_save_options)):
+      export_func = self._get_export_func_with_save_options()
+      if export_func is None:
+        export_func = pg.fileformats.get_save_procedure("png")
+      
+      export_func(run_mode, image, layer, filepath, raw_filepath)
+      return
+    
+    compression = png_save_options["compression"].value if png_save_options else 9
+    
+    if self._png_writer is None:
+      self._png_writer = pg.pngwriter.PngWriter(compression=compression)
+    
+    self._png_writer.submit(
+      filepath,
+      *pg.pngwriter.get_drawable_data(layer),
+      context=self._current_layer_elem.item)
+    
+    self._num_pending_png_writes[self._current_layer_elem.item.ID] += 1
+    self._current_layer_export_status = ExportStatuses.EXPORT_PENDING
+  
+  @staticmethod
+  def _can_save_with_png_writer_options(png_save_options):
+    # The PNG writer only supports setting the compression level. The image is
+    # saved via the PNG plug-in if any other option differs from its default.
+    return png_save_options is None or all(
+      setting.value == setting.default_value
+      for setting in png_save_options
+      if setting.name != "compression")
+  
+  def _wait_for_png_writer(self):
+    if self._png_writer is not None:
+      try:
+        self._png_writer.wait()
+      except pg.pngwriter.PngWriterError as e:
+        raise ExportLayersError(str(e), e.context, self._default_file_extension)
+  
+  def _close_png_writer(self):
+    if self._png_writer is not None:
+      self._png_writer.close()
+      
+      for layer in self._png_writer.pop_written_contexts():
+        self._num_pending_png_writes[layer.ID] -= 1
+        
+        if (self._num_pending_png_writes[layer.ID] == 0
+            and layer.ID in self._layers_waiting_for_png_writes):
+          self._add_exported_layer(self._layers_waiting_for_png_writes.pop(layer.ID))
+      
+      self._png_writer = None
   
   def _export_once(self, export_func, run_mode, image, layer, output_filepath):
     self._current_layer_export_status = ExportStatuses.NOT_EXPORTED_YET
@@ -662,8 +1287,12 @@ class LayerExporter(object):
         self._prepare_export_with_default_file_extension()
       else:
         raise ExportLayersError(str(e), layer, self._default_file_extension)
+    except pg.pngwriter.PngWriterError as e:
+      raise ExportLayersError(str(e), e.context, self._default_file_extension)
     else:
-      self._current_layer_export_status = ExportStatuses.EXPORT_SUCCESSFUL
+      # Images saved via the PNG writer are written later.
+      if self._current_layer_export_status != ExportStatuses.EXPORT_PENDING:
+        self._current_layer_export_status = ExportStatuses.EXPORT_SUCCESSFUL
   
   def _was_export_canceled_by_user(self, exception_message):
     return any(
@@ -674,13 +1303,16 @@ class LayerExporter(object):
     return (
       "calling error" in exception_message.lower()
       and current_run_mode in (
-        gimpenums.RUN_WITH_LAST_VALS, gimpenums.RUN_NONINTERACTIVE))
+        gimpenums.RUN_WITH_LAST_VALS, gimpenums.RUN_NONINTERACTIVE)
+      and self._get_export_func_with_save_options() is None)
   
   def _prepare_export_with_interactive_run_mode(self):
     self._current_layer_export_status = ExportStatuses.FORCE_INTERACTIVE
   
   def _should_export_again_with_default_file_extension(self):
-    return self._current_file_extension != self._default_file_extension
+    return (
+      self._current_file_extension != self._default_file_extension
+      and not self._is_exporting_in_additional_file_format)
   
   def _prepare_export_with_default_file_extension(self):
     self._file_extension_properties[self._current_file_extension].is_valid = False
@@ -704,21 +1336,51 @@ class LayerExporter(object):
 
 _LAYER_EXPORTER_ARG_POSITION_IN_CONSTRAINTS = 1
 
+_TOGGLE_VISIBILITY_PROCEDURES = [
+  None,
+  builtin_procedures.resize_to_layer_size,
+  builtin_procedures.insert_background_layer,
+  builtin_procedures.insert_foreground_layer,
+]
+
+# Rough costs relative to processing a single pixel, used to choose the export
+# engine.
+_PDB_CALL_COST = 4096
+_LAYER_TRANSLATION_COST = 16
+
+_TAGGED_LAYER_INSERTING_PROCEDURES = [
+  builtin_procedures.insert_background_layer,
+  builtin_procedures.insert_foreground_layer,
+]
+
+_LAYER_BOUNDS_PRESERVING_PROCEDURES = [
+  None,
+  builtin_procedures.resize_to_layer_size,
+  builtin_procedures.insert_background_layer,
+  builtin_procedures.insert_foreground_layer,
+  builtin_procedures.inherit_transparency_from_layer_groups,
+  builtin_procedures.autocrop_tagged_layer,
+]
+
+
+def _get_num_pixels(layer):
+  return layer.width * layer.height
+
 
 def add_operation_from_settings(operation, executor):
   if operation.get_value("is_pdb_procedure", False):
     try:
-      function = pdb[operation["function"].value.encode(pg.GIMP_CHARACTER_ENCODING)]
+      function = pdb[operation.get_value("function").encode(pg.GIMP_CHARACTER_ENCODING)]
     except KeyError:
       raise InvalidPdbProcedureError(
-        "invalid PDB procedure '{}'".format(operation["function"].value))
+        "invalid PDB procedure '{}'".format(operation.get_value("function")))
   else:
-    function = operation["function"].value
+    function = operation.get_value("function")
   
   if function is None:
     return
   
-  function_args = tuple(arg_setting.value for arg_setting in operation["arguments"])
+  function_args = tuple(operation.get_argument_values())
   function_kwargs = {}
   
   if operation.get_value("is_pdb_procedure", False):
@@ -732,12 +1394,12 @@ def add_operation_from_settings(operation, executor):
     function = _get_operation_func_with_replaced_placeholders(function)
   
   if "constraint" in operation.tags:
-    function = _get_constraint_func(function, subfilter=operation["subfilter"].value)
+    function = _get_constraint_func(function, subfilter=operation.get_value("subfilter"))
   
-  function = _execute_operation_only_if_enabled(function, operation["enabled"])
+  function = _execute_operation_only_if_enabled(function, operation)
   
   executor.add(
-    function, operation["operation_groups"].value, function_args, function_kwargs)
+    function, operation.get_value("operation_groups"), function_args, function_kwargs)
 
 
 def _has_run_mode_param(pdb_procedure):
@@ -760,9 +1422,9 @@ def _get_operation_func_with_replaced_placeholders(function):
   return _operation
 
 
-def _execute_operation_only_if_enabled(operation, setting_enabled):
+def _execute_operation_only_if_enabled(operation, operation_record):
   def _execute_operation(*operation_args, **operation_kwargs):
-    if setting_enabled.value:
+    if operation_record.get_value("enabled"):
       return operation(*operation_args, **operation_kwargs)
     else:
       return False
@@ -881,5 +1543,15 @@ class InvalidPdbProcedureError(ExportLayersError):
 
 class ExportStatuses(object):
   EXPORT_STATUSES = (
-    NOT_EXPORTED_YET, EXPORT_SUCCESSFUL, FORCE_INTERACTIVE, USE_DEFAULT_FILE_EXTENSION
-  ) = (0, 1, 2, 3)
+    NOT_EXPORTED_YET,
+    EXPORT_SUCCESSFUL,
+    FORCE_INTERACTIVE,
+    USE_DEFAULT_FILE_EXTENSION,
+    EXPORT_PENDING,
+  ) = (0, 1, 2, 3, 4)
+
+
+class ExportEngines(object):
+  EXPORT_ENGINES = (
+    COPY_LAYERS, TOGGLE_VISIBILITY
+  ) = (0, 1)
@@ -129,6 +129,73 @@ def display_reset_prompt(parent=None, more_settings_shown=False):
   return response_id, clear_operations
 
 
+def display_save_options_dialog(save_options, parent=None):
+  """
+  Display a dialog allowing the user to edit the save options of a file format
+  before layers are saved in that file format. Return `True` if the user
+  confirmed the save options, `False` if the user cancelled the dialog.
+  """
+  dialog = gimpui.Dialog(
+    title=pg.config.PLUGIN_TITLE,
+    role=None,
+    parent=parent,
+    flags=gtk.DIALOG_MODAL | gtk.DIALOG_DESTROY_WITH_PARENT,
+    buttons=(gtk.STOCK_OK, gtk.RESPONSE_OK, gtk.STOCK_CANCEL, gtk.RESPONSE_CANCEL))
+  dialog.set_transient_for(parent)
+  dialog.set_resizable(False)
+  dialog.set_default_response(gtk.RESPONSE_OK)
+  dialog.set_alternative_button_order((gtk.RESPONSE_OK, gtk.RESPONSE_CANCEL))
+  
+  label_file_format = gtk.Label()
+  label_file_format.set_alignment(0.0, 0.5)
+  label_file_format.set_markup(
+    "<b>{}</b>".format(gobject.markup_escape_text(save_options.display_name)))
+  
+  table_save_options = gtk.Table(homogeneous=False)
+  table_save_options.set_row_spacings(4)
+  table_save_options.set_col_spacings(8)
+  
+  # The GUI is created only here as most save options are never edited.
+  save_options.initialize_gui()
+  
+  for i, setting in enumerate(save_options):
+    label = gtk.Label(setting.display_name)
+    label.set_alignment(0.0, 0.5)
+    table_save_options.attach(label, 0, 1, i, i + 1)
+    table_save_options.attach(setting.gui.element, 1, 2, i, i + 1)
+  
+  vbox = gtk.VBox()
+  vbox.set_border_width(8)
+  vbox.set_spacing(8)
+  vbox.pack_start(label_file_format, expand=False, fill=False)
+  vbox.pack_start(table_save_options, expand=True, fill=True)
+  
+  dialog.vbox.pack_start(vbox, expand=False, fill=False)
+  
+  save_options_values_before_dialog = {
+    setting.get_path(save_options): setting.value for setting in save_options.walk()}
+  
+  dialog.set_focus(dialog.get_widget_for_response(gtk.RESPONSE_OK))
+  
+  dialog.show_all()
+  response_id = dialog.run()
+  
+  if response_id == gtk.RESPONSE_OK:
+    save_options.apply_gui_values_to_settings()
+  else:
+    with save_options.batch_events():
+      save_options.set_values(save_options_values_before_dialog)
+  
+  # Keep the GUI elements of the save options alive after the dialog is
+  # destroyed so that the settings can still read their values.
+  for child in list(table_save_options.get_children()):
+    table_save_options.remove(child)
+  
+  dialog.destroy()
+  
+  return response_id == gtk.RESPONSE_OK
+
+
 @contextlib.contextmanager
 def handle_gui_in_export(run_mode, image, layer, output_filepath, window):
   should_manipulate_window = run_mode == gimpenums.RUN_INTERACTIVE
@@ -347,7 +414,9 @@ class ExportLayersDialog(object):
     self._settings["main/procedures"].tags.add("ignore_load")
     self._settings["main/constraints"].tags.add("ignore_load")
     
-    status, status_message = self._settings.load()
+    with self._settings.batch_events():
+      status, status_message = self._settings.load()
+    
     if status == pg.setting.Persistor.READ_FAIL:
       messages_.display_message(status_message, gtk.MESSAGE_WARNING)
     
@@ -667,6 +736,7 @@ class ExportLayersDialog(object):
         self._image.ID],
       self._settings["main/selected_layers"].value[self._image.ID],
       self._settings["main/available_tags"])
+    self._name_preview.is_lazy = True
     
     self._image_preview = preview_image_.ExportImagePreview(
       self._layer_exporter_for_previews)
@@ -683,7 +753,8 @@ class ExportLayersDialog(object):
       return True
   
   def _reset_settings(self):
-    self._settings.reset()
+    with self._settings.batch_events():
+      self._settings.reset()
   
   def _on_text_entry_changed(self, entry, setting, name_preview_lock_update_key=None):
     try:
@@ -740,8 +811,11 @@ class ExportLayersDialog(object):
       return
   
   def _on_image_preview_updated(self, preview, update_duration_seconds):
+    # The preview lowers its resolution if updates take too long. Automatic
+    # update is therefore disabled only if even the lowest resolution is slow.
     if (self._settings[
          "gui/image_preview_automatic_update_if_below_maximum_duration"].value
+        and preview.render_scale <= preview.MIN_RENDER_SCALE
         and (update_duration_seconds
              >= self._MAXIMUM_IMAGE_PREVIEW_AUTOMATIC_UPDATE_DURATION_SECONDS)):
       self._settings["gui/image_preview_automatic_update"].set_value(False)
@@ -871,7 +945,9 @@ class ExportLayersDialog(object):
       overwrite_chooser,
       progress_updater,
       export_context_manager=handle_gui_in_export,
-      export_context_manager_args=[self._dialog])
+      export_context_manager_args=[self._dialog],
+      save_options_editor=functools.partial(
+        display_save_options_dialog, parent=self._dialog))
     
     return overwrite_chooser, progress_updater
   
@@ -956,7 +1032,8 @@ class ExportLayersRepeatDialog(object):
     self._image = self._layer_tree.image
     self._layer_exporter = None
     
-    self._settings.load([pg.config.SESSION_SOURCE])
+    with self._settings.batch_events():
+      self._settings.load([pg.config.SESSION_SOURCE])
     
     self._init_gui()
     
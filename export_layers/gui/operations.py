@@ -112,10 +112,13 @@ class OperationBox(pg.gui.ItemBox):
     
     self._init_gui()
     
+    # Operations are passed as records. Groups for the operations are created
+    # only once they are displayed in the box.
     self._after_add_operation_event_id = self._operations.connect_event(
       "after-add-operation",
       lambda operations_, operation, orig_operation_dict: (
-        self._add_item_from_operation(operation)))
+        self._add_item_from_operation(
+          operations.get_operation(operations_, operation.name))))
     
     self._after_reorder_operation_event_id = self._operations.connect_event(
       "after-reorder-operation",
@@ -202,7 +205,8 @@ class OperationBox(pg.gui.ItemBox):
     
     # HACK: Prevent displaying horizontal scrollbar by ellipsizing labels. To
     # make ellipsizing work properly, the label width must be set explicitly.
-    if isinstance(operation["enabled"].gui, pg.setting.SettingGuiTypes.check_button):
+    if isinstance(
+        operation["enabled"].gui, pg.setting.presenters_gtk.SettingGuiTypes.check_button):
       operation["enabled"].gui.element.set_property("width-request", 1)
       operation["enabled"].gui.element.get_child().set_ellipsize(pango.ELLIPSIZE_END)
       operation["enabled"].gui.element.get_child().set_max_width_chars(
@@ -212,6 +216,14 @@ class OperationBox(pg.gui.ItemBox):
         self._on_operation_item_gui_label_size_allocate,
         operation["enabled"].gui.element)
   
+  def _init_operation_arguments_gui(self, item):
+    # GUI for arguments is only displayed in the edit dialog. Creating the GUI
+    # when the dialog is first opened rather than for every added item avoids
+    # creating widgets for arguments of operations that are never edited.
+    if not item.is_arguments_gui_initialized:
+      item.operation["arguments"].initialize_gui()
+      item.is_arguments_gui_initialized = True
+  
   def _on_operation_item_gui_label_size_allocate(
         self, item_gui_label, allocation, item_gui):
     if pg.gui.label_fits_text(item_gui_label):
@@ -239,7 +251,7 @@ class OperationBox(pg.gui.ItemBox):
       self._remove_item(item)
     else:
       raise ValueError("operation '{}' does not match any item in '{}'".format(
-        operation.get_path(), self))
+        operation.name, self))
   
   def _remove_item(self, item):
     if self._get_item_position(item) == len(self._items) - 1:
@@ -332,6 +344,8 @@ class OperationBox(pg.gui.ItemBox):
         
         item = self.add_item(pdb_proc_operation_dict)
         
+        self._init_operation_arguments_gui(item)
+        
         operation_edit_dialog = _OperationEditDialog(
           item.operation,
           pdb_procedure,
@@ -366,6 +380,8 @@ class OperationBox(pg.gui.ItemBox):
     else:
       pdb_procedure = None
     
+    self._init_operation_arguments_gui(item)
+    
     operation_values_before_dialog = {
       setting.get_path(item.operation): setting.value
       for setting in item.operation.walk()}
@@ -393,7 +409,8 @@ class OperationBox(pg.gui.ItemBox):
     if response_id == gtk.RESPONSE_OK:
       item.operation["arguments"].apply_gui_values_to_settings()
     else:
-      item.operation.set_values(operation_values_before_dialog)
+      with item.operation.batch_events():
+        item.operation.set_values(operation_values_before_dialog)
     
     item.operation_edit_dialog = None
   
@@ -416,6 +433,7 @@ class _OperationBoxItem(pg.gui.ItemBoxItem):
     super().__init__(item_widget)
     
     self.operation_edit_dialog = None
+    self.is_arguments_gui_initialized = False
     
     self._operation = operation
     
@@ -529,7 +547,8 @@ class _OperationEditDialog(gimpui.Dialog):
       self._table_operation_arguments.attach(gui_element_to_attach, 1, 2, i, i + 1)
   
   def _on_button_reset_clicked(self, button, operation):
-    operation["arguments"].reset()
+    with operation["arguments"].batch_events():
+      operation["arguments"].reset()
   
   def _on_label_procedure_name_changed(self, editable_label, operation):
     operation["display_name"].set_value(editable_label.label.get_text())
@@ -30,7 +30,7 @@ import gimpui
 from export_layers import pygimplib as pg
 
 
-class GimpObjectPlaceholdersComboBoxPresenter(pg.setting.GtkPresenter):
+class GimpObjectPlaceholdersComboBoxPresenter(pg.setting.presenters_gtk.GtkPresenter):
   """
   This class is a `setting.presenter.Presenter` subclass for
   `gimpui.IntComboBox` elements used for `placeholders.PlaceholderSetting`.
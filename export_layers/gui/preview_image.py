@@ -25,7 +25,8 @@ to be exported.
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
-import array
+import collections
+import math
 import time
 import traceback
 
@@ -70,10 +71,21 @@ class ExportImagePreview(preview_base_.ExportPreview):
   This class defines a widget displaying a preview of an image to be exported,
   including its name.
   
+  If updates take too long, the image is rendered at a lower resolution and
+  scaled up to the preview size, until the updates are fast enough again. Once
+  no update has been requested for a while, the image is rendered again at full
+  resolution.
+  
+  Attributes:
+  
+  * `render_scale` (read-only) - Resolution of the last rendered image relative
+    to the preview size. 1.0 means the image is rendered at full resolution.
+  
   Signals:
   
   * `"preview-updated"` - The preview was updated by calling `update()`. This
-    signal is not emitted if the update is locked.
+    signal is not emitted if the update is locked. The signal is also emitted
+    after the image is rendered again at full resolution.
     
     Arguments:
     
@@ -86,6 +98,12 @@ class ExportImagePreview(preview_base_.ExportPreview):
     b"preview-updated": (gobject.SIGNAL_RUN_FIRST, None, (gobject.TYPE_FLOAT,)),
   }
   
+  _MAX_CACHED_PIXBUFS = 4
+  
+  MIN_RENDER_SCALE = 0.25
+  _TARGET_UPDATE_DURATION_SECONDS = 0.3
+  _FULL_QUALITY_UPDATE_DELAY_MILLISECONDS = 1000
+  
   _MANUAL_UPDATE_LOCK = "_manual_update"
   
   _WIDGET_SPACING = 5
@@ -106,6 +124,9 @@ class ExportImagePreview(preview_base_.ExportPreview):
     
     self.draw_checkboard_alpha_background = True
     
+    self._pixbuf_cache = _PixbufCache(self._MAX_CACHED_PIXBUFS)
+    self._checkboard_pixbuf_cache = _PixbufCache(self._MAX_CACHED_PIXBUFS)
+    
     self._is_updating = False
     self._is_preview_image_allocated_size = False
     
@@ -113,6 +134,10 @@ class ExportImagePreview(preview_base_.ExportPreview):
     self._preview_height = None
     self._preview_scaling_factor = None
     
+    self._render_scale = 1.0
+    self._last_render_scale = 1.0
+    self._is_full_quality_update = False
+    
     self._resize_image_operation_id = None
     self._scale_layer_operation_id = None
     
@@ -150,11 +175,18 @@ class ExportImagePreview(preview_base_.ExportPreview):
   def menu_item_update_automatically(self):
     return self._menu_item_update_automatically
   
+  @property
+  def render_scale(self):
+    return self._last_render_scale
+  
   def update(self):
     update_locked = super().update()
     if update_locked:
       return
     
+    if not self._is_full_quality_update:
+      pg.invocation.timeout_remove_strict(self._update_at_full_quality)
+    
     if self.layer_elem is None:
       return
     
@@ -172,6 +204,7 @@ class ExportImagePreview(preview_base_.ExportPreview):
       self._set_contents()
   
   def clear(self, use_layer_name=False):
+    pg.invocation.timeout_remove_strict(self._update_at_full_quality)
     self.layer_elem = None
     self._preview_image.clear()
     self._preview_image.hide()
@@ -255,8 +288,13 @@ class ExportImagePreview(preview_base_.ExportPreview):
     
     start_update_time = time.time()
     
+    if self._is_full_quality_update:
+      render_scale = 1.0
+    else:
+      render_scale = self._render_scale
+    
     with pg.pdbutils.redirect_messages():
-      preview_pixbuf = self._get_in_memory_preview(self.layer_elem.item)
+      preview_pixbuf = self._get_in_memory_preview(self.layer_elem.item, render_scale)
     
     if preview_pixbuf is not None:
       self._preview_image.set_from_pixbuf(preview_pixbuf)
@@ -269,8 +307,38 @@ class ExportImagePreview(preview_base_.ExportPreview):
     
     update_duration_seconds = time.time() - start_update_time
     
+    self._last_render_scale = render_scale
+    
+    if not self._is_full_quality_update:
+      self._adjust_render_scale(update_duration_seconds)
+      
+      if render_scale < 1.0 and preview_pixbuf is not None:
+        pg.invocation.timeout_add_strict(
+          self._FULL_QUALITY_UPDATE_DELAY_MILLISECONDS, self._update_at_full_quality)
+    
     self.emit("preview-updated", update_duration_seconds)
   
+  def _adjust_render_scale(self, update_duration_seconds):
+    # The duration of processing is assumed to be roughly proportional to the
+    # number of pixels, i.e. to the square of the scale. The scale is increased
+    # at most twofold at a time so that a single fast update does not result
+    # in a very slow one.
+    scale_multiplier = math.sqrt(
+      self._TARGET_UPDATE_DURATION_SECONDS / max(update_duration_seconds, 1e-3))
+    
+    if update_duration_seconds > self._TARGET_UPDATE_DURATION_SECONDS:
+      self._render_scale = max(
+        self.MIN_RENDER_SCALE, self._render_scale * scale_multiplier)
+    elif update_duration_seconds < self._TARGET_UPDATE_DURATION_SECONDS / 2:
+      self._render_scale = min(1.0, self._render_scale * min(scale_multiplier, 2.0))
+  
+  def _update_at_full_quality(self):
+    self._is_full_quality_update = True
+    try:
+      self.update()
+    finally:
+      self._is_full_quality_update = False
+  
   def _init_gui(self):
     self._button_menu = gtk.Button()
     self._button_menu.set_relief(gtk.RELIEF_NONE)
@@ -318,10 +386,10 @@ class ExportImagePreview(preview_base_.ExportPreview):
         
     self._show_placeholder_image()
   
-  def _get_in_memory_preview(self, layer):
+  def _get_in_memory_preview(self, layer, render_scale=1.0):
     self._preview_width, self._preview_height = self._get_preview_size(
       layer.width, layer.height)
-    self._preview_scaling_factor = self._preview_width / layer.width
+    self._preview_scaling_factor = (self._preview_width / layer.width) * render_scale
     
     image_preview = self._get_image_preview()
     
@@ -342,13 +410,21 @@ class ExportImagePreview(preview_base_.ExportPreview):
     
     # Recompute the size as the layer may have been resized during the export.
     self._preview_width, self._preview_height = self._get_preview_size(
-      layer_preview.width, layer_preview.height)
+      int(round(layer_preview.width / render_scale)),
+      int(round(layer_preview.height / render_scale)))
     
-    self._preview_width, self._preview_height, preview_data = self._get_preview_data(
-      layer_preview, self._preview_width, self._preview_height)
+    rendered_width, rendered_height, preview_data = self._get_preview_data(
+      layer_preview,
+      max(1, min(layer_preview.width, int(round(self._preview_width * render_scale)))),
+      max(1, min(layer_preview.height, int(round(self._preview_height * render_scale)))))
     
     layer_preview_pixbuf = self._get_preview_pixbuf(
-      layer_preview, self._preview_width, self._preview_height, preview_data)
+      layer_preview,
+      rendered_width,
+      rendered_height,
+      preview_data,
+      self._preview_width,
+      self._preview_height)
     
     pdb.gimp_image_delete(image_preview)
     
@@ -400,7 +476,14 @@ class ExportImagePreview(preview_base_.ExportPreview):
         (layer.offsets[0] + layer.width) * self._preview_scaling_factor,
         (layer.offsets[1] + layer.height) * self._preview_scaling_factor)
   
-  def _get_preview_pixbuf(self, layer, preview_width, preview_height, preview_data):
+  def _get_preview_pixbuf(
+        self,
+        layer,
+        rendered_width,
+        rendered_height,
+        preview_data,
+        preview_width,
+        preview_height):
     # The following code is largely based on the implementation of
     # `gimp_pixbuf_from_data` from:
     # https://github.com/GNOME/gimp/blob/gimp-2-8/libgimp/gimppixbuf.c
@@ -409,20 +492,36 @@ class ExportImagePreview(preview_base_.ExportPreview):
       gtk.gdk.COLORSPACE_RGB,
       layer.has_alpha,
       8,
-      preview_width,
-      preview_height,
-      preview_width * layer.bpp)
+      rendered_width,
+      rendered_height,
+      rendered_width * layer.bpp)
+    
+    if rendered_width != preview_width or rendered_height != preview_height:
+      # The image was rendered at a lower resolution.
+      upscaled_preview_pixbuf = self._pixbuf_cache.get(
+        ("upscaled", preview_width, preview_height, layer.has_alpha),
+        lambda: gtk.gdk.Pixbuf(
+          gtk.gdk.COLORSPACE_RGB, layer.has_alpha, 8, preview_width, preview_height))
+      
+      layer_preview_pixbuf.scale(
+        upscaled_preview_pixbuf,
+        0,
+        0,
+        preview_width,
+        preview_height,
+        0,
+        0,
+        preview_width / rendered_width,
+        preview_height / rendered_height,
+        gtk.gdk.INTERP_BILINEAR)
+      
+      layer_preview_pixbuf = upscaled_preview_pixbuf
     
     self._preview_pixbuf = layer_preview_pixbuf
     
     if layer.has_alpha:
       layer_preview_pixbuf = self._add_alpha_background_to_pixbuf(
-        layer_preview_pixbuf,
-        layer.opacity,
-        self.draw_checkboard_alpha_background,
-        self._PREVIEW_ALPHA_CHECK_SIZE,
-        self._preview_alpha_check_color_first,
-        self._preview_alpha_check_color_second)
+        layer_preview_pixbuf, layer.opacity)
     
     return layer_preview_pixbuf
   
@@ -468,16 +567,32 @@ class ExportImagePreview(preview_base_.ExportPreview):
         and self._previous_preview_pixbuf_height == scaled_preview_height):
       return
     
-    scaled_preview_pixbuf = preview_pixbuf.scale_simple(
-      scaled_preview_width, scaled_preview_height, gtk.gdk.INTERP_BILINEAR)
+    scaled_preview_pixbuf = self._pixbuf_cache.get(
+      ("scaled",
+       scaled_preview_width,
+       scaled_preview_height,
+       preview_pixbuf.get_has_alpha()),
+      lambda: gtk.gdk.Pixbuf(
+        gtk.gdk.COLORSPACE_RGB,
+        preview_pixbuf.get_has_alpha(),
+        8,
+        scaled_preview_width,
+        scaled_preview_height))
     
-    scaled_preview_pixbuf = self._add_alpha_background_to_pixbuf(
+    preview_pixbuf.scale(
       scaled_preview_pixbuf,
-      100,
-      self.draw_checkboard_alpha_background,
-      self._PREVIEW_ALPHA_CHECK_SIZE,
-      self._preview_alpha_check_color_first,
-      self._preview_alpha_check_color_second)
+      0,
+      0,
+      scaled_preview_width,
+      scaled_preview_height,
+      0,
+      0,
+      scaled_preview_width / preview_pixbuf.get_width(),
+      scaled_preview_height / preview_pixbuf.get_height(),
+      gtk.gdk.INTERP_BILINEAR)
+    
+    scaled_preview_pixbuf = self._add_alpha_background_to_pixbuf(
+      scaled_preview_pixbuf, 100)
     
     self._preview_image.set_from_pixbuf(scaled_preview_pixbuf)
     self.queue_draw()
@@ -537,72 +652,127 @@ class ExportImagePreview(preview_base_.ExportPreview):
     else:
       self.update()
   
-  @staticmethod
-  def _add_alpha_background_to_pixbuf(
-        pixbuf,
-        opacity,
-        use_checkboard_background=False,
-        check_size=None,
-        check_color_first=None,
-        check_color_second=None):
-    if use_checkboard_background:
-      pixbuf_with_alpha_background = gtk.gdk.Pixbuf(
-        gtk.gdk.COLORSPACE_RGB,
-        False,
-        8,
-        pixbuf.get_width(),
-        pixbuf.get_height())
+  def _add_alpha_background_to_pixbuf(self, pixbuf, opacity):
+    """
+    Composite `pixbuf` onto a background - a checkerboard if
+    `draw_checkboard_alpha_background` is `True`, transparent white otherwise.
+    
+    The returned pixbuf is reused across calls for the same size. The
+    checkerboard itself is only drawn once for each combination of size and
+    check colors.
+    """
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
+    
+    if self.draw_checkboard_alpha_background:
+      pixbuf_with_alpha_background = self._pixbuf_cache.get(
+        ("background", width, height, False),
+        lambda: gtk.gdk.Pixbuf(gtk.gdk.COLORSPACE_RGB, False, 8, width, height))
+      
+      self._get_checkboard_pixbuf(
+        width,
+        height,
+        self._PREVIEW_ALPHA_CHECK_SIZE,
+        self._preview_alpha_check_color_first,
+        self._preview_alpha_check_color_second,
+      ).copy_area(0, 0, width, height, pixbuf_with_alpha_background, 0, 0)
+    else:
+      pixbuf_with_alpha_background = self._pixbuf_cache.get(
+        ("background", width, height, True),
+        lambda: gtk.gdk.Pixbuf(gtk.gdk.COLORSPACE_RGB, True, 8, width, height))
       
-      pixbuf.composite_color(
-        pixbuf_with_alpha_background,
+      pixbuf_with_alpha_background.fill(0xffffff00)
+    
+    pixbuf.composite(
+      pixbuf_with_alpha_background,
+      0,
+      0,
+      width,
+      height,
+      0,
+      0,
+      1.0,
+      1.0,
+      gtk.gdk.INTERP_NEAREST,
+      int(round((opacity / 100.0) * 255)))
+    
+    return pixbuf_with_alpha_background
+  
+  def _get_checkboard_pixbuf(
+        self, width, height, check_size, check_color_first, check_color_second):
+    
+    def _create_checkboard_pixbuf():
+      transparent_pixbuf = gtk.gdk.Pixbuf(gtk.gdk.COLORSPACE_RGB, True, 8, width, height)
+      transparent_pixbuf.fill(0x00000000)
+      
+      checkboard_pixbuf = gtk.gdk.Pixbuf(gtk.gdk.COLORSPACE_RGB, False, 8, width, height)
+      
+      transparent_pixbuf.composite_color(
+        checkboard_pixbuf,
         0,
         0,
-        pixbuf.get_width(),
-        pixbuf.get_height(),
+        width,
+        height,
         0,
         0,
         1.0,
         1.0,
         gtk.gdk.INTERP_NEAREST,
-        int(round((opacity / 100.0) * 255)),
+        255,
         0,
         0,
         check_size,
         check_color_first,
         check_color_second)
-    else:
-      pixbuf_with_alpha_background = gtk.gdk.Pixbuf(
-        gtk.gdk.COLORSPACE_RGB,
-        True,
-        8,
-        pixbuf.get_width(),
-        pixbuf.get_height())
-      pixbuf_with_alpha_background.fill(0xffffff00)
       
-      pixbuf.composite(
-        pixbuf_with_alpha_background,
-        0,
-        0,
-        pixbuf.get_width(),
-        pixbuf.get_height(),
-        0,
-        0,
-        1.0,
-        1.0,
-        gtk.gdk.INTERP_NEAREST,
-        int(round((opacity / 100.0) * 255)))
+      return checkboard_pixbuf
     
-    return pixbuf_with_alpha_background
+    return self._checkboard_pixbuf_cache.get(
+      (width, height, check_size, check_color_first, check_color_second),
+      _create_checkboard_pixbuf)
   
   @staticmethod
   def _get_preview_data(layer, preview_width, preview_height):
-    actual_preview_width, actual_preview_height, unused_, unused_, preview_data = (
-      pdb.gimp_drawable_thumbnail(layer, preview_width, preview_height))
-    
-    return (
-      actual_preview_width,
-      actual_preview_height,
-      array.array(b"B", preview_data).tostring())
+    if layer.width != preview_width or layer.height != preview_height:
+      pdb.gimp_context_push()
+      pdb.gimp_context_set_interpolation(gimpenums.INTERPOLATION_LINEAR)
+      pdb.gimp_layer_scale(layer, preview_width, preview_height, False)
+      pdb.gimp_context_pop()
+    
+    # Reading the pixel region yields the raw pixel data as a single buffer,
+    # unlike `gimp_drawable_thumbnail` returning a tuple of integers that must
+    # be converted to a string first.
+    pixel_region = layer.get_pixel_rgn(0, 0, preview_width, preview_height, False, False)
+    
+    return preview_width, preview_height, pixel_region[0:preview_width, 0:preview_height]
+
 
+class _PixbufCache(object):
+  """
+  This class stores a limited number of pixbufs so that pixbufs of the same size
+  can be reused rather than allocated on each preview update. Least recently
+  used pixbufs are discarded first.
+  """
+  
+  def __init__(self, max_size):
+    self._max_size = max_size
+    self._pixbufs = collections.OrderedDict()
+  
+  def get(self, key, create_pixbuf_func):
+    """
+    Return the pixbuf matching `key`. If there is no such pixbuf, create it via
+    `create_pixbuf_func` and store it.
+    """
+    if key in self._pixbufs:
+      pixbuf = self._pixbufs.pop(key)
+    else:
+      pixbuf = create_pixbuf_func()
+    
+    self._pixbufs[key] = pixbuf
+    
+    while len(self._pixbufs) > self._max_size:
+      self._pixbufs.popitem(last=False)
+    
+    return pixbuf
 
 gobject.type_register(ExportImagePreview)
@@ -55,6 +55,11 @@ class ExportNamePreview(preview_base_.ExportPreview):
   
   * `is_filtering` - If enabled, unselected layers are not sensitive.
   
+  * `is_lazy` - If enabled, children of collapsed layer groups are inserted
+    into the preview only when the group is expanded, which speeds up updates
+    of large layer trees. Until then, collapsed layer groups contain a single
+    empty placeholder row.
+  
   Signals:
   
   * `"preview-selection-changed"` - The selection in the preview was modified
@@ -102,8 +107,16 @@ class ExportNamePreview(preview_base_.ExportPreview):
     self._available_tags_setting = available_tags_setting
     
     self.is_filtering = False
+    self.is_lazy = False
     
     self._tree_iters = collections.defaultdict(pg.utils.return_none_func)
+    # Mapping of item IDs to `(parent item ID, item element)` of all items that
+    # can be displayed, including items not inserted into the tree model yet.
+    self._item_rows = collections.OrderedDict()
+    # Mapping of item IDs to `(parent item ID, row values)` of rows currently in
+    # the tree model. The order of entries within the same parent matches the
+    # order of rows in the tree model.
+    self._rows = collections.OrderedDict()
     
     self._row_expand_collapse_interactive = True
     self._toggle_tag_interactive = True
@@ -136,21 +149,14 @@ class ExportNamePreview(preview_base_.ExportPreview):
     if update_locked:
       return
     
-    if not update_existing_contents_only:
-      self.clear()
-    
     self._process_items(reset_items=reset_items)
     
     self._enable_filtered_items(enabled=True)
     
-    if not update_existing_contents_only:
-      self._insert_items()
-      self._set_expanded_items()
-    else:
-      self._update_items()
+    self._item_rows = self._get_item_rows()
+    self._update_rows(self._get_rows(), update_existing_contents_only)
     
     self._set_selection()
-    self._set_items_sensitive()
     
     self._enable_filtered_items(enabled=False)
     
@@ -167,6 +173,8 @@ class ExportNamePreview(preview_base_.ExportPreview):
     self._clearing_preview = True
     self._tree_model.clear()
     self._tree_iters.clear()
+    self._item_rows.clear()
+    self._rows.clear()
     self._clearing_preview = False
   
   def set_collapsed_items(self, collapsed_items):
@@ -174,6 +182,10 @@ class ExportNamePreview(preview_base_.ExportPreview):
     Set the collapsed state of items in the preview.
     """
     self._collapsed_items = collapsed_items
+    
+    if self.is_lazy:
+      self._update_rows(self._get_rows())
+    
     self._set_expanded_items()
   
   def set_selected_items(self, selected_items):
@@ -499,6 +511,10 @@ class ExportNamePreview(preview_base_.ExportPreview):
       if layer_id in self._collapsed_items:
         self._collapsed_items.remove(layer_id)
       
+      if self.is_lazy:
+        # This replaces the placeholder row with the actual children.
+        self._update_rows(self._get_rows())
+      
       self._set_expanded_items(tree_path)
       
       self._tree_view.columns_autosize()
@@ -536,51 +552,189 @@ class ExportNamePreview(preview_base_.ExportPreview):
     
     self._layer_exporter.export(processing_groups=["layer_name"], layer_tree=layer_tree)
   
-  def _update_items(self):
+  def _get_item_rows(self):
+    item_rows = collections.OrderedDict()
+    
     for layer_elem in self._layer_exporter.layer_tree:
-      self._update_parent_item_elems(layer_elem)
-      self._update_item_elem(layer_elem)
+      for item_elem in list(layer_elem.parents) + [layer_elem]:
+        if item_elem.item.ID not in item_rows:
+          item_rows[item_elem.item.ID] = (
+            item_elem.parent.item.ID if item_elem.parent is not None else None,
+            item_elem)
+    
+    return item_rows
   
-  def _insert_items(self):
-    for layer_elem in self._layer_exporter.layer_tree:
-      self._insert_parent_item_elems(layer_elem)
-      self._insert_item_elem(layer_elem)
+  def _get_rows(self):
+    """
+    Return an ordered dictionary of `(parent item ID, row values)` for each item
+    to be displayed, ordered such that parents precede their children and
+    siblings are in the order they appear in the tree model.
+    
+    In lazy mode, children of collapsed items are replaced with a single
+    placeholder row and row values are not computed for them.
+    """
+    sensitive_items = self._get_sensitive_items() if self.is_filtering else None
+    
+    rows = collections.OrderedDict()
+    
+    for item_id, (parent_id, item_elem) in self._item_rows.items():
+      if parent_id is not None:
+        if parent_id not in rows:
+          continue
+        
+        if self.is_lazy and parent_id in self._collapsed_items:
+          placeholder_row_key = self._get_placeholder_row_key(parent_id)
+          if placeholder_row_key not in rows:
+            rows[placeholder_row_key] = (parent_id, self._get_placeholder_row_values())
+          continue
+      
+      rows[item_id] = (
+        parent_id,
+        [self._get_icon_from_item_elem(item_elem),
+         bool(item_elem.tags),
+         sensitive_items is None or item_id in sensitive_items,
+         item_elem.name.encode(pg.GTK_CHARACTER_ENCODING),
+         item_id])
+    
+    return rows
+  
+  def _get_sensitive_items(self):
+    selected_items = set(self._selected_items)
+    sensitive_items = set()
+    
+    # Children always succeed their parents, hence the sensitive state of
+    # parents can be computed in a single pass in reverse order.
+    for item_id, (parent_id, unused_) in reversed(list(self._item_rows.items())):
+      if item_id in selected_items or item_id in sensitive_items:
+        sensitive_items.add(item_id)
+        sensitive_items.add(parent_id)
+    
+    return sensitive_items
+  
+  @staticmethod
+  def _get_placeholder_row_key(parent_id):
+    return (parent_id,)
+  
+  @staticmethod
+  def _get_placeholder_row_values():
+    return [None, False, True, b"", -1]
+  
+  def _update_rows(self, new_rows, update_existing_contents_only=False):
+    """
+    Apply the minimum number of changes to the tree model for its rows to match
+    `new_rows`.
+    
+    Rows no longer present or moved to a different parent are removed, new rows
+    are appended, rows whose siblings changed order are reordered and cells of
+    the remaining rows are updated only if their values differ. Rows not
+    affected by the changes retain their expanded state and selection.
+    
+    If `update_existing_contents_only` is `True`, only update cells of existing
+    rows.
+    """
+    if not update_existing_contents_only:
+      self._remove_rows(new_rows)
+    
+    inserted_item_ids = []
+    
+    for item_id, (parent_id, values) in new_rows.items():
+      if item_id in self._rows:
+        current_parent_id, current_values = self._rows[item_id]
+        self._update_row_values(item_id, current_values, values)
+        self._rows[item_id] = (current_parent_id, values)
+      elif not update_existing_contents_only:
+        if parent_id is not None:
+          parent_tree_iter = self._tree_iters[parent_id]
+        else:
+          parent_tree_iter = None
+        
+        self._tree_iters[item_id] = self._tree_model.append(parent_tree_iter, values)
+        inserted_item_ids.append(item_id)
+    
+    if not update_existing_contents_only:
+      self._reorder_rows(new_rows, inserted_item_ids)
+      self._rows = new_rows
+      self._expand_parents_of_inserted_rows(inserted_item_ids)
   
-  def _insert_item_elem(self, item_elem):
-    if item_elem.parent:
-      parent_tree_iter = self._tree_iters[item_elem.parent.item.ID]
-    else:
-      parent_tree_iter = None
-    
-    tree_iter = self._tree_model.append(
-      parent_tree_iter,
-      [self._get_icon_from_item_elem(item_elem),
-       bool(item_elem.tags),
-       True,
-       item_elem.name.encode(pg.GTK_CHARACTER_ENCODING),
-       item_elem.item.ID])
-    self._tree_iters[item_elem.item.ID] = tree_iter
-    
-    return tree_iter
-  
-  def _update_item_elem(self, item_elem):
-    self._tree_model.set(
-      self._tree_iters[item_elem.item.ID],
-      self._COLUMN_ICON_TAG_VISIBLE[0],
-      bool(item_elem.tags),
-      self._COLUMN_LAYER_NAME_SENSITIVE[0],
-      True,
-      self._COLUMN_LAYER_NAME[0],
-      item_elem.name.encode(pg.GTK_CHARACTER_ENCODING))
-  
-  def _insert_parent_item_elems(self, item_elem):
-    for parent_elem in item_elem.parents:
-      if not self._tree_iters[parent_elem.item.ID]:
-        self._insert_item_elem(parent_elem)
-  
-  def _update_parent_item_elems(self, item_elem):
-    for parent_elem in item_elem.parents:
-      self._update_item_elem(parent_elem)
+  def _remove_rows(self, new_rows):
+    item_ids_to_remove = [
+      item_id for item_id, (parent_id, unused_) in self._rows.items()
+      if item_id not in new_rows or new_rows[item_id][0] != parent_id]
+    
+    if not item_ids_to_remove:
+      return
+    
+    children = collections.defaultdict(list)
+    for item_id, (parent_id, unused_) in self._rows.items():
+      children[parent_id].append(item_id)
+    
+    self._clearing_preview = True
+    
+    for item_id in item_ids_to_remove:
+      # The row may have already been removed along with its parent.
+      if item_id not in self._rows:
+        continue
+      
+      self._tree_model.remove(self._tree_iters[item_id])
+      
+      # Removing a row removes all of its descendants from the model as well.
+      item_ids_in_subtree = [item_id]
+      while item_ids_in_subtree:
+        removed_item_id = item_ids_in_subtree.pop()
+        self._rows.pop(removed_item_id, None)
+        self._tree_iters.pop(removed_item_id, None)
+        item_ids_in_subtree.extend(children[removed_item_id])
+    
+    self._clearing_preview = False
+  
+  def _update_row_values(self, item_id, values, new_values):
+    changed_columns_and_values = []
+    for column, (value, new_value) in enumerate(zip(values, new_values)):
+      if value != new_value:
+        changed_columns_and_values.extend([column, new_value])
+    
+    if changed_columns_and_values:
+      self._tree_model.set(self._tree_iters[item_id], *changed_columns_and_values)
+  
+  def _reorder_rows(self, new_rows, inserted_item_ids):
+    # Existing rows retain their relative order and inserted rows are appended.
+    # This allows determining the current order of rows without querying the
+    # model.
+    current_children = collections.OrderedDict()
+    for item_id, (parent_id, unused_) in self._rows.items():
+      current_children.setdefault(parent_id, []).append(item_id)
+    for item_id in inserted_item_ids:
+      current_children.setdefault(new_rows[item_id][0], []).append(item_id)
+    
+    new_children = collections.defaultdict(list)
+    for item_id, (parent_id, unused_) in new_rows.items():
+      new_children[parent_id].append(item_id)
+    
+    for parent_id, child_ids in current_children.items():
+      if child_ids != new_children[parent_id]:
+        current_positions = {
+          child_id: position for position, child_id in enumerate(child_ids)}
+        self._tree_model.reorder(
+          self._tree_iters[parent_id] if parent_id is not None else None,
+          [current_positions[child_id] for child_id in new_children[parent_id]])
+  
+  def _expand_parents_of_inserted_rows(self, inserted_item_ids):
+    self._row_expand_collapse_interactive = False
+    
+    self._remove_no_longer_valid_collapsed_items()
+    
+    parent_ids = set(
+      self._rows[item_id][0] for item_id in inserted_item_ids
+      if self._rows[item_id][0] is not None)
+    
+    # Parents are expanded top to bottom. Rows whose parent is collapsed cannot
+    # be expanded and are handled once the parent is expanded by the user.
+    for item_id in self._rows:
+      if item_id in parent_ids and item_id not in self._collapsed_items:
+        self._tree_view.expand_row(
+          self._tree_model.get_path(self._tree_iters[item_id]), False)
+    
+    self._row_expand_collapse_interactive = True
   
   def _enable_filtered_items(self, enabled):
     if self.is_filtering:
@@ -591,36 +745,6 @@ class ExportNamePreview(preview_base_.ExportPreview):
         self._layer_exporter.layer_tree.filter.remove_rule(
           builtin_constraints.is_layer_in_selected_layers, raise_if_not_found=False)
   
-  def _set_items_sensitive(self):
-    if self.is_filtering:
-      self._set_item_elems_sensitive(self._layer_exporter.layer_tree, False)
-      self._set_item_elems_sensitive(
-        [self._layer_exporter.layer_tree[item_id] for item_id in self._selected_items],
-        True)
-  
-  def _get_item_elem_sensitive(self, item_elem):
-    return self._tree_model.get_value(
-      self._tree_iters[item_elem.item.ID], self._COLUMN_LAYER_NAME_SENSITIVE[0])
-  
-  def _set_item_elem_sensitive(self, item_elem, sensitive):
-    if self._tree_iters[item_elem.item.ID] is not None:
-      self._tree_model.set_value(
-        self._tree_iters[item_elem.item.ID],
-        self._COLUMN_LAYER_NAME_SENSITIVE[0],
-        sensitive)
-  
-  def _set_parent_item_elems_sensitive(self, item_elem):
-    for parent_elem in reversed(list(item_elem.parents)):
-      parent_sensitive = any(
-        self._get_item_elem_sensitive(child_elem) for child_elem in parent_elem.children
-        if child_elem.item.ID in self._tree_iters)
-      self._set_item_elem_sensitive(parent_elem, parent_sensitive)
-  
-  def _set_item_elems_sensitive(self, item_elems, sensitive):
-    for item_elem in item_elems:
-      self._set_item_elem_sensitive(item_elem, sensitive)
-      self._set_parent_item_elems_sensitive(item_elem)
-  
   def _get_icon_from_item_elem(self, item_elem):
     if item_elem.item_type == item_elem.ITEM:
       return self._icons["layer"]
@@ -676,7 +800,7 @@ class ExportNamePreview(preview_base_.ExportPreview):
     self._row_select_interactive = False
     
     self._selected_items = [
-      item for item in self._selected_items if item in self._tree_iters]
+      item for item in self._selected_items if item in self._item_rows]
     
     for item in self._selected_items:
       tree_iter = self._tree_iters[item]
@@ -25,6 +25,8 @@ layer names and images to be exported.
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import collections
+
 from export_layers import pygimplib as pg
 
 from export_layers import builtin_constraints
@@ -42,6 +44,10 @@ class ExportPreviewsController(object):
     self._settings = settings
     self._image = image
     
+    self._update_scheduler = PreviewUpdateScheduler(
+      [self._name_preview, self._image_preview],
+      self._DELAY_PREVIEWS_SETTING_UPDATE_MILLISECONDS)
+    
     self._only_selected_layers_constraints = {}
     self._custom_operations = {}
     self._is_initial_selection_set = False
@@ -51,6 +57,10 @@ class ExportPreviewsController(object):
     self._paned_between_previews_previous_position = (
       self._settings["gui/paned_between_previews_position"].value)
   
+  @property
+  def update_scheduler(self):
+    return self._update_scheduler
+  
   def connect_setting_changes_to_previews(self):
     self._connect_operations_changed(self._settings["main/procedures"])
     self._connect_operations_changed(self._settings["main/constraints"])
@@ -170,10 +180,8 @@ class ExportPreviewsController(object):
     operations_.connect_event("before-remove-operation", _on_before_remove_operation)
   
   def _update_previews_on_setting_change(self, setting):
-    pg.invocation.timeout_add_strict(
-      self._DELAY_PREVIEWS_SETTING_UPDATE_MILLISECONDS, self._name_preview.update)
-    pg.invocation.timeout_add_strict(
-      self._DELAY_PREVIEWS_SETTING_UPDATE_MILLISECONDS, self._image_preview.update)
+    self._update_scheduler.schedule_update(self._name_preview)
+    self._update_scheduler.schedule_update(self._image_preview)
   
   def _connect_setting_after_reset_collapsed_layers_in_name_preview(self):
     self._settings[
@@ -300,6 +308,8 @@ class ExportPreviewsController(object):
     if toplevel.is_active():
       pg.invocation.timeout_remove_strict(self._name_preview.update)
       pg.invocation.timeout_remove_strict(self._image_preview.update)
+      self._update_scheduler.cancel_update(self._name_preview)
+      self._update_scheduler.cancel_update(self._image_preview)
       
       self._name_preview.update(reset_items=True)
       
@@ -360,3 +370,87 @@ class ExportPreviewsController(object):
         self._image_preview.update()
       else:
         self._image_preview.clear()
+
+
+class PreviewUpdateScheduler(object):
+  """
+  This class merges requests to update previews so that a burst of requests
+  (e.g. when loading or resetting settings, each modified setting requesting an
+  update) results in at most one update per preview.
+  
+  Requests are postponed by the specified delay (in milliseconds). Each new
+  request restarts the delay. Once the delay elapses, each preview with pending
+  requests is updated once, in the order specified by `previews`.
+  
+  Requests for the same preview are merged into the most comprehensive kind of
+  update requested - an update resetting items (`reset_items=True`) is preferred
+  over a normal update, which is in turn preferred over updating existing
+  contents only (`update_existing_contents_only=True`).
+  
+  Attributes:
+  
+  * `num_dropped_updates` (read-only) - Number of requests that did not result
+    in a separate update since they were merged into other requests or canceled.
+  """
+  
+  def __init__(self, previews, delay_milliseconds):
+    self._previews = previews
+    self._delay_milliseconds = delay_milliseconds
+    
+    self._pending_updates = collections.OrderedDict()
+    self._num_dropped_updates = 0
+  
+  @property
+  def num_dropped_updates(self):
+    return self._num_dropped_updates
+  
+  def schedule_update(self, preview, **update_kwargs):
+    """
+    Request updating `preview` by calling `preview.update(**update_kwargs)`
+    after the delay.
+    """
+    if preview in self._pending_updates:
+      self._num_dropped_updates += 1
+      
+      if (self._get_update_priority(update_kwargs)
+          > self._get_update_priority(self._pending_updates[preview])):
+        self._pending_updates[preview] = update_kwargs
+    else:
+      self._pending_updates[preview] = update_kwargs
+    
+    pg.invocation.timeout_add_strict(self._delay_milliseconds, self._update_previews)
+  
+  def cancel_update(self, preview):
+    """
+    Cancel the pending update of `preview`. If there is no pending update for
+    `preview`, do nothing.
+    """
+    if preview in self._pending_updates:
+      del self._pending_updates[preview]
+      self._num_dropped_updates += 1
+    
+    if not self._pending_updates:
+      pg.invocation.timeout_remove_strict(self._update_previews)
+  
+  def _update_previews(self):
+    # Requests made during the updates are postponed to the next invocation.
+    pending_updates = self._pending_updates
+    self._pending_updates = collections.OrderedDict()
+    
+    for preview in self._previews:
+      if preview in pending_updates:
+        preview.update(**pending_updates.pop(preview))
+    
+    for preview, update_kwargs in pending_updates.items():
+      preview.update(**update_kwargs)
+    
+    return False
+  
+  @staticmethod
+  def _get_update_priority(update_kwargs):
+    if update_kwargs.get("reset_items", False):
+      return 2
+    elif update_kwargs.get("update_existing_contents_only", False):
+      return 0
+    else:
+      return 1
@@ -42,23 +42,24 @@ These events include:
   * calling `clear()` after resetting operations (due to initial operations
     being added back).
   
-  Arguments: created operation, original operation dictionary (same as in
-  `"before-add-operation"`)
+  Arguments: `OperationRecord` instance of the created operation, original
+  operation dictionary (same as in `"before-add-operation"`)
 
 * `"before-reorder-operation"` - invoked when calling `reorder()` before
   reordering an operation.
   
-  Arguments: operation, position before reordering
+  Arguments: `OperationRecord` instance, position before reordering
 
 * `"after-reorder-operation"` - invoked when calling `reorder()` after reordering
   an operation.
   
-  Arguments: operation, position before reordering, new position
+  Arguments: `OperationRecord` instance, position before reordering, new
+  position
 
 * `"before-remove-operation"` - invoked when calling `remove()` before removing an
   operation.
   
-  Arguments: operation to be removed
+  Arguments: `OperationRecord` instance of the operation to be removed
 
 * `"after-remove-operation"` - invoked when calling `remove()` after removing an
   operation.
@@ -106,22 +107,30 @@ def create(name, initial_operations=None):
     are added.
   
   The resulting `setting.Group` instance contains the following subgroups:
-  * `"added"` - Contains operations added via `add()` or created in this
-    function via `initial_operations` dictionary.
+  * `"added"` - Contains operations whose `setting.Group` instances were created
+    - operations added via `add()` and operations obtained via `walk()` or
+    `get_operation()`. Operations created in this function via
+    `initial_operations` or loaded from setting sources are only stored as
+    records (see `walk_records()`) until their groups are requested.
   * `"_added_data"` - Operations stored as dictionaries, used when loading or
     saving operations persistently. As indicated by the leading underscore, this
     subgroup is only for internal use and should not be modified outside
     `operations`.
   * `"_added_data_values"` - Values of operations stored as dictionaries, used
-    when loading or saving operations persistently. As indicated by the leading
+    when loading or saving operations persistently and when reading values of
+    operations whose groups were not created yet. As indicated by the leading
     underscore, this subgroup is only for internal use and should not be
     modified outside `operations`.
   
-  Each created operation in the returned group is a nested `setting.Group`. Each
-  operation contains the following settings or subgroups:
+  Each created operation is a nested `setting.Group`. Each operation contains
+  the following settings or subgroups:
   * `"function"` - The function to execute.
   * `"arguments"` - Arguments to `"function"` as a `setting.Group` instance
-    containing arguments as separate `Setting` instances.
+    containing arguments as separate `Setting` instances. The group has the
+    `"ignore_initialize_gui"` tag, hence calling `setting.Group.initialize_gui()`
+    on a parent group does not create GUI for arguments. GUI for arguments should
+    be initialized only when the operation is being edited by calling
+    `initialize_gui()` on this group.
   * `"enabled"` - Whether the operation should be executed or not.
   * `"display_name"` - The display name (human-readable name) of the operation.
   * `"operation_group"` - List of groups the operation belongs to, used in
@@ -214,7 +223,7 @@ def create(name, initial_operations=None):
   operations["_added_data_values"].connect_event(
     "before-save",
     _get_values_from_operations,
-    operations["added"])
+    operations)
   
   operations["_added_data_values"].connect_event(
     "after-load",
@@ -240,33 +249,48 @@ def _create_operations_from_added_data(operations):
   for operation_dict in operations["_added_data"].value:
     operations.invoke_event("before-add-operation", operation_dict)
     
-    operation = _create_operation_by_type(**dict(operation_dict))
-    operations["added"].add([operation])
+    _check_operation_dict(operation_dict)
     
-    operations.invoke_event("after-add-operation", operation, operation_dict)
+    operations.invoke_event(
+      "after-add-operation", OperationRecord(operations, operation_dict), operation_dict)
 
 
 def _create_operation_by_type(**kwargs):
+  _check_operation_dict(kwargs)
+  
   type_ = kwargs.pop("type", _DEFAULT_OPERATION_TYPE)
   
+  return _OPERATION_TYPES_AND_FUNCTIONS[type_](**kwargs)
+
+
+def _check_operation_dict(operation_dict):
+  type_ = operation_dict.get("type", _DEFAULT_OPERATION_TYPE)
+  
   if type_ not in _OPERATION_TYPES_AND_FUNCTIONS:
     raise ValueError(
       "invalid type '{}'; valid values: {}".format(
         type_, list(_OPERATION_TYPES_AND_FUNCTIONS)))
   
   for required_field in _REQUIRED_OPERATION_FIELDS:
-    if required_field not in kwargs:
+    if required_field not in operation_dict:
       raise ValueError("missing required field: '{}'".format(required_field))
-  
-  return _OPERATION_TYPES_AND_FUNCTIONS[type_](**kwargs)
 
 
-def _get_values_from_operations(added_data_values_setting, added_operations_group):
-  added_data_values_setting.reset()
+def _get_values_from_operations(added_data_values_setting, operations):
+  # Operations without a created group keep their loaded values as there are no
+  # settings to obtain the values from.
+  operation_names = set(
+    operation_dict["name"] for operation_dict in operations["_added_data"].value)
   
-  for setting in added_operations_group.walk():
-    added_data_values_setting.value[
-      setting.get_path(added_operations_group)] = setting.value
+  values = {
+    key: value for key, value in added_data_values_setting.value.items()
+    if (_get_operation_name_from_value_key(key) in operation_names
+        and _get_operation_name_from_value_key(key) not in operations["added"])}
+  
+  for setting in operations["added"].walk():
+    values[setting.get_path(operations["added"])] = setting.value
+  
+  added_data_values_setting.set_value(values)
 
 
 def _set_values_for_operations(added_data_values_setting, added_operations_group):
@@ -276,6 +300,22 @@ def _set_values_for_operations(added_data_values_setting, added_operations_group
         added_data_values_setting.value[setting.get_path(added_operations_group)])
 
 
+def _get_value_key(operation_name, setting_path):
+  return "{}/{}".format(operation_name, setting_path)
+
+
+def _get_operation_name_from_value_key(key):
+  return key.split("/", 1)[0]
+
+
+def _remove_values_for_operation(operations, operation_name):
+  values = operations["_added_data_values"].value
+  
+  for key in list(values):
+    if _get_operation_name_from_value_key(key) == operation_name:
+      del values[key]
+
+
 def _create_procedure(
       name,
       function=None,
@@ -300,6 +340,7 @@ def _create_procedure(
   
   arguments_group = pg.setting.Group(
     "arguments",
+    tags=["ignore_initialize_gui"],
     setting_attributes={
       "pdb_type": None,
       "setting_sources": None,
@@ -474,7 +515,10 @@ def add(operations, operation_dict_or_function):
   operations["added"].add([operation])
   operations["_added_data"].value.append(operation_dict)
   
-  operations.invoke_event("after-add-operation", operation, orig_operation_dict)
+  operations.invoke_event(
+    "after-add-operation",
+    OperationRecord(operations, operation_dict),
+    orig_operation_dict)
   
   return operation
 
@@ -573,7 +617,7 @@ def _uniquify_operation_name(operations, name):
   return (
     pg.path.uniquify_string(
       name,
-      [operation.name for operation in walk(operations)],
+      [operation.name for operation in walk_records(operations)],
       uniquifier_generator=_generate_unique_operation_name()))
 
 
@@ -592,7 +636,7 @@ def _uniquify_operation_display_name(operations, display_name):
   return (
     pg.path.uniquify_string(
       display_name,
-      [operation["display_name"].value for operation in walk(operations)],
+      [operation.get_value("display_name") for operation in walk_records(operations)],
       uniquifier_generator=_generate_unique_display_name()))
 
 
@@ -613,7 +657,8 @@ def reorder(operations, operation_name, new_position):
     raise ValueError("operation '{}' not found in operations named '{}'".format(
       operation_name, operations.name))
   
-  operation = operations["added"][operation_name]
+  operation = OperationRecord(
+    operations, operations["_added_data"].value[current_position])
   
   operations.invoke_event("before-reorder-operation", operation, current_position)
   
@@ -641,12 +686,15 @@ def remove(operations, operation_name):
     raise ValueError("operation '{}' not found in operations named '{}'".format(
       operation_name, operations.name))
   
-  operation = operations["added"][operation_name]
+  operation = OperationRecord(
+    operations, operations["_added_data"].value[operation_index])
   
   operations.invoke_event("before-remove-operation", operation)
   
-  operations["added"].remove([operation_name])
+  if operation_name in operations["added"]:
+    operations["added"].remove([operation_name])
   del operations["_added_data"].value[operation_index]
+  _remove_values_for_operation(operations, operation_name)
   
   operations.invoke_event("after-remove-operation", operation_name)
 
@@ -670,7 +718,7 @@ def clear(operations):
 
 
 def _clear(operations):
-  operations["added"].remove([operation.name for operation in walk(operations)])
+  operations["added"].remove([operation.name for operation in operations["added"]])
   operations["_added_data"].reset()
   operations["_added_data_values"].reset()
 
@@ -691,34 +739,179 @@ def walk(operations, operation_type=None, setting_name=None):
   each operation. For example, `"enabled"` yields the `"enabled"` setting for
   each operation. For the list of possible names of settings and subgroups, see
   `create()`.
+  
+  Setting groups are created for operations that only exist as records. To
+  iterate over operations without creating their groups, use `walk_records()`.
+  """
+  for operation_record in walk_records(operations, operation_type):
+    operation = operation_record.get_operation()
+    
+    if setting_name is None:
+      yield operation
+    else:
+      if setting_name in operation:
+        yield operation[setting_name]
+
+
+def walk_records(operations, operation_type=None):
+  """
+  Walk (iterate over) a setting group containing operations, yielding an
+  `OperationRecord` instance for each operation.
+  
+  For the description of `operation_type`, see `walk()`.
   """
   operation_types = list(_OPERATION_TYPES_AND_FUNCTIONS)
   
   if operation_type is not None and operation_type not in operation_types:
     raise ValueError("invalid operation type '{}'".format(operation_type))
   
-  def has_matching_type(setting):
-    if operation_type is None:
-      return any(type_ in setting.tags for type_ in operation_types)
-    else:
-      return operation_type in setting.tags
+  for operation_dict in operations["_added_data"].value:
+    if (operation_type is None
+        or operation_dict.get("type", _DEFAULT_OPERATION_TYPE) == operation_type):
+      yield OperationRecord(operations, operation_dict)
+
+
+def get_operation(operations, operation_name):
+  """
+  Return the `setting.Group` instance representing the operation specified by
+  its name. If the group was not created yet, create it from the record of the
+  operation and set its values from the `"_added_data_values"` subgroup.
+  
+  Raises:
+  * `ValueError` - `operation_name` not found in `operations`.
+  """
+  if operation_name in operations["added"]:
+    return operations["added"][operation_name]
   
-  listed_operations = {
-    setting.name: setting
-    for setting in operations["added"].walk(
-      include_setting_func=has_matching_type,
-      include_groups=True,
-      include_if_parent_skipped=True)}
+  operation_index = _find_index_in_added_data(operations, operation_name)
   
-  for operation_dict in operations["_added_data"].value:
-    if operation_dict["name"] in listed_operations:
-      operation = listed_operations[operation_dict["name"]]
-      
-      if setting_name is None:
-        yield operation
-      else:
-        if setting_name in operation:
-          yield operation[setting_name]
+  if operation_index is None:
+    raise ValueError("operation '{}' not found in operations named '{}'".format(
+      operation_name, operations.name))
+  
+  operation = _create_operation_by_type(
+    **dict(operations["_added_data"].value[operation_index]))
+  
+  operations["added"].add([operation])
+  
+  values = operations["_added_data_values"].value
+  
+  for setting in operation.walk():
+    if setting.get_path(operations["added"]) in values:
+      setting.set_value(values[setting.get_path(operations["added"])])
+  
+  return operation
+
+
+class OperationRecord(object):
+  """
+  This class is a lightweight representation of an added operation, consisting
+  of the dictionary describing the operation and the values stored for the
+  operation.
+  
+  Reading values via `get_value()` does not create the `setting.Group` instance
+  for the operation. Values not stored yet are obtained from the operation
+  dictionary. Use `get_operation()` or access settings of the operation via
+  `[]` to create the group.
+  
+  Records are created on demand and should not be stored for longer than the
+  operation exists.
+  """
+  
+  def __init__(self, operations, operation_dict):
+    self._operations = operations
+    self._operation_dict = operation_dict
+  
+  def __getitem__(self, setting_name_or_path):
+    return self.get_operation()[setting_name_or_path]
+  
+  def __contains__(self, setting_name_or_path):
+    return setting_name_or_path in self.get_operation()
+  
+  @property
+  def name(self):
+    return self._operation_dict["name"]
+  
+  @property
+  def tags(self):
+    return set(["operation", self._operation_dict.get("type", _DEFAULT_OPERATION_TYPE)])
+  
+  def get_value(self, setting_path, default_value=None):
+    """
+    Return the value of the setting specified by its path relative to the
+    operation (e.g. `"enabled"` or `"arguments/tag"`). If the setting does not
+    exist, return `default_value` instead.
+    """
+    if self.name in self._operations["added"]:
+      return self._operations["added"][self.name].get_value(setting_path, default_value)
+    
+    values = self._operations["_added_data_values"].value
+    
+    if _get_value_key(self.name, setting_path) in values:
+      return values[_get_value_key(self.name, setting_path)]
+    else:
+      return _get_default_value_from_operation_dict(
+        self._operation_dict, setting_path, default_value)
+  
+  def get_argument_values(self):
+    """
+    Return a list of values of arguments of the operation.
+    """
+    return [
+      self.get_value("arguments/{}".format(argument_dict["name"]))
+      for argument_dict in self._operation_dict.get("arguments", [])]
+  
+  def get_operation(self):
+    """
+    Return the `setting.Group` instance representing the operation. See
+    `get_operation()` in this module for more information.
+    """
+    return get_operation(self._operations, self.name)
+
+
+def _get_default_value_from_operation_dict(operation_dict, setting_path, default_value):
+  # This must match the settings created in `_create_procedure()` and
+  # `_create_constraint()`.
+  type_ = operation_dict.get("type", _DEFAULT_OPERATION_TYPE)
+  
+  if setting_path.startswith("arguments/"):
+    argument_name = setting_path[len("arguments/"):]
+    
+    for argument_dict in operation_dict.get("arguments", []):
+      if argument_dict["name"] == argument_name:
+        return _create_argument(argument_dict).default_value
+    
+    return default_value
+  elif setting_path == "function":
+    return operation_dict.get("function", None)
+  elif setting_path == "enabled":
+    return operation_dict.get("enabled", True)
+  elif setting_path == "display_name":
+    return operation_dict.get("display_name", None)
+  elif setting_path == "operation_groups":
+    if operation_dict.get("operation_groups", None) is not None:
+      return operation_dict["operation_groups"]
+    elif type_ == "constraint":
+      return [DEFAULT_CONSTRAINTS_GROUP]
+    else:
+      return [DEFAULT_PROCEDURES_GROUP]
+  elif setting_path == "orig_name":
+    return operation_dict.get("orig_name", operation_dict["name"])
+  elif setting_path == "subfilter" and type_ == "constraint":
+    return operation_dict.get("subfilter", None)
+  elif (setting_path not in ["name", "type", "arguments"]
+        and setting_path in operation_dict):
+    return operation_dict[setting_path]
+  else:
+    return default_value
+
+
+def _create_argument(argument_dict):
+  argument_kwargs = {key: value for key, value in argument_dict.items() if key != "type"}
+  argument_kwargs.setdefault("pdb_type", None)
+  argument_kwargs.setdefault("setting_sources", None)
+  
+  return argument_dict["type"](**argument_kwargs)
 
 
 class UnsupportedPdbProcedureError(Exception):
@@ -38,8 +38,6 @@ import gimpenums
 
 from export_layers import pygimplib as pg
 
-from .gui import placeholders as gui_placeholders
-
 
 class _GimpObjectPlaceholder(object):
   
@@ -106,7 +104,7 @@ def get_replaced_args_and_kwargs(func_args, func_kwargs, image, layer, layer_exp
 
 class PlaceholderSetting(pg.setting.Setting):
    
-  _ALLOWED_GUI_TYPES = [gui_placeholders.GimpObjectPlaceholdersComboBoxPresenter]
+  _ALLOWED_GUI_TYPES = ["placeholders_combo_box"]
   _ALLOWED_PLACEHOLDERS = []
   
   @classmethod
@@ -128,6 +126,14 @@ class PlaceholderSetting(pg.setting.Setting):
   def _init_error_messages(self):
     self.error_messages["invalid_value"] = _("Invalid placeholder.")
   
+  def _get_gui_presenter_type(self, gui_type):
+    if gui_type == "placeholders_combo_box":
+      from .gui import placeholders as gui_placeholders
+      
+      return gui_placeholders.GimpObjectPlaceholdersComboBoxPresenter
+    else:
+      return super()._get_gui_presenter_type(gui_type)
+  
   def _validate(self, value):
     if value not in self._ALLOWED_PLACEHOLDERS:
       raise pg.setting.SettingValueError(
@@ -57,7 +57,18 @@ def _setup_import_of_external_lib_modules(dirpath):
   
   Modules with the same name that are already installed system-wide override the
   external library modules from `pygimplib`.
+  
+  If a ZIP archive named after `dirpath` with the `.zip` extension exists, the
+  archive is used instead of `dirpath`. The archive contains precompiled
+  modules of all external libraries (see `utils/make_installers.py`) and
+  significantly reduces the number of files accessed when importing modules.
   """
+  bundle_filepath = dirpath + ".zip"
+  if os.path.isfile(bundle_filepath):
+    if bundle_filepath not in sys.path:
+      sys.path.append(bundle_filepath)
+    return
+  
   for filename in os.listdir(dirpath):
     external_libs_dirpath = os.path.join(dirpath, filename)
     if os.path.isdir(external_libs_dirpath) and external_libs_dirpath not in sys.path:
@@ -74,19 +85,51 @@ from future.builtins import (
 import __builtin__
 import collections
 import gettext
+import importlib
 
 from .constants import *
 
 from . import utils
 from . import version
 
+
+class _DeferredModule(object):
+  """
+  This class is a placeholder for a pygimplib module that is imported on first
+  access to any of its attributes.
+  
+  Modules needed only when running plug-ins interactively (such as `gui`) or
+  only by optional features (such as `pngwriter`) are deferred so that
+  non-interactive runs and plug-in queries do not pay for importing them. Once
+  imported, the module replaces the placeholder as an attribute of this package.
+  """
+  
+  def __init__(self, module_name):
+    self._module_name = module_name
+    self._module = None
+  
+  def __getattr__(self, name):
+    if self._module is None:
+      self._module = importlib.import_module(
+        "." + self._module_name, package=__name__)
+    
+    return getattr(self._module, name)
+  
+  def __repr__(self):
+    return "<{} '{}'>".format(type(self).__name__, self._module_name)
+
+
 if _gimp_dependent_modules_imported:
   import gimpenums
-  import gimpui
+  
+  # Must be defined before importing modules that refer to `gui` so that they
+  # obtain the placeholder rather than import the module right away.
+  gui = _DeferredModule("gui")
+  pixels = _DeferredModule("pixels")
+  pngwriter = _DeferredModule("pngwriter")
   
   from . import fileformats
   from . import invocation
-  from . import gui
   from . import itemtree
   from . import objectfilter
   from . import operations
@@ -121,6 +164,8 @@ if _gimp_dependent_modules_imported:
     "overwrite",
     "path",
     "pdbutils",
+    "pixels",
+    "pngwriter",
     "progress",
     "setting",
     # Global elements imported to or defined in this module
@@ -390,11 +435,15 @@ if _gimp_dependent_modules_imported:
       config.PLUGIN_NAME = procedure_name
       _init_config_builtin_delayed(config)
     
-    procedure = _add_gui_excepthook(
-      _procedures_names[procedure_name], procedure_params[0])
+    run_mode = procedure_params[0]
+    
+    procedure = _add_gui_excepthook(_procedures_names[procedure_name], run_mode)
     
-    if hasattr(gimpui, "gimp_ui_init"):
-      gimpui.gimp_ui_init()
+    if run_mode == gimpenums.RUN_INTERACTIVE:
+      import gimpui
+      
+      if hasattr(gimpui, "gimp_ui_init"):
+        gimpui.gimp_ui_init()
     
     procedure(*procedure_params)
   
@@ -27,6 +27,12 @@ The file save procedure can be used for multiple purposes, such as:
 * using that save procedure instead of the default save procedure
   (`pdb.gimp_file_save()`, which invokes the correct file save procedure based
   on the file extension of the filename).
+
+Several file formats also define save options - arguments passed explicitly to
+the save procedure of the file format so that images can be saved
+non-interactively without relying on the last values used in GIMP. Use
+`create_save_options()` to create settings for the save options and
+`get_save_procedure_with_options()` to save images with the save options.
 """
 
 from __future__ import absolute_import, division, print_function, unicode_literals
@@ -46,7 +52,133 @@ def get_save_procedure(file_extension):
   extension is invalid or does not have a specific save procedure defined,
   return the default save procedure (as returned by
   `get_default_save_procedure()`).
+  
+  The save procedure is resolved only once per file extension. Call `refresh()`
+  to resolve save procedures again (e.g. if file format plug-ins were installed
+  in the meantime).
+  """
+  try:
+    return _save_procedures[file_extension]
+  except KeyError:
+    save_procedure = _get_save_procedure(file_extension)
+    _save_procedures[file_extension] = save_procedure
+    return save_procedure
+
+
+def get_save_procedure_with_options(file_extension, save_options):
+  """
+  Return a file save procedure for the given file extension passing the values
+  of the save options of the corresponding file format explicitly to the save
+  procedure. The returned procedure has the same parameters as the one returned
+  by `get_save_procedure()`.
+  
+  `save_options` is a `setting.Group` instance created by
+  `create_save_options()`. Setting values are obtained each time the returned
+  procedure is called.
+  
+  If the file extension is invalid, the file format does not define save
+  options or the installed save procedure does not accept the save options (e.g.
+  due to a different GIMP version), return `None`.
+  """
+  format_save_options = get_save_options_for_file_extension(
+    file_extension, save_options)
+  
+  if format_save_options is None:
+    return None
+  
+  save_procedure_name = file_formats_dict[file_extension].save_options_procedure_name
+  
+  def _save_image_with_options(run_mode, image, layer, filepath, raw_filepath):
+    pdb[save_procedure_name](
+      image,
+      layer,
+      filepath,
+      raw_filepath,
+      *[setting.value for setting in format_save_options.walk()],
+      run_mode=run_mode)
+  
+  return _save_image_with_options
+
+
+def get_save_options_for_file_extension(file_extension, save_options):
+  """
+  Return the `setting.Group` instance from `save_options` containing the save
+  options of the file format matching the given file extension. File extensions
+  of the same file format (e.g. `"jpg"` and `"jpeg"`) share the same group.
+  
+  Return `None` under the same conditions as
+  `get_save_procedure_with_options()`.
+  """
+  file_format = file_formats_dict.get(file_extension)
+  
+  if file_format is None or not file_format.has_save_options():
+    return None
+  
+  format_save_options_name = _get_save_options_group_name(file_format)
+  if format_save_options_name not in save_options:
+    return None
+  
+  return save_options[format_save_options_name]
+
+
+def create_save_options(name="save_options", setting_attributes=None):
+  """
+  Create a `setting.Group` instance containing a subgroup of save options for
+  each file format defining save options. Each subgroup is named after the
+  first file extension of the file format (e.g. `"png"` or `"jpg"`).
+  
+  The save options are not registered to the GIMP PDB. The returned group has
+  the `"ignore_initialize_gui"` tag so that GUI for the save options is only
+  created when the save options are about to be edited.
+  `setting_attributes` is a dictionary of additional attributes applied to all
+  save options, e.g. setting sources.
+  """
+  # `setting` depends on this module, hence the import is performed here.
+  from . import setting as pgsetting
+  
+  save_options_setting_attributes = {"pdb_type": None}
+  if setting_attributes is not None:
+    save_options_setting_attributes.update(setting_attributes)
+  
+  save_options = pgsetting.Group(name, tags=["ignore_initialize_gui"])
+  
+  for file_format in file_formats:
+    if not file_format.save_options:
+      continue
+    
+    format_save_options = pgsetting.Group(
+      _get_save_options_group_name(file_format),
+      display_name=file_format.description,
+      setting_attributes=save_options_setting_attributes)
+    
+    format_save_options.add([
+      dict(option, type=getattr(pgsetting.SettingTypes, option["type"]))
+      for option in file_format.save_options])
+    
+    save_options.add([format_save_options])
+  
+  return save_options
+
+
+def refresh():
+  """
+  Discard cached information about installed file formats and resolved save
+  procedures. Subsequent calls to `get_save_procedure()` and
+  `_FileFormat.is_installed()` query the GIMP PDB again.
+  
+  `file_formats_dict` is updated in place to reflect the currently running GIMP
+  version.
   """
+  _save_procedures.clear()
+  
+  for file_format in file_formats:
+    file_format.refresh()
+  
+  file_formats_dict.clear()
+  file_formats_dict.update(_create_file_formats_dict(file_formats))
+
+
+def _get_save_procedure(file_extension):
   if file_extension in file_formats_dict:
     file_format = file_formats_dict[file_extension]
     if file_format.save_procedure_func and file_format.is_installed():
@@ -55,6 +187,10 @@ def get_save_procedure(file_extension):
   return get_default_save_procedure()
 
 
+def _get_save_options_group_name(file_format):
+  return file_format.file_extensions[0]
+
+
 def _save_image_default(run_mode, image, layer, filepath, raw_filepath):
   pdb.gimp_file_save(image, layer, filepath, raw_filepath, run_mode=run_mode)
 
@@ -79,7 +215,7 @@ class _FileFormat(object):
   def __init__(
         self, description, file_extensions, save_procedure_name=None,
         save_procedure_func=None, save_procedure_func_args=None, versions=None,
-        **kwargs):
+        save_options_procedure_name=None, save_options=None, **kwargs):
     self.description = description
     self.file_extensions = file_extensions
     
@@ -97,8 +233,14 @@ class _FileFormat(object):
     
     self.version_check_func = versions if versions is not None else lambda: True
     
+    self.save_options_procedure_name = save_options_procedure_name
+    self.save_options = save_options if save_options is not None else []
+    
     for name, value in kwargs.items():
       setattr(self, name, value)
+    
+    self._is_installed = None
+    self._has_save_options = None
   
   def is_builtin(self):
     return not self.save_procedure_name
@@ -107,10 +249,47 @@ class _FileFormat(object):
     return bool(self.save_procedure_name)
   
   def is_installed(self):
-    return (
-      self.is_builtin()
-      or (self.is_third_party()
-          and pdb.gimp_procedural_db_proc_exists(self.save_procedure_name)))
+    """
+    Return `True` if the file format is built into GIMP or if the plug-in
+    providing the file format is installed.
+    
+    The GIMP PDB is queried only on the first call. Call `refresh()` to query it
+    again.
+    """
+    if self._is_installed is None:
+      self._is_installed = (
+        self.is_builtin()
+        or (self.is_third_party()
+            and bool(pdb.gimp_procedural_db_proc_exists(self.save_procedure_name))))
+    
+    return self._is_installed
+  
+  def has_save_options(self):
+    """
+    Return `True` if the file format defines save options and the installed
+    save procedure accepts them, i.e. its parameters are the run mode, image,
+    drawable, filename, raw filename and the save options in this order.
+    
+    The GIMP PDB is queried only on the first call. Call `refresh()` to query it
+    again.
+    """
+    if self._has_save_options is None:
+      self._has_save_options = (
+        bool(self.save_options)
+        and bool(pdb.gimp_procedural_db_proc_exists(self.save_options_procedure_name))
+        and (
+          pdb[self.save_options_procedure_name].nparams
+          == _NUM_COMMON_SAVE_PROCEDURE_PARAMS + len(self.save_options)))
+    
+    return self._has_save_options
+  
+  def refresh(self):
+    self._is_installed = None
+    self._has_save_options = None
+
+
+# Run mode, image, drawable, filename, raw filename
+_NUM_COMMON_SAVE_PROCEDURE_PARAMS = 5
 
 
 file_formats = _create_file_formats([
@@ -158,7 +337,61 @@ file_formats = _create_file_formats([
   {"description": "HTML table",
    "file_extensions": ["html", "htm"]},
   {"description": "JPEG image",
-   "file_extensions": ["jpg", "jpeg", "jpe"]},
+   "file_extensions": ["jpg", "jpeg", "jpe"],
+   "save_options_procedure_name": "file-jpeg-save",
+   "save_options": [
+     {"type": "float",
+      "name": "quality",
+      "default_value": 0.9,
+      "min_value": 0.0,
+      "max_value": 1.0,
+      "display_name": "Quality"},
+     {"type": "float",
+      "name": "smoothing",
+      "default_value": 0.0,
+      "min_value": 0.0,
+      "max_value": 1.0,
+      "display_name": "Smoothing"},
+     {"type": "boolean",
+      "name": "optimize",
+      "default_value": True,
+      "display_name": "Optimize"},
+     {"type": "boolean",
+      "name": "progressive",
+      "default_value": True,
+      "display_name": "Progressive"},
+     {"type": "string",
+      "name": "comment",
+      "default_value": "",
+      "display_name": "Comment"},
+     {"type": "enumerated",
+      "name": "subsampling",
+      "default_value": "best_quality",
+      "items": [
+        ("chroma_quartered", "4:2:0 (chroma quartered)", 0),
+        ("chroma_halved_horizontally", "4:2:2 horizontal (chroma halved)", 1),
+        ("best_quality", "4:4:4 (best quality)", 2),
+        ("chroma_halved_vertically", "4:2:2 vertical (chroma halved)", 3)],
+      "display_name": "Subsampling"},
+     {"type": "boolean",
+      "name": "baseline",
+      "default_value": True,
+      "display_name": "Force baseline JPEG"},
+     {"type": "integer",
+      "name": "restart_interval",
+      "default_value": 0,
+      "min_value": 0,
+      "max_value": 64,
+      "display_name": "Interval of restart markers (0 = no restart markers)"},
+     {"type": "enumerated",
+      "name": "dct_method",
+      "default_value": "integer",
+      "items": [
+        ("integer", "Integer", 0),
+        ("fixed", "Fixed", 1),
+        ("float", "Floating-point", 2)],
+      "display_name": "DCT method"},
+   ]},
   {"description": "JPEG XR image",
    "file_extensions": ["jxr"],
    "save_procedure_name": "file-jxr-save",
@@ -184,7 +417,48 @@ file_formats = _create_file_formats([
   {"description": "Photoshop image",
    "file_extensions": ["psd"]},
   {"description": "PNG image",
-   "file_extensions": ["png"]},
+   "file_extensions": ["png"],
+   "save_options_procedure_name": "file-png-save2",
+   "save_options": [
+     {"type": "boolean",
+      "name": "interlace",
+      "default_value": False,
+      "display_name": "Interlacing (Adam7)"},
+     {"type": "integer",
+      "name": "compression",
+      "default_value": 9,
+      "min_value": 0,
+      "max_value": 9,
+      "display_name": "Compression level"},
+     {"type": "boolean",
+      "name": "save_background_color",
+      "default_value": True,
+      "display_name": "Save background color"},
+     {"type": "boolean",
+      "name": "save_gamma",
+      "default_value": False,
+      "display_name": "Save gamma"},
+     {"type": "boolean",
+      "name": "save_layer_offset",
+      "default_value": False,
+      "display_name": "Save layer offset"},
+     {"type": "boolean",
+      "name": "save_resolution",
+      "default_value": True,
+      "display_name": "Save resolution"},
+     {"type": "boolean",
+      "name": "save_creation_time",
+      "default_value": True,
+      "display_name": "Save creation time"},
+     {"type": "boolean",
+      "name": "save_comment",
+      "default_value": True,
+      "display_name": "Save comment"},
+     {"type": "boolean",
+      "name": "save_transparent_pixel_values",
+      "default_value": True,
+      "display_name": "Save color values from transparent pixels"},
+   ]},
   {"description": "APNG image",
    "file_extensions": ["apng"],
    "save_procedure_name": "file-apng-save-defaults",
@@ -219,7 +493,75 @@ file_formats = _create_file_formats([
    "save_procedure_name": "file-vtf-save",
    "url": "https://github.com/Artfunkel/gimp-vtf"},
   {"description": "WebP image",
-   "file_extensions": ["webp"]},
+   "file_extensions": ["webp"],
+   "save_options_procedure_name": "file-webp-save",
+   "save_options": [
+     {"type": "enumerated",
+      "name": "preset",
+      "default_value": "default",
+      "items": [
+        ("default", "Default", 0),
+        ("picture", "Picture", 1),
+        ("photo", "Photo", 2),
+        ("drawing", "Drawing", 3),
+        ("icon", "Icon", 4),
+        ("text", "Text", 5)],
+      "display_name": "Source type"},
+     {"type": "boolean",
+      "name": "lossless",
+      "default_value": False,
+      "display_name": "Lossless"},
+     {"type": "float",
+      "name": "quality",
+      "default_value": 90.0,
+      "min_value": 0.0,
+      "max_value": 100.0,
+      "display_name": "Image quality"},
+     {"type": "float",
+      "name": "alpha_quality",
+      "default_value": 100.0,
+      "min_value": 0.0,
+      "max_value": 100.0,
+      "display_name": "Alpha quality"},
+     {"type": "boolean",
+      "name": "animation",
+      "default_value": False,
+      "display_name": "Save as animation"},
+     {"type": "boolean",
+      "name": "loop",
+      "default_value": True,
+      "display_name": "Loop animation infinitely"},
+     {"type": "boolean",
+      "name": "minimize_size",
+      "default_value": True,
+      "display_name": "Minimize output size"},
+     {"type": "integer",
+      "name": "keyframe_distance",
+      "default_value": 50,
+      "min_value": 0,
+      "display_name": "Maximum distance between key-frames"},
+     {"type": "boolean",
+      "name": "save_exif",
+      "default_value": False,
+      "display_name": "Save Exif data"},
+     {"type": "boolean",
+      "name": "save_iptc",
+      "default_value": False,
+      "display_name": "Save IPTC data"},
+     {"type": "boolean",
+      "name": "save_xmp",
+      "default_value": False,
+      "display_name": "Save XMP data"},
+     {"type": "integer",
+      "name": "delay",
+      "default_value": 200,
+      "min_value": 0,
+      "display_name": "Delay between frames in milliseconds"},
+     {"type": "boolean",
+      "name": "force_delay",
+      "default_value": False,
+      "display_name": "Use delay for all frames"},
+   ]},
   {"description": "Windows BMP image",
    "file_extensions": ["bmp"]},
   {"description": "X11 Mouse Cursor",
@@ -240,3 +582,5 @@ file_formats = _create_file_formats([
 ])
 
 file_formats_dict = _create_file_formats_dict(file_formats)
+
+_save_procedures = {}
@@ -145,7 +145,8 @@ class InteractiveOverwriteChooser(
     pass
 
 
-def handle_overwrite(filepath, overwrite_chooser, uniquifier_position=None):
+def handle_overwrite(
+      filepath, overwrite_chooser, uniquifier_position=None, file_extensions=None):
   """
   If a file with the specified file path exists, handle the file path conflict
   by executing the `overwrite_chooser` (an `OverwriteChooser` instance).
@@ -160,6 +161,13 @@ def handle_overwrite(filepath, overwrite_chooser, uniquifier_position=None):
   in the file path to insert a unique substring (`" (number)"`). By default, the
   uniquifier is inserted at the end of the file path to be renamed.
   
+  If `file_extensions` is specified, the conflict is handled jointly for
+  `filepath` and file paths with the file extension of `filepath` replaced by
+  each of `file_extensions` (e.g. if the same image is saved in multiple file
+  formats). `overwrite_chooser` is then executed at most once and renamed file
+  paths share the same uniquifier. File paths for `file_extensions` can be
+  obtained by replacing the file extension of the returned file path.
+  
   Returns:
   
     * the overwrite mode as returned by `overwrite_chooser`, which the caller
@@ -168,17 +176,34 @@ def handle_overwrite(filepath, overwrite_chooser, uniquifier_position=None):
     * the file path passed as the argument, modified if `RENAME_NEW` mode is
       returned.
   """
-  if os.path.exists(filepath):
-    overwrite_chooser.choose(filepath=os.path.abspath(filepath))
+  
+  def _get_filepaths(filepath_):
+    return [filepath_] + [
+      pgpath.get_filename_with_new_file_extension(filepath_, file_extension)
+      for file_extension in (file_extensions or [])]
+  
+  existing_filepaths = [
+    filepath_ for filepath_ in _get_filepaths(filepath) if os.path.exists(filepath_)]
+  
+  if existing_filepaths:
+    overwrite_chooser.choose(filepath=os.path.abspath(existing_filepaths[0]))
     
     if overwrite_chooser.overwrite_mode in (
          OverwriteModes.RENAME_NEW, OverwriteModes.RENAME_EXISTING):
-      uniq_filepath = pgpath.uniquify_filepath(filepath, uniquifier_position)
+      uniq_filepath = pgpath.uniquify_string_generic(
+        filepath,
+        lambda filepath_: not any(
+          os.path.exists(filepath__) for filepath__ in _get_filepaths(filepath_)),
+        uniquifier_position)
+      
       if overwrite_chooser.overwrite_mode == OverwriteModes.RENAME_NEW:
         filepath = uniq_filepath
       else:
-        os.rename(filepath, uniq_filepath)
-  
+        for existing_filepath, uniq_existing_filepath in zip(
+              _get_filepaths(filepath), _get_filepaths(uniq_filepath)):
+          if existing_filepath in existing_filepaths:
+            os.rename(existing_filepath, uniq_existing_filepath)
+    
     return overwrite_chooser.overwrite_mode, filepath
   else:
     return OverwriteModes.DO_NOTHING, filepath
@@ -23,6 +23,7 @@ Python API.
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import collections
 import os
 import contextlib
 
@@ -397,6 +398,184 @@ def merge_layer_group(layer_group):
   return merged_layer_group
 
 
+DEFAULT_GROUP_COMPOSITE_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+
+class GroupCompositeCache(object):
+  """
+  This class merges layer groups bottom-up and caches the results.
+  
+  The composite of a layer group is built from copies of its visible child
+  layers and from cached composites of its visible child groups. Each layer
+  group is therefore composited only once as long as its composite stays in the
+  cache, regardless of how many times the group or its ancestors are merged.
+  
+  Composites are stored as hidden layers in a separate image created on demand.
+  A composite does not include the opacity and mode of the layer group itself.
+  These are applied when the parent group is composited or the composite is
+  inserted via `insert_composite()`.
+  
+  If the total size of cached composites (in bytes) exceeds `max_size`, the
+  least recently used composites are discarded. Use `remove()` to discard a
+  composite no longer needed right away.
+  
+  Layer groups must not be modified while their composites are cached. Call
+  `clear()` to discard all composites and delete the separate image.
+  """
+  
+  def __init__(self, max_size=DEFAULT_GROUP_COMPOSITE_CACHE_MAX_SIZE):
+    self.max_size = max_size
+    
+    # key: `gimp.GroupLayer.ID`
+    # value: composite layer
+    self._composites = collections.OrderedDict()
+    self._size = 0
+    self._image = None
+  
+  @property
+  def size(self):
+    """
+    Total size of cached composites in bytes.
+    """
+    return self._size
+  
+  def __contains__(self, layer_group):
+    return layer_group.ID in self._composites
+  
+  def get_composite(self, layer_group):
+    """
+    Return the composite of the layer group as a hidden layer in a separate
+    image, or `None` if the layer group contains no visible layers.
+    """
+    if layer_group.ID in self._composites:
+      composite = self._composites.pop(layer_group.ID)
+      self._composites[layer_group.ID] = composite
+      return composite
+    
+    composite = self._create_composite(layer_group)
+    
+    if composite is not None:
+      self._composites[layer_group.ID] = composite
+      self._size += _get_layer_size(composite)
+      self._discard_least_recently_used(layer_group.ID)
+    
+    return composite
+  
+  def insert_composite(self, image, layer_group, parent=None, position=0):
+    """
+    Insert the layer group merged into one layer into the specified image. The
+    result is the same as for a copy of the layer group merged via
+    `merge_layer_group()`. Return the inserted layer, or `None` if the layer
+    group contains no visible layers or has a mask.
+    """
+    if layer_group.mask is not None:
+      return None
+    
+    composite = self.get_composite(layer_group)
+    if composite is None:
+      return None
+    
+    if layer_group.opacity == 100.0 and layer_group.mode == gimpenums.NORMAL_MODE:
+      layer = pdb.gimp_layer_new_from_drawable(composite, image)
+      pdb.gimp_image_insert_layer(image, layer, parent, position)
+    else:
+      temp_group = pdb.gimp_layer_group_new(image)
+      pdb.gimp_image_insert_layer(image, temp_group, parent, position)
+      temp_group.opacity = layer_group.opacity
+      temp_group.mode = layer_group.mode
+      
+      layer = pdb.gimp_layer_new_from_drawable(composite, image)
+      pdb.gimp_image_insert_layer(image, layer, temp_group, 0)
+      layer.visible = True
+      
+      layer = merge_layer_group(temp_group)
+    
+    layer.visible = True
+    layer.name = layer_group.name
+    
+    return layer
+  
+  def remove(self, layer_group):
+    """
+    Discard the composite of the layer group if cached.
+    """
+    if layer_group.ID in self._composites:
+      self._discard(layer_group.ID)
+  
+  def clear(self):
+    """
+    Discard all composites and delete the separate image holding them.
+    """
+    self._composites.clear()
+    self._size = 0
+    
+    if self._image is not None:
+      try_delete_image(self._image)
+      self._image = None
+  
+  def _create_composite(self, layer_group):
+    if self._image is None:
+      self._image = create_image_from_metadata(layer_group.image)
+      pdb.gimp_image_undo_freeze(self._image)
+    
+    # The group is hidden until filled so that composites of child groups can
+    # be created in the meantime.
+    temp_group = pdb.gimp_layer_group_new(self._image)
+    pdb.gimp_image_insert_layer(self._image, temp_group, None, 0)
+    temp_group.visible = False
+    
+    for child in layer_group.children:
+      if not child.visible:
+        continue
+      
+      # Masks of layer groups are not applied to composites, hence such groups
+      # are copied entirely.
+      if pdb.gimp_item_is_group(child) and child.mask is None:
+        child_composite = self.get_composite(child)
+        if child_composite is None:
+          continue
+        
+        child_copy = pdb.gimp_layer_new_from_drawable(child_composite, self._image)
+        child_copy.opacity = child.opacity
+        child_copy.mode = child.mode
+      else:
+        child_copy = pdb.gimp_layer_new_from_drawable(child, self._image)
+      
+      pdb.gimp_image_insert_layer(
+        self._image, child_copy, temp_group, len(temp_group.children))
+      child_copy.visible = True
+    
+    if not temp_group.children:
+      pdb.gimp_image_remove_layer(self._image, temp_group)
+      return None
+    
+    temp_group.visible = True
+    
+    # Cached composites are hidden, hence only the temporary group is merged.
+    composite = pdb.gimp_image_merge_visible_layers(
+      self._image, gimpenums.EXPAND_AS_NECESSARY)
+    composite.visible = False
+    
+    return composite
+  
+  def _discard_least_recently_used(self, layer_group_id_to_keep):
+    for layer_group_id in list(self._composites):
+      if self._size <= self.max_size:
+        break
+      
+      if layer_group_id != layer_group_id_to_keep:
+        self._discard(layer_group_id)
+  
+  def _discard(self, layer_group_id):
+    composite = self._composites.pop(layer_group_id)
+    self._size -= _get_layer_size(composite)
+    pdb.gimp_image_remove_layer(self._image, composite)
+
+
+def _get_layer_size(layer):
+  return layer.width * layer.height * layer.bpp
+
+
 #===============================================================================
 
 
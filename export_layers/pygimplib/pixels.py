@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides operations on pixel data of drawables using NumPy.
+
+Pixel data are read via pixel regions, which avoids calling plug-ins such as
+`plug-in-autocrop-layer` that run in a separate process. The functions in this
+module require NumPy. Use `is_available()` to check whether NumPy is installed
+and fall back to the corresponding PDB procedures otherwise.
+
+Pixel data are NumPy arrays of shape `(height, width, bytes per pixel)` and type
+`uint8`. Drawables with an alpha channel have the alpha as the last channel.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+from gimp import pdb
+
+__all__ = [
+  "is_available",
+  "get_pixels",
+  "get_autocrop_bounds",
+  "is_empty",
+  "autocrop_layer",
+  "premultiply_alpha",
+  "unpremultiply_alpha",
+]
+
+
+def is_available():
+  """
+  Return `True` if NumPy is installed and the functions in this module can be
+  used, `False` otherwise.
+  """
+  return np is not None
+
+
+def get_pixels(drawable):
+  """
+  Return pixel data of the drawable as a NumPy array. Indexed drawables are not
+  supported.
+  """
+  width, height = drawable.width, drawable.height
+  pixel_region = drawable.get_pixel_rgn(0, 0, width, height, False, False)
+  
+  return np.frombuffer(pixel_region[0:width, 0:height], dtype=np.uint8).reshape(
+    height, width, drawable.bpp)
+
+
+def get_autocrop_bounds(pixels, has_alpha):
+  """
+  Return the bounding box `(x1, y1, x2, y2)` of the contents of `pixels`, i.e.
+  pixels differing from the border color, or `None` if `pixels` contain no such
+  pixels.
+  
+  As in `plug-in-autocrop-layer`, the border color is the color of the top left
+  pixel. If `has_alpha` is `True` and the top left pixel is fully transparent,
+  all fully transparent pixels are considered the border regardless of their
+  color.
+  """
+  if has_alpha and pixels[0, 0, -1] == 0:
+    content = pixels[..., -1] != 0
+  else:
+    content = np.any(pixels != pixels[0, 0], axis=2)
+  
+  rows = np.flatnonzero(np.any(content, axis=1))
+  if not rows.size:
+    return None
+  
+  columns = np.flatnonzero(np.any(content[rows[0]:rows[-1] + 1], axis=0))
+  
+  return int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1
+
+
+def is_empty(pixels, has_alpha):
+  """
+  Return `True` if all pixels are fully transparent, `False` otherwise.
+  Drawables without an alpha channel are never empty.
+  """
+  return has_alpha and not np.any(pixels[..., -1])
+
+
+def autocrop_layer(layer):
+  """
+  Crop the layer to its contents as `plug-in-autocrop-layer` would. Return
+  `True` if the layer was cropped, `False` if the layer has no contents or
+  there is nothing to crop.
+  """
+  bounds = get_autocrop_bounds(get_pixels(layer), pdb.gimp_drawable_has_alpha(layer))
+  if bounds is None or bounds == (0, 0, layer.width, layer.height):
+    return False
+  
+  x1, y1, x2, y2 = bounds
+  pdb.gimp_layer_resize(layer, x2 - x1, y2 - y1, -x1, -y1)
+  
+  return True
+
+
+def premultiply_alpha(pixels):
+  """
+  Return a copy of `pixels` with color channels multiplied by alpha. `pixels`
+  must contain an alpha channel.
+  """
+  pixels_float = pixels.astype(np.float32)
+  alpha = pixels_float[..., -1:] / 255.0
+  
+  result = pixels.copy()
+  result[..., :-1] = np.round(pixels_float[..., :-1] * alpha)
+  
+  return result
+
+
+def unpremultiply_alpha(pixels):
+  """
+  Return a copy of `pixels` with color channels divided by alpha, reversing
+  `premultiply_alpha()`. Color channels of fully transparent pixels are set to
+  0.
+  """
+  pixels_float = pixels.astype(np.float32)
+  alpha = pixels_float[..., -1:]
+  
+  result = pixels.copy()
+  
+  with np.errstate(divide="ignore", invalid="ignore"):
+    result[..., :-1] = np.where(
+      alpha > 0,
+      np.clip(np.round(pixels_float[..., :-1] * 255.0 / alpha), 0, 255),
+      0)
+  
+  return result
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides a PNG writer independent of the GIMP PNG plug-in.
+
+Pixel data of drawables are read in the main thread via pixel regions and then
+encoded and written to files by a pool of background threads, allowing the
+caller to continue processing other images in the meantime. Filtering and zlib
+compression release the GIL for most of their duration.
+
+If NumPy is installed, scanlines are filtered adaptively (the filter type is
+chosen for each scanline), which usually results in smaller files. Otherwise,
+scanlines are not filtered. Scanlines are filtered in blocks of rows so that the
+memory used by each thread does not grow with the image size.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import collections
+import io
+import multiprocessing
+import struct
+import threading
+import zlib
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+__all__ = [
+  "PngWriter",
+  "PngWriterError",
+  "encode_png",
+  "get_drawable_data",
+  "is_drawable_supported",
+]
+
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+_FILTER_BLOCK_SIZE = 1024 * 1024
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+
+class PngWriterError(Exception):
+  
+  def __init__(self, message, filepath=None, context=None):
+    super().__init__(message)
+    
+    self.filepath = filepath
+    self.context = context
+
+
+class PngWriter(object):
+  """
+  This class encodes and writes PNG images in background threads.
+  
+  Pixel data passed to `submit()` are kept in memory until the image is
+  written. If the total size of pixel data waiting to be written exceeds
+  `memory_budget` (in bytes), `submit()` blocks until enough images are
+  written. A single image larger than `memory_budget` is still accepted if no
+  other image is pending. Besides the pixel data, each image being written
+  requires memory for the encoded image and a fixed amount of working memory
+  for filtering scanlines.
+  
+  If writing an image fails, `PngWriterError` is raised by the next call to
+  `submit()` or `wait()`. Images waiting to be written at the time of the
+  failure are discarded. Use `pop_written_contexts()` to determine which images
+  were written.
+  
+  Call `wait()` to make sure that all submitted images are written and `close()`
+  to stop the threads once the writer is no longer needed.
+  """
+  
+  def __init__(
+        self, num_threads=None, memory_budget=DEFAULT_MEMORY_BUDGET, compression=9):
+    self.memory_budget = memory_budget
+    self.compression = compression
+    
+    self._condition = threading.Condition()
+    self._jobs = collections.deque()
+    self._pending_bytes = 0
+    self._num_running_jobs = 0
+    self._written_contexts = []
+    self._error = None
+    self._is_closed = False
+    
+    self._threads = []
+    
+    for unused_ in range(num_threads if num_threads is not None else _get_num_cpus()):
+      thread = threading.Thread(target=self._process_jobs)
+      thread.daemon = True
+      thread.start()
+      self._threads.append(thread)
+  
+  @property
+  def pending_bytes(self):
+    """
+    Size of pixel data (in bytes) of images submitted and not yet written.
+    """
+    with self._condition:
+      return self._pending_bytes
+  
+  def submit(self, filepath, data, width, height, num_channels, context=None):
+    """
+    Schedule writing an image to `filepath` in the PNG format.
+    
+    `data` is a string of bytes containing 8-bit pixels row by row, as returned
+    by `get_drawable_data()`. `num_channels` is 1 (grayscale), 2 (grayscale with
+    alpha), 3 (RGB) or 4 (RGBA).
+    
+    `context` is an arbitrary object passed to `PngWriterError` if writing the
+    image fails, e.g. to identify the layer the image originates from.
+    
+    Raises:
+    
+    * `PngWriterError` - Writing a previously submitted image failed.
+    
+    * `ValueError` - The writer is closed, `num_channels` is not valid or the
+      size of `data` does not match the image dimensions.
+    """
+    if num_channels not in _PNG_COLOR_TYPES:
+      raise ValueError("invalid number of channels: {}".format(num_channels))
+    
+    if len(data) != width * height * num_channels:
+      raise ValueError(
+        "expected {} bytes of pixel data, got {}".format(
+          width * height * num_channels, len(data)))
+    
+    with self._condition:
+      if self._is_closed:
+        raise ValueError("cannot submit images to a closed PNG writer")
+      
+      self._raise_error_if_any()
+      
+      while (self._pending_bytes > 0
+             and self._pending_bytes + len(data) > self.memory_budget):
+        self._condition.wait()
+        self._raise_error_if_any()
+      
+      self._jobs.append(
+        _PngWriterJob(filepath, data, width, height, num_channels, context))
+      self._pending_bytes += len(data)
+      self._condition.notify_all()
+  
+  def wait(self):
+    """
+    Block until all submitted images are written.
+    
+    Raises:
+    
+    * `PngWriterError` - Writing any of the submitted images failed.
+    """
+    with self._condition:
+      while (self._jobs or self._num_running_jobs > 0) and self._error is None:
+        self._condition.wait()
+      
+      self._raise_error_if_any()
+  
+  def pop_written_contexts(self):
+    """
+    Return a list of `context` objects passed to `submit()` for images written
+    successfully since the last call to this method.
+    """
+    with self._condition:
+      written_contexts = self._written_contexts
+      self._written_contexts = []
+      return written_contexts
+  
+  def close(self):
+    """
+    Stop the threads. Images not yet being written are discarded. Images being
+    written are finished. Errors are not raised.
+    """
+    with self._condition:
+      self._is_closed = True
+      
+      for job in self._jobs:
+        self._pending_bytes -= len(job.data)
+      self._jobs.clear()
+      
+      self._condition.notify_all()
+    
+    for thread in self._threads:
+      thread.join()
+    
+    self._threads = []
+  
+  def _raise_error_if_any(self):
+    if self._error is not None:
+      error = self._error
+      self._error = None
+      raise error
+  
+  def _process_jobs(self):
+    while True:
+      with self._condition:
+        while not self._jobs and not self._is_closed:
+          self._condition.wait()
+        
+        if not self._jobs:
+          return
+        
+        job = self._jobs.popleft()
+        self._num_running_jobs += 1
+      
+      error = None
+      
+      try:
+        _write_png(
+          job.filepath, job.data, job.width, job.height, job.num_channels,
+          self.compression)
+      except Exception as e:
+        error = PngWriterError(str(e), job.filepath, job.context)
+      
+      with self._condition:
+        self._pending_bytes -= len(job.data)
+        self._num_running_jobs -= 1
+        
+        if error is None:
+          self._written_contexts.append(job.context)
+        else:
+          if self._error is None:
+            self._error = error
+          
+          for unwritten_job in self._jobs:
+            self._pending_bytes -= len(unwritten_job.data)
+          self._jobs.clear()
+        
+        self._condition.notify_all()
+
+
+_PngWriterJob = collections.namedtuple(
+  "_PngWriterJob", ["filepath", "data", "width", "height", "num_channels", "context"])
+
+
+def is_drawable_supported(drawable):
+  """
+  Return `True` if the drawable can be written by `PngWriter`, `False`
+  otherwise. Indexed drawables are not supported.
+  """
+  return not drawable.is_indexed
+
+
+def get_drawable_data(drawable):
+  """
+  Return pixel data of the drawable as a tuple
+  `(data, width, height, number of channels)` suitable for `PngWriter.submit()`.
+  """
+  width, height = drawable.width, drawable.height
+  pixel_region = drawable.get_pixel_rgn(0, 0, width, height, False, False)
+  
+  return pixel_region[0:width, 0:height], width, height, drawable.bpp
+
+
+def encode_png(data, width, height, num_channels, compression=9):
+  """
+  Return an image in the PNG format as a string of bytes. See
+  `PngWriter.submit()` for the description of the parameters.
+  """
+  header = struct.pack(
+    b">IIBBBBB", width, height, 8, _PNG_COLOR_TYPES[num_channels], 0, 0, 0)
+  
+  return b"".join([
+    _PNG_SIGNATURE,
+    _get_png_chunk(b"IHDR", header),
+    _get_png_chunk(
+      b"IDAT",
+      zlib.compress(_filter_scanlines(data, width, height, num_channels), compression)),
+    _get_png_chunk(b"IEND", b""),
+  ])
+
+
+def _write_png(filepath, data, width, height, num_channels, compression):
+  png_data = encode_png(data, width, height, num_channels, compression)
+  
+  with io.open(filepath, "wb") as file_:
+    file_.write(png_data)
+
+
+def _get_png_chunk(chunk_type, chunk_data):
+  return b"".join([
+    struct.pack(b">I", len(chunk_data)),
+    chunk_type,
+    chunk_data,
+    struct.pack(b">I", zlib.crc32(chunk_type + chunk_data) & 0xffffffff)])
+
+
+def _filter_scanlines(data, width, height, num_channels):
+  if np is not None:
+    return _filter_scanlines_adaptive(data, width, height, num_channels)
+  else:
+    row_size = width * num_channels
+    return b"".join(
+      b"\x00" + data[row_index * row_size:(row_index + 1) * row_size]
+      for row_index in range(height))
+
+
+def _filter_scanlines_adaptive(data, width, height, num_channels):
+  """
+  Filter each scanline with the filter type producing the lowest sum of
+  absolute differences, as recommended by the PNG specification.
+  
+  Scanlines are filtered in blocks of rows as filtering requires several
+  temporary arrays many times larger than the filtered rows.
+  """
+  row_size = width * num_channels
+  pixels = np.frombuffer(data, dtype=np.uint8).reshape(height, row_size)
+  num_rows_per_block = max(_FILTER_BLOCK_SIZE // max(row_size, 1), 1)
+  
+  scanlines = np.empty((height, row_size + 1), dtype=np.uint8)
+  
+  for start_row in range(0, height, num_rows_per_block):
+    end_row = min(start_row + num_rows_per_block, height)
+    
+    scanlines[start_row:end_row, 0], scanlines[start_row:end_row, 1:] = (
+      _filter_rows_adaptive(pixels, start_row, end_row, num_channels))
+  
+  return scanlines.tobytes()
+
+
+def _filter_rows_adaptive(pixels, start_row, end_row, num_channels):
+  rows = pixels[start_row:end_row].astype(np.int16)
+  
+  upper = np.zeros_like(rows)
+  upper[1:] = rows[:-1]
+  if start_row > 0:
+    upper[0] = pixels[start_row - 1]
+  
+  left = np.zeros_like(rows)
+  left[:, num_channels:] = rows[:, :-num_channels]
+  upper_left = np.zeros_like(rows)
+  upper_left[:, num_channels:] = upper[:, :-num_channels]
+  
+  distance_left = np.abs(upper - upper_left)
+  distance_upper = np.abs(left - upper_left)
+  distance_upper_left = np.abs(left + upper - 2 * upper_left)
+  paeth = np.where(
+    (distance_left <= distance_upper) & (distance_left <= distance_upper_left),
+    left,
+    np.where(distance_upper <= distance_upper_left, upper, upper_left))
+  
+  filtered_rows = np.stack([
+    rows,
+    rows - left,
+    rows - upper,
+    rows - (left + upper) // 2,
+    rows - paeth,
+  ]).astype(np.uint8)
+  
+  costs = np.minimum(filtered_rows, 256 - filtered_rows.astype(np.int16)).sum(axis=2)
+  filter_types = np.argmin(costs, axis=0)
+  
+  return filter_types, filtered_rows[filter_types, np.arange(len(rows))]
+
+
+def _get_num_cpus():
+  try:
+    return multiprocessing.cpu_count()
+  except NotImplementedError:
+    return 2
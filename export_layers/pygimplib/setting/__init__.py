@@ -25,9 +25,13 @@ from .group import *
 from .pdbparams import *
 from .persistor import *
 from .presenter import *
-from .presenters_gtk import *
 from .settings import *
 from .sources import *
 from .utils import *
 
 from ._sources_errors import *
+
+from .. import _DeferredModule
+
+# GTK-dependent presenters are imported only when a setting GUI is created.
+presenters_gtk = _DeferredModule("setting.presenters_gtk")
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module defines the format in which `setting.sources` store setting values.
+
+Setting values are split into records, one record per top-level group (i.e. the
+first component of a setting path). Each record is stored as a length-prefixed
+binary pickle, allowing a record to be decoded only when a setting from the
+record is requested.
+
+The layout of the encoded data is as follows:
+* magic string identifying the format
+* format version (unsigned short), number of records (unsigned int)
+* for each record:
+  * length of the record name (unsigned short), record name encoded in UTF-8
+  * length of the record data (unsigned int), record data
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import collections
+import struct
+
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+
+from . import utils as utils_
+
+__all__ = [
+  "SettingRecords",
+  "SettingRecordsFormatError",
+]
+
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"pgsettings"
+_PICKLE_PROTOCOL = 2
+
+_HEADER = struct.Struct(b">HI")
+_RECORD_NAME_LENGTH = struct.Struct(b">H")
+_RECORD_DATA_LENGTH = struct.Struct(b">I")
+
+
+class SettingRecordsFormatError(Exception):
+  pass
+
+
+class SettingRecords(collections.MutableMapping):
+  """
+  This class is a dictionary of `(setting path, setting value)` pairs grouped
+  into records by top-level groups.
+  
+  Records created by `decode()` are decoded lazily, once any of their setting
+  paths is accessed. Records that were never decoded or modified are encoded
+  back without being pickled again.
+  
+  Accessing a record whose data are corrupt raises
+  `SettingRecordsFormatError`.
+  """
+  
+  def __init__(self):
+    self._records = collections.OrderedDict()
+    self._encoded_records = {}
+  
+  @classmethod
+  def from_dict(cls, setting_paths_and_values):
+    """
+    Create a `SettingRecords` instance from a dictionary of
+    `(setting path, setting value)` pairs.
+    """
+    setting_records = cls()
+    
+    for setting_path, value in setting_paths_and_values.items():
+      setting_records[setting_path] = value
+    
+    return setting_records
+  
+  @classmethod
+  def decode(cls, data):
+    """
+    Create a `SettingRecords` instance from data returned by `encode()`. Only
+    the record names and boundaries are parsed, the records themselves are
+    decoded on demand.
+    
+    Raises:
+    
+    * `SettingRecordsFormatError` - `data` has an invalid format or was stored
+      in a newer, unsupported format version.
+    """
+    if not cls.is_encoded(data):
+      raise SettingRecordsFormatError("data are not in the setting records format")
+    
+    position = len(_MAGIC)
+    
+    try:
+      format_version, num_records = _HEADER.unpack_from(data, position)
+      position += _HEADER.size
+      
+      if format_version > FORMAT_VERSION:
+        raise SettingRecordsFormatError(
+          "unsupported format version {}".format(format_version))
+      
+      setting_records = cls()
+      
+      for unused_ in range(num_records):
+        record_name_length = _RECORD_NAME_LENGTH.unpack_from(data, position)[0]
+        position += _RECORD_NAME_LENGTH.size
+        record_name = data[position:position + record_name_length].decode("utf-8")
+        position += record_name_length
+        
+        record_data_length = _RECORD_DATA_LENGTH.unpack_from(data, position)[0]
+        position += _RECORD_DATA_LENGTH.size
+        record_data = data[position:position + record_data_length]
+        position += record_data_length
+        
+        if len(record_data) != record_data_length:
+          raise SettingRecordsFormatError("record is truncated")
+        
+        setting_records._records[record_name] = None
+        setting_records._encoded_records[record_name] = record_data
+    except (struct.error, UnicodeDecodeError) as e:
+      raise SettingRecordsFormatError(str(e))
+    
+    if position != len(data):
+      raise SettingRecordsFormatError("unexpected data after the last record")
+    
+    return setting_records
+  
+  @staticmethod
+  def is_encoded(data):
+    """
+    Return `True` if `data` were created by `encode()` (judging by the data
+    header), `False` otherwise.
+    """
+    return isinstance(data, type(b"")) and data.startswith(_MAGIC)
+  
+  def encode(self):
+    """
+    Return records as a string of bytes.
+    """
+    data_parts = [_MAGIC, _HEADER.pack(FORMAT_VERSION, len(self._records))]
+    
+    for record_name in self._records:
+      record_name_data = record_name.encode("utf-8")
+      record_data = self._get_encoded_record(record_name)
+      
+      data_parts.extend([
+        _RECORD_NAME_LENGTH.pack(len(record_name_data)),
+        record_name_data,
+        _RECORD_DATA_LENGTH.pack(len(record_data)),
+        record_data])
+    
+    return b"".join(data_parts)
+  
+  def to_dict(self):
+    """
+    Return all `(setting path, setting value)` pairs as an ordered dictionary.
+    All records are decoded.
+    """
+    return collections.OrderedDict(
+      (setting_path, value)
+      for record_name in self._records
+      for setting_path, value in self._get_record(record_name).items())
+  
+  def __getitem__(self, setting_path):
+    record_name = _get_record_name(setting_path)
+    if record_name not in self._records:
+      raise KeyError(setting_path)
+    
+    return self._get_record(record_name)[setting_path]
+  
+  def __setitem__(self, setting_path, value):
+    record_name = _get_record_name(setting_path)
+    
+    if record_name in self._records:
+      record = self._get_record(record_name)
+    else:
+      record = collections.OrderedDict()
+      self._records[record_name] = record
+    
+    record[setting_path] = value
+    self._encoded_records.pop(record_name, None)
+  
+  def __delitem__(self, setting_path):
+    record_name = _get_record_name(setting_path)
+    if record_name not in self._records:
+      raise KeyError(setting_path)
+    
+    record = self._get_record(record_name)
+    del record[setting_path]
+    self._encoded_records.pop(record_name, None)
+    
+    if not record:
+      del self._records[record_name]
+  
+  def __iter__(self):
+    for record_name in list(self._records):
+      for setting_path in self._get_record(record_name):
+        yield setting_path
+  
+  def __len__(self):
+    return sum(len(self._get_record(record_name)) for record_name in self._records)
+  
+  def _get_record(self, record_name):
+    record = self._records[record_name]
+    
+    if record is None:
+      try:
+        record = pickle.loads(self._encoded_records[record_name])
+      except Exception:
+        raise SettingRecordsFormatError(
+          'record "{}" could not be decoded'.format(record_name))
+      
+      if not isinstance(record, dict):
+        raise SettingRecordsFormatError(
+          'record "{}" has an invalid format'.format(record_name))
+      
+      self._records[record_name] = record
+    
+    return record
+  
+  def _get_encoded_record(self, record_name):
+    if record_name not in self._encoded_records:
+      self._encoded_records[record_name] = pickle.dumps(
+        self._records[record_name], _PICKLE_PROTOCOL)
+    
+    return self._encoded_records[record_name]
+
+
+def _get_record_name(setting_path):
+  return setting_path.split(utils_.SETTING_PATH_SEPARATOR, 1)[0]
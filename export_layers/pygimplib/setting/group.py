@@ -24,6 +24,7 @@ from future.builtins import *
 import future.utils
 
 import collections
+import contextlib
 import inspect
 
 from .. import utils as pgutils
@@ -131,8 +132,17 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     
     self._settings = collections.OrderedDict()
     
-    # Used in `_next()`
-    self._settings_iterator = None
+    # key: path to a setting or group relative to this group
+    # value: setting or group
+    # The index is created on the first access via a path and discarded
+    # whenever settings are added to or removed from this group or any nested
+    # group.
+    self._settings_by_path = None
+    
+    # key: cache key passed to `flatten()`
+    # value: tuple of settings and groups
+    # The cached tuples are discarded in the same manner as the path index.
+    self._flattened_settings = {}
   
   @property
   def name(self):
@@ -193,6 +203,15 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
       return setting_name_or_path in self._settings
   
   def _get_setting_from_path(self, setting_path):
+    if self._settings_by_path is None:
+      self._settings_by_path = self._create_settings_by_path()
+    
+    try:
+      return self._settings_by_path[setting_path]
+    except KeyError:
+      return self._find_setting_from_path(setting_path)
+  
+  def _find_setting_from_path(self, setting_path):
     setting_path_components = setting_path.split(utils_.SETTING_PATH_SEPARATOR)
     current_group = self
     for group_name in setting_path_components[:-1]:
@@ -210,6 +229,30 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     
     return setting
   
+  def _create_settings_by_path(self):
+    settings_by_path = {}
+    groups_and_path_prefixes = [(self, "")]
+    
+    while groups_and_path_prefixes:
+      group, path_prefix = groups_and_path_prefixes.pop()
+      
+      for setting in group._settings.values():
+        setting_path = path_prefix + setting.name
+        settings_by_path[setting_path] = setting
+        
+        if isinstance(setting, Group):
+          groups_and_path_prefixes.append(
+            (setting, setting_path + utils_.SETTING_PATH_SEPARATOR))
+    
+    return settings_by_path
+  
+  def _invalidate_structure_caches(self):
+    group = self
+    while group is not None:
+      group._settings_by_path = None
+      group._flattened_settings = {}
+      group = group.parent
+  
   def __iter__(self):
     """
     Iterate over settings in the order they were created or added.
@@ -269,6 +312,8 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
         setting = self._create_setting(setting)
       
       self._set_as_parent_for_setting(setting)
+    
+    self._invalidate_structure_caches()
   
   def _add_setting(self, setting):
     if setting.name in self._settings:
@@ -443,6 +488,7 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     for setting_name in setting_names:
       if setting_name in self._settings:
         del self._settings[setting_name]
+        self._invalidate_structure_caches()
       else:
         raise KeyError("setting '{}' not found".format(setting_name))
   
@@ -453,8 +499,8 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
         include_if_parent_skipped=False,
         walk_callbacks=None):
     """
-    Return a generator that walks (iterates over) all settings in the group,
-    including settings in nested groups. The generator performs a pre-order
+    Return an iterator that walks (iterates over) all settings in the group,
+    including settings in nested groups. The iterator performs a pre-order
     traversal.
     
     If `include_setting_func` is `None`, iterate over all settings. Otherwise,
@@ -471,58 +517,95 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     `walk_callbacks` is an `GroupWalkCallbacks` instance that invokes additional
     commands during the walk of the group. By default, the callbacks do nothing.
     For more information, see the `GroupWalkCallbacks` class.
+    
+    Multiple walks over the same group may be performed at the same time (e.g.
+    a walk inside a loop over another walk).
+    """
+    if (include_setting_func is None
+        and not include_groups
+        and not include_if_parent_skipped
+        and walk_callbacks is None):
+      return iter(self.flatten())
+    else:
+      return self._walk(
+        include_setting_func, include_groups, include_if_parent_skipped, walk_callbacks)
+  
+  def flatten(
+        self,
+        include_setting_func=None,
+        include_groups=False,
+        include_if_parent_skipped=False,
+        cache_key=None):
     """
+    Return a tuple of settings as yielded by `walk()` given the same arguments.
+    
+    The tuple is cached if `include_setting_func` is `None` or `cache_key` is
+    specified. The cached tuple is discarded once settings are added to or
+    removed from this group or any nested group.
+    
+    `cache_key` must uniquely identify the combination of the other arguments.
+    Specify `cache_key` only if `include_setting_func` returns the same result
+    for a setting during the lifetime of the setting (e.g. if the function
+    checks for tags assigned when creating the setting).
+    """
+    if cache_key is None and include_setting_func is None:
+      cache_key = (None, include_groups, include_if_parent_skipped)
+    
+    if cache_key is None:
+      return tuple(
+        self._walk(include_setting_func, include_groups, include_if_parent_skipped))
+    
+    try:
+      return self._flattened_settings[cache_key]
+    except KeyError:
+      flattened_settings = tuple(
+        self._walk(include_setting_func, include_groups, include_if_parent_skipped))
+      self._flattened_settings[cache_key] = flattened_settings
+      return flattened_settings
+  
+  def _walk(
+        self,
+        include_setting_func,
+        include_groups,
+        include_if_parent_skipped,
+        walk_callbacks=None):
     if include_setting_func is None:
       include_setting_func = pgutils.create_empty_func(return_value=True)
     
     if walk_callbacks is None:
       walk_callbacks = GroupWalkCallbacks()
     
-    groups = [self]
+    # Each group being walked is paired with its own iterator so that the walk
+    # keeps no state in the groups themselves.
+    groups_and_iterators = [(self, self._settings.itervalues())]
     
-    while groups:
+    while groups_and_iterators:
+      group, settings_iterator = groups_and_iterators[-1]
+      
       try:
-        setting_or_group = groups[0]._next()
+        setting_or_group = next(settings_iterator)
       except StopIteration:
-        if groups[0] != self:
-          walk_callbacks.on_end_group_walk(groups[0])
+        if group is not self:
+          walk_callbacks.on_end_group_walk(group)
         
-        groups.pop(0)
+        groups_and_iterators.pop()
         continue
       
       if isinstance(setting_or_group, Group):
         if include_setting_func(setting_or_group):
-          groups.insert(0, setting_or_group)
+          groups_and_iterators.append(
+            (setting_or_group, setting_or_group._settings.itervalues()))
           
           if include_groups:
             walk_callbacks.on_visit_group(setting_or_group)
             yield setting_or_group
         elif include_if_parent_skipped:
-          groups.insert(0, setting_or_group)
-          continue
-        else:
-          continue
+          groups_and_iterators.append(
+            (setting_or_group, setting_or_group._settings.itervalues()))
       else:
         if include_setting_func(setting_or_group):
           walk_callbacks.on_visit_setting(setting_or_group)
           yield setting_or_group
-        else:
-          continue
-  
-  def _next(self):
-    """
-    Return the next element when iterating the settings. Used by `walk()`.
-    """
-    if self._settings_iterator is None:
-      self._settings_iterator = self._settings.itervalues()
-    
-    try:
-      next_element = next(self._settings_iterator)
-    except StopIteration:
-      self._settings_iterator = None
-      raise StopIteration
-    else:
-      return next_element
   
   def reset(self):
     """
@@ -535,6 +618,42 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     for setting in self.walk(include_setting_func=_has_ignore_reset_tag):
       setting.reset()
   
+  @contextlib.contextmanager
+  def batch_events(self):
+    """
+    Return a context manager that postpones events notifying about changed
+    setting values (e.g. `"value-changed"`) for all settings in this group
+    until the end of the `with` block. This is useful when changing values of
+    many settings at once, e.g. when loading or resetting settings.
+    
+    At the end of the block, settings are updated in the GUI and the postponed
+    events are invoked, each event handler only once. For more information, see
+    `setting.utils.SettingEventBatch`.
+    
+    Settings added to the group inside the `with` block are not affected. Nested
+    calls to this method have no effect.
+    
+    Example:
+      
+      with settings.batch_events():
+        settings.load()
+    """
+    event_batch = utils_.SettingEventBatch()
+    
+    batched_settings = [
+      setting for setting in self.walk() if setting._event_batch is None]
+    
+    for setting in batched_settings:
+      setting._event_batch = event_batch
+    
+    try:
+      yield event_batch
+    finally:
+      for setting in batched_settings:
+        setting._event_batch = None
+      
+      event_batch.invoke_events()
+  
   def load(self, setting_sources=None):
     """
     Load all settings in this group. Ignore settings with the `"ignore_load"`
@@ -554,7 +673,7 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     """
     return self._load_save_group(
       "ignore_load",
-      persistor_.Persistor.load,
+      self._load_settings_per_sources,
       setting_sources,
       "before-load-group",
       "after-load-group")
@@ -565,11 +684,14 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     tag. Return the status and the status message as per
     `setting.persistor.Persistor.save()`.
     
+    Unlike `load()`, all combinations of setting sources are saved at once,
+    writing to each setting source only once.
+    
     For more information, see `load()`.
     """
     return self._load_save_group(
       "ignore_save",
-      persistor_.Persistor.save,
+      self._save_settings_per_sources,
       setting_sources,
       "before-save-group",
       "after-save-group")
@@ -596,20 +718,6 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     return return_values
   
   def _load_save(self, load_save_ignore_tag, load_save_func, setting_sources):
-    
-    def _get_worst_status(status_and_messages):
-      worst_status = persistor_.Persistor.SUCCESS
-      
-      if persistor_.Persistor.NOT_ALL_SETTINGS_FOUND in status_and_messages:
-        worst_status = persistor_.Persistor.NOT_ALL_SETTINGS_FOUND
-      
-      if persistor_.Persistor.READ_FAIL in status_and_messages:
-        worst_status = persistor_.Persistor.READ_FAIL
-      elif persistor_.Persistor.WRITE_FAIL in status_and_messages:
-        worst_status = persistor_.Persistor.WRITE_FAIL
-      
-      return worst_status
-    
     setting_iterator = self.walk(
       include_setting_func=lambda setting: load_save_ignore_tag not in setting.tags)
     settings = [setting for setting in setting_iterator if setting.setting_sources]
@@ -629,16 +737,39 @@ class Group(utils_.SettingParentMixin, utils_.SettingEventsMixin):
         
         settings_per_sources[sources].append(setting)
     
+    return load_save_func(settings_per_sources)
+  
+  @staticmethod
+  def _load_settings_per_sources(settings_per_sources):
+    
+    def _get_worst_status(status_and_messages):
+      worst_status = persistor_.Persistor.SUCCESS
+      
+      if persistor_.Persistor.NOT_ALL_SETTINGS_FOUND in status_and_messages:
+        worst_status = persistor_.Persistor.NOT_ALL_SETTINGS_FOUND
+      
+      if persistor_.Persistor.READ_FAIL in status_and_messages:
+        worst_status = persistor_.Persistor.READ_FAIL
+      elif persistor_.Persistor.WRITE_FAIL in status_and_messages:
+        worst_status = persistor_.Persistor.WRITE_FAIL
+      
+      return worst_status
+    
     status_and_messages = collections.OrderedDict()
     
     for sources, settings in settings_per_sources.items():
-      status, message = load_save_func(settings, sources)
+      status, message = persistor_.Persistor.load(settings, sources)
       status_and_messages[status] = message
     
     worst_status = _get_worst_status(status_and_messages)
     
     return worst_status, status_and_messages.get(worst_status, "")
   
+  @staticmethod
+  def _save_settings_per_sources(settings_per_sources):
+    return persistor_.Persistor.save_multiple(
+      [(settings, sources) for sources, settings in settings_per_sources.items()])
+  
   def initialize_gui(self, custom_gui=None):
     """
     Initialize GUI for all settings. Ignore settings with the
@@ -149,22 +149,52 @@ class Persistor(object):
       
       * `status_message` - Message describing the status in more detail.
     """
-    if not settings_or_groups or not setting_sources:
-      return cls._status(cls.SUCCESS)
+    return cls.save_multiple([(settings_or_groups, setting_sources)])
+  
+  @classmethod
+  def save_multiple(cls, settings_or_groups_and_sources):
+    """
+    Save setting values to setting sources for each
+    `(settings_or_groups, setting_sources)` pair in
+    `settings_or_groups_and_sources`. The meaning of the elements of each pair
+    is the same as the parameters in `save()`.
     
-    settings = cls._list_settings(settings_or_groups)
+    Unlike calling `save()` for each pair, each setting source is written to at
+    most once, regardless of how many pairs the setting source is specified in.
     
-    for setting in settings:
-      setting.invoke_event("before-save")
+    The return value has the same meaning as in `save()`.
+    """
+    settings_and_sources = []
+    for settings_or_groups, setting_sources in settings_or_groups_and_sources:
+      if settings_or_groups and setting_sources:
+        settings_and_sources.append(
+          (cls._list_settings(settings_or_groups), setting_sources))
+    
+    for settings, unused_ in settings_and_sources:
+      for setting in settings:
+        setting.invoke_event("before-save")
+    
+    sources_to_flush = []
+    
+    for settings, setting_sources in settings_and_sources:
+      for source in setting_sources:
+        try:
+          source.write(settings, flush=False)
+        except _sources_errors.SourceError as e:
+          return cls._status(cls.WRITE_FAIL, str(e))
+        
+        if source not in sources_to_flush:
+          sources_to_flush.append(source)
     
-    for source in setting_sources:
+    for source in sources_to_flush:
       try:
-        source.write(settings)
+        source.flush()
       except _sources_errors.SourceError as e:
         return cls._status(cls.WRITE_FAIL, str(e))
     
-    for setting in settings:
-      setting.invoke_event("after-save")
+    for settings, unused_ in settings_and_sources:
+      for setting in settings:
+        setting.invoke_event("after-save")
     
     return cls._status(cls.SUCCESS)
   
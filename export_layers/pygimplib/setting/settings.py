@@ -42,10 +42,9 @@ from . import persistor as persistor_
 from . import presenter as presenter_
 from . import utils as utils_
 
-from .presenters_gtk import SettingGuiTypes
-
 __all__ = [
   "SettingPdbTypes",
+  "SettingGuiTypes",
   "Setting",
   "IntSetting",
   "FloatSetting",
@@ -113,6 +112,55 @@ class SettingPdbTypes(object):
   automatic = "automatic"
 
 
+class SettingGuiTypes(object):
+  """
+  This enum maps human-readable names to `Presenter` classes defined in the
+  `presenters_gtk` module.
+  
+  The names are resolved to `Presenter` classes only when creating a GUI in
+  `Setting.set_gui()` so that GTK modules are not imported if no setting GUI is
+  created (e.g. when running plug-ins non-interactively).
+  """
+  
+  int_spin_button = "int_spin_button"
+  float_spin_button = "float_spin_button"
+  check_button = "check_button"
+  check_button_label = "check_button_label"
+  check_menu_item = "check_menu_item"
+  combo_box = "combo_box"
+  text_entry = "text_entry"
+  
+  image_combo_box = "image_combo_box"
+  item_combo_box = "item_combo_box"
+  drawable_combo_box = "drawable_combo_box"
+  layer_combo_box = "layer_combo_box"
+  channel_combo_box = "channel_combo_box"
+  vectors_combo_box = "vectors_combo_box"
+  
+  color_button = "color_button"
+  parasite_box = "parasite_box"
+  display_spin_button = "display_spin_button"
+  
+  extended_entry = "extended_entry"
+  folder_chooser = "folder_chooser"
+  
+  brush_select_button = "brush_select_button"
+  font_select_button = "font_select_button"
+  gradient_select_button = "gradient_select_button"
+  palette_select_button = "palette_select_button"
+  pattern_select_button = "pattern_select_button"
+  
+  array_box = "array_box"
+  
+  window_position = "window_position"
+  window_size = "window_size"
+  expander = "expander"
+  paned_position = "paned_position"
+  
+  automatic = "automatic"
+  none = presenter_.NullPresenter
+
+
 @future.utils.python_2_unicode_compatible
 class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
   """
@@ -186,6 +234,10 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     * `"after-save-group"` - invoked after saving settings in a group via
       `Group.load()`.
   
+  Events notifying about a changed value (`"value-changed"`,
+  `"after-set-value"`, `"after-reset"`) can be postponed and invoked at once
+  for multiple settings via `Group.batch_events()`.
+  
   If a setting subclass supports "empty" values, such values will not be
   considered invalid when used as default values. However, empty values will be
   treated as invalid when assigning the setting one of such values after
@@ -448,7 +500,7 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     self.invoke_event("before-set-value")
     
     self._validate_and_assign_value(value)
-    self._setting_value_synchronizer.apply_setting_value_to_gui(value)
+    self._apply_setting_value_to_gui(value)
     
     self.invoke_event("value-changed")
     self.invoke_event("after-set-value")
@@ -477,7 +529,7 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     self.invoke_event("before-reset")
     
     self._value = self._copy_value(self._default_value)
-    self._setting_value_synchronizer.apply_setting_value_to_gui(self._value)
+    self._apply_setting_value_to_gui(self._value)
     
     self.invoke_event("value-changed")
     self.invoke_event("after-reset")
@@ -494,7 +546,8 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     
     Parameters:
     
-    * `gui_type` - `Presenter` type to wrap `gui_element` around.
+    * `gui_type` - `Presenter` type (or its name in `SettingGuiTypes`) to wrap
+      `gui_element` around.
       
       When calling this method, `gui_type` does not have to be one of the
       allowed GUI types specified in the setting.
@@ -532,6 +585,8 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
       # We need to disconnect the "GUI changed" event before removing the GUI.
       self._gui.auto_update_gui_to_setting(False)
     
+    gui_type = self._get_gui_presenter_type(gui_type)
+    
     self._gui = gui_type(
       self,
       gui_element,
@@ -661,6 +716,12 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
     self._validate_and_assign_value(value)
     self.invoke_event("value-changed")
   
+  def _apply_setting_value_to_gui(self, value):
+    if self._event_batch is not None:
+      self._event_batch.add_gui_update(self)
+    else:
+      self._setting_value_synchronizer.apply_setting_value_to_gui(value)
+  
   def _validate_setting(self, value):
     try:
       self._validate(value)
@@ -727,10 +788,24 @@ class Setting(utils_.SettingParentMixin, utils_.SettingEventsMixin):
           "{}: invalid GUI type '{}'; must be one of {}".format(
             self.name,
             gui_type,
-            [type_.__name__ for type_ in self._ALLOWED_GUI_TYPES]))
+            [getattr(type_, "__name__", type_)
+             for type_ in self._ALLOWED_GUI_TYPES]))
     
     return gui_type_to_return
   
+  def _get_gui_presenter_type(self, gui_type):
+    """
+    Return the `Presenter` class for the given GUI type. If `gui_type` is a
+    name from `SettingGuiTypes`, import the `presenters_gtk` module and return
+    the `Presenter` class of the same name from that module.
+    """
+    if isinstance(gui_type, types.StringTypes):
+      from . import presenters_gtk
+      
+      return getattr(presenters_gtk.SettingGuiTypes, gui_type)
+    else:
+      return gui_type
+  
   def _load_save(self, setting_sources, load_save_func):
     if setting_sources is None:
       setting_sources = self._setting_sources
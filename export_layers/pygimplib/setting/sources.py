@@ -25,7 +25,7 @@ from future.builtins import *
 import future.utils
 
 import abc
-import collections
+import copy
 import os
 
 try:
@@ -42,6 +42,7 @@ from .. import constants as pgconstants
 from . import settings as settings_
 
 from ._sources_errors import *
+from . import _sources_records
 
 __all__ = [
   "Source",
@@ -56,6 +57,12 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
   sources. For easier usage, is is highly recommended to use the
   `setting.persistor.Persistor` class instead.
   
+  Setting values are stored in the format defined by
+  `setting._sources_records.SettingRecords` - one record per top-level group,
+  decoded only when settings from that group are read. Data stored in the
+  format used by older versions (a pickled dictionary) can still be read and are
+  converted to the current format on the next write.
+  
   Attributes:
   
   * `source_name` - A unique identifier to distinguish entries from different
@@ -64,12 +71,22 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
   
   def __init__(self, source_name):
     self.source_name = source_name
+    
+    # Copy of the setting names and values in the source as of the last read or
+    # write. The copy is never shared with settings so that values modified in
+    # place are still recognized as changed.
+    self._settings_from_source = None
+    self._has_unwritten_changes = False
   
   def read(self, settings):
     """
     Read setting values from the source and assign them to the settings
     specified in the `settings` iterable.
     
+    The source is read only the first time this method or `write()` is called.
+    Subsequent calls use setting values cached from the first read, unless the
+    source was modified externally in the meantime.
+    
     If a setting value from the source is invalid, the setting will be reset to
     its default value.
     
@@ -84,7 +101,7 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
     * `SourceInvalidFormatError` - The source has an invalid format. This could
       happen if the source was directly edited manually.
     """
-    settings_from_source = self.read_dict()
+    settings_from_source = self._get_settings_from_source()
     if settings_from_source is None:
       raise SourceNotFoundError(
         _('Could not find setting source "{}".').format(self.source_name))
@@ -96,9 +113,11 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
         value = settings_from_source[setting.get_path("root")]
       except KeyError:
         settings_not_found.append(setting)
+      except _sources_records.SettingRecordsFormatError:
+        self._raise_invalid_format_error()
       else:
         try:
-          setting.set_value(value)
+          setting.set_value(copy.deepcopy(value))
         except settings_.SettingValueError:
           setting.reset()
     
@@ -108,22 +127,53 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
           "\n".join(setting.get_path() for setting in settings_not_found)),
         settings_not_found)
   
-  def write(self, settings):
+  def write(self, settings, flush=True):
     """
     Write setting values from settings specified in the `settings` iterable
     to the source. Settings in the source but not specified in `settings` are
     kept intact.
+    
+    Only values that changed since the last time the source was read or written
+    are updated. If no value changed, the source is not written to at all.
+    
+    If `flush` is `False`, the changed values are only recorded and written to
+    the source when calling `flush()`. This allows writing settings from
+    multiple calls to this method at once.
     """
-    settings_from_source = self.read_dict()
-    if settings_from_source is not None:
-      setting_names_and_values = settings_from_source
-      setting_names_and_values.update(self._settings_to_dict(settings))
-    else:
-      setting_names_and_values = self._settings_to_dict(settings)
+    settings_from_source = self._get_settings_from_source()
+    if settings_from_source is None:
+      settings_from_source = _sources_records.SettingRecords()
+      self._settings_from_source = settings_from_source
+      self._has_unwritten_changes = True
+    
+    for setting in settings:
+      setting_path = setting.get_path("root")
+      
+      try:
+        is_value_changed = (
+          setting_path not in settings_from_source
+          or settings_from_source[setting_path] != setting.value)
+      except _sources_records.SettingRecordsFormatError:
+        self._raise_invalid_format_error()
+      
+      if is_value_changed:
+        settings_from_source[setting_path] = copy.deepcopy(setting.value)
+        self._has_unwritten_changes = True
     
-    self.write_dict(setting_names_and_values)
+    if flush:
+      self.flush()
+  
+  def flush(self):
+    """
+    Write setting values recorded by `write()` to the source. Do nothing if
+    there are no values to be written.
+    """
+    if not self._has_unwritten_changes:
+      return
+    
+    self._write_data(self._settings_from_source.encode())
+    self._has_unwritten_changes = False
   
-  @abc.abstractmethod
   def clear(self):
     """
     Remove all settings from the source.
@@ -131,7 +181,10 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
     This method is useful if settings are renamed, since the old settings would
     not be removed and would thus lead to bloating the source.
     """
-    pass
+    self._clear()
+    
+    self._settings_from_source = None
+    self._has_unwritten_changes = False
   
   @abc.abstractmethod
   def has_data(self):
@@ -140,7 +193,6 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
     """
     pass
   
-  @abc.abstractmethod
   def read_dict(self):
     """
     Read all setting values from the source to a dictionary of
@@ -156,9 +208,15 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
     * `SourceInvalidFormatError` - Data could not be read due to likely being
       corrupt.
     """
-    pass
+    settings_from_source = self._read_settings_from_source()
+    if settings_from_source is None:
+      return None
+    
+    try:
+      return settings_from_source.to_dict()
+    except _sources_records.SettingRecordsFormatError:
+      self._raise_invalid_format_error()
   
-  @abc.abstractmethod
   def write_dict(self, setting_names_and_values):
     """
     Write setting names and values to the source specified in the
@@ -171,14 +229,62 @@ class Source(future.utils.with_metaclass(abc.ABCMeta, object)):
     This method is useful in the unlikely case it is more convenient to directly
     modify or remove settings from the source.
     """
+    settings_from_source = _sources_records.SettingRecords.from_dict(
+      setting_names_and_values)
+    
+    self._write_data(settings_from_source.encode())
+    
+    self._settings_from_source = settings_from_source
+    self._has_unwritten_changes = False
+  
+  @abc.abstractmethod
+  def _clear(self):
+    pass
+  
+  @abc.abstractmethod
+  def _read_data(self):
+    """
+    Return data stored in the source as they were written by `_write_data()` (or
+    by an older version of this class), or `None` if the source does not exist.
+    """
     pass
   
-  def _settings_to_dict(self, settings):
-    settings_dict = collections.OrderedDict()
-    for setting in settings:
-      settings_dict[setting.get_path("root")] = setting.value
+  @abc.abstractmethod
+  def _write_data(self, data):
+    pass
+  
+  @abc.abstractmethod
+  def _get_invalid_format_message(self):
+    pass
+  
+  def _get_settings_from_source(self):
+    if self._settings_from_source is None or not self._is_cache_valid():
+      self._settings_from_source = self._read_settings_from_source()
+      self._has_unwritten_changes = False
+    
+    return self._settings_from_source
+  
+  def _read_settings_from_source(self):
+    data = self._read_data()
+    if data is None:
+      return None
     
-    return settings_dict
+    try:
+      if _sources_records.SettingRecords.is_encoded(data):
+        return _sources_records.SettingRecords.decode(data)
+      else:
+        return _sources_records.SettingRecords.from_dict(self._load_legacy_data(data))
+    except Exception:
+      self._raise_invalid_format_error()
+  
+  def _load_legacy_data(self, data):
+    return data
+  
+  def _is_cache_valid(self):
+    return True
+  
+  def _raise_invalid_format_error(self):
+    raise SourceInvalidFormatError(self._get_invalid_format_message())
 
 
 class SessionSource(Source):
@@ -190,7 +296,12 @@ class SessionSource(Source):
   name and the last used value of each setting.
   """
   
-  def clear(self):
+  def __init__(self, source_name):
+    super().__init__(source_name)
+    
+    self._shelf = None
+  
+  def _clear(self):
     gimpshelf.shelf[self._get_key()] = None
   
   def has_data(self):
@@ -198,18 +309,28 @@ class SessionSource(Source):
       gimpshelf.shelf.has_key(self._get_key())
       and gimpshelf.shelf[self._get_key()] is not None)
   
-  def read_dict(self):
+  def _read_data(self):
+    self._shelf = gimpshelf.shelf
+    
     try:
       return gimpshelf.shelf[self._get_key()]
     except KeyError:
       return None
     except Exception:
-      raise SourceInvalidFormatError(
-        _("Session-wide settings for this plug-in may be corrupt.\n"
-          "To fix this, save the settings again or reset them."))
+      self._raise_invalid_format_error()
   
-  def write_dict(self, setting_names_and_values):
-    gimpshelf.shelf[self._get_key()] = setting_names_and_values
+  def _write_data(self, data):
+    gimpshelf.shelf[self._get_key()] = data
+  
+  def _get_invalid_format_message(self):
+    return _(
+      "Session-wide settings for this plug-in may be corrupt.\n"
+      "To fix this, save the settings again or reset them.")
+  
+  def _is_cache_valid(self):
+    # Only this plug-in writes to its entry in the shelf, hence the cached
+    # values remain valid as long as the shelf itself is not replaced.
+    return gimpshelf.shelf is self._shelf
   
   def _get_key(self):
     return self.source_name.encode(pgconstants.GIMP_CHARACTER_ENCODING)
@@ -228,8 +349,12 @@ class PersistentSource(Source):
     super().__init__(source_name)
     
     self._parasite_filepath = os.path.join(gimp.directory, "parasiterc")
+    
+    self._parasite_data = None
   
-  def clear(self):
+  def _clear(self):
+    self._parasite_data = None
+    
     if gimp.parasite_find(self.source_name) is None:
       return
     
@@ -238,23 +363,39 @@ class PersistentSource(Source):
   def has_data(self):
     return gimp.parasite_find(self.source_name) is not None
   
-  def read_dict(self):
+  def _read_data(self):
     parasite = gimp.parasite_find(self.source_name)
     if parasite is None:
+      self._parasite_data = None
       return None
     
-    try:
-      settings_from_source = pickle.loads(parasite.data)
-    except Exception:
-      raise SourceInvalidFormatError(
-        _('Settings for this plug-in stored in "{}" may be corrupt. '
-          "This could happen if the file was edited manually.\n"
-          "To fix this, save the settings again or reset them.").format(
-            self._parasite_filepath))
+    self._parasite_data = parasite.data
     
-    return settings_from_source
+    return parasite.data
   
-  def write_dict(self, setting_names_and_values):
-    data = pickle.dumps(setting_names_and_values)
+  def _write_data(self, data):
     gimp.parasite_attach(
       gimp.Parasite(self.source_name, gimpenums.PARASITE_PERSISTENT, data))
+    
+    self._parasite_data = data
+  
+  def _load_legacy_data(self, data):
+    # Older versions stored settings as a single pickled dictionary.
+    return pickle.loads(data)
+  
+  def _get_invalid_format_message(self):
+    return _(
+      'Settings for this plug-in stored in "{}" may be corrupt. '
+      "This could happen if the file was edited manually.\n"
+      "To fix this, save the settings again or reset them.").format(
+        self._parasite_filepath)
+  
+  def _is_cache_valid(self):
+    # The parasite may have been modified outside this source (e.g. by another
+    # instance of the plug-in). Comparing raw data is much cheaper than
+    # decoding the data again.
+    parasite = gimp.parasite_find(self.source_name)
+    if parasite is None:
+      return self._parasite_data is None
+    else:
+      return parasite.data == self._parasite_data
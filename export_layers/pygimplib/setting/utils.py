@@ -28,6 +28,7 @@ import itertools
 __all__ = [
   "SettingParentMixin",
   "SettingEventsMixin",
+  "SettingEventBatch",
   "get_pdb_name",
   "get_setting_name",
   "value_to_str_prefix",
@@ -50,10 +51,18 @@ class SettingParentMixin(object):
   allowing settings and groups to form a tree-like structure.
   """
   
+  # Incremented each time a parent is assigned to a setting or a group. Since
+  # a new parent of a group changes the paths of all settings inside the group,
+  # cached paths are considered invalid if the number changes.
+  _hierarchy_version = 0
+  
   def __init__(self):
     super().__init__()
     
     self._parent = None
+    
+    self._cached_paths = {}
+    self._cached_paths_hierarchy_version = None
   
   @property
   def parent(self):
@@ -68,13 +77,24 @@ class SettingParentMixin(object):
     parents = []
     
     while parent is not None:
-      parents.insert(0, parent)
+      parents.append(parent)
       parent = parent.parent
     
+    parents.reverse()
+    
     return parents
   
   def _set_as_parent_for_setting(self, setting):
     setting._parent = self
+    
+    SettingParentMixin._hierarchy_version += 1
+  
+  def _get_cached_paths(self):
+    if self._cached_paths_hierarchy_version != SettingParentMixin._hierarchy_version:
+      self._cached_paths = {}
+      self._cached_paths_hierarchy_version = SettingParentMixin._hierarchy_version
+    
+    return self._cached_paths
 
 
 class SettingEventsMixin(object):
@@ -96,6 +116,10 @@ class SettingEventsMixin(object):
     # This allows faster lookup of events via IDs.
     # key: event handler ID; value: event type
     self._event_handler_ids_and_types = {}
+    
+    # If not `None`, events of types in `SettingEventBatch.BATCHED_EVENT_TYPES`
+    # are recorded in this object instead of being invoked immediately.
+    self._event_batch = None
   
   def connect_event(
         self, event_type, event_handler, *event_handler_args, **event_handler_kwargs):
@@ -190,7 +214,15 @@ class SettingEventsMixin(object):
     are prepended to the arguments specified in `connect_event` (if any).
     The same keyword arguments in `connect_event` override keyword arguments in
     `**additional_kwargs`.
+    
+    If events are batched (see `SettingEventBatch`), events of the batched types
+    are invoked when the batch ends.
     """
+    if (self._event_batch is not None
+        and event_type in SettingEventBatch.BATCHED_EVENT_TYPES):
+      self._event_batch.add_event(self, event_type, additional_args, additional_kwargs)
+      return
+    
     for (event_handler,
          args,
          kwargs,
@@ -201,6 +233,98 @@ class SettingEventsMixin(object):
         event_handler(self, *event_handler_args, **event_handler_kwargs)
 
 
+class SettingEventBatch(object):
+  """
+  This class records events invoked for settings and invokes them at once when
+  the batch ends.
+  
+  Only events notifying about an already changed value are batched, i.e.
+  events of types in `BATCHED_EVENT_TYPES`. Other events (e.g.
+  `"before-set-value"`) are invoked immediately as they may be required to
+  change the value correctly.
+  
+  When the batch ends, each event handler is invoked only once, even if the
+  setting value changed multiple times. Event handlers connected to multiple
+  settings with the same arguments (e.g. a method updating a preview) are also
+  invoked only once, with the setting that changed last. Updating setting
+  values in the GUI is postponed in the same manner.
+  """
+  
+  BATCHED_EVENT_TYPES = ["value-changed", "after-set-value", "after-reset"]
+  
+  def __init__(self):
+    # key: (setting, event type)
+    # value: (additional arguments, additional keyword arguments)
+    self._events = collections.OrderedDict()
+    self._settings_with_gui_update = collections.OrderedDict()
+  
+  def add_event(self, setting, event_type, additional_args, additional_kwargs):
+    # Move the event to the end so that events are ordered by the last change.
+    self._events.pop((setting, event_type), None)
+    self._events[setting, event_type] = (additional_args, additional_kwargs)
+  
+  def add_gui_update(self, setting):
+    self._settings_with_gui_update[setting] = None
+  
+  @property
+  def changed_settings(self):
+    """
+    List of settings whose values changed during the batch.
+    """
+    changed_settings = collections.OrderedDict()
+    for setting in self._settings_with_gui_update:
+      changed_settings[setting] = None
+    for setting, unused_ in self._events:
+      changed_settings[setting] = None
+    
+    return list(changed_settings)
+  
+  def invoke_events(self):
+    """
+    Update GUI for settings whose values changed and invoke recorded events.
+    """
+    for setting in self._settings_with_gui_update:
+      setting._setting_value_synchronizer.apply_setting_value_to_gui(setting.value)
+    
+    for event_type in self.BATCHED_EVENT_TYPES:
+      event_handlers_to_invoke = collections.OrderedDict()
+      
+      for (setting, recorded_event_type), (additional_args, additional_kwargs) in (
+            self._events.items()):
+        if recorded_event_type != event_type:
+          continue
+        
+        for event_id, (event_handler, args, kwargs, enabled) in (
+              setting._event_handlers[event_type].items()):
+          if not enabled:
+            continue
+          
+          key = self._get_event_handler_key(
+            setting, event_id, event_handler, args, kwargs)
+          # Move the event handler to the end to preserve the order of changes.
+          event_handlers_to_invoke.pop(key, None)
+          event_handlers_to_invoke[key] = (
+            setting, event_handler, additional_args + tuple(args),
+            dict(additional_kwargs, **kwargs))
+      
+      for setting, event_handler, event_handler_args, event_handler_kwargs in (
+            event_handlers_to_invoke.values()):
+        event_handler(setting, *event_handler_args, **event_handler_kwargs)
+    
+    self._events.clear()
+    self._settings_with_gui_update.clear()
+  
+  @staticmethod
+  def _get_event_handler_key(setting, event_id, event_handler, args, kwargs):
+    key = (event_handler, tuple(args), tuple(sorted(kwargs.items())))
+    try:
+      hash(key)
+    except TypeError:
+      return setting, event_id
+    else:
+      return key
+
+
 def get_pdb_name(setting_name):
   """
   Return name suitable for the description of the setting in the GIMP PDB.
@@ -267,28 +391,36 @@ def get_setting_path(setting, relative_path_group=None):
   If `relative_path_group` is equal to `"root"` and the setting has at
   least one parent, omit the topmost group.
   """
-  def _get_setting_path(path_components):
-    return SETTING_PATH_SEPARATOR.join([setting.name for setting in path_components])
-  
   if relative_path_group == "root":
-    if setting.parents:
-      setting_path_without_root = _get_setting_path(
-        (setting.parents + [setting])[1:])
-      return setting_path_without_root
-    else:
-      return setting.name
+    return _get_cached_setting_path(setting, "root")
   else:
-    setting_path = _get_setting_path(setting.parents + [setting])
+    setting_path = _get_cached_setting_path(setting, None)
     
     if relative_path_group is not None:
-      root_path = _get_setting_path(
-        relative_path_group.parents + [relative_path_group])
+      root_path = _get_cached_setting_path(relative_path_group, None)
       if setting_path.startswith(root_path):
         return setting_path[len(root_path + SETTING_PATH_SEPARATOR):]
     
     return setting_path
 
 
+def _get_cached_setting_path(setting, relative_path_group):
+  cached_paths = setting._get_cached_paths()
+  
+  try:
+    return cached_paths[relative_path_group]
+  except KeyError:
+    path_components = setting.parents + [setting]
+    if relative_path_group == "root" and len(path_components) > 1:
+      path_components = path_components[1:]
+    
+    setting_path = SETTING_PATH_SEPARATOR.join(
+      [path_component.name for path_component in path_components])
+    cached_paths[relative_path_group] = setting_path
+    
+    return setting_path
+
+
 def check_setting_name(setting_name):
   """
   Check if the specified setting name is valid. If not, raise `ValueError`.
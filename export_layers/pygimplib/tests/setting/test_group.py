@@ -476,6 +476,32 @@ class TestGroupHierarchical(unittest.TestCase):
       self.settings["advanced/expert/file_extension_strip_mode"],
       self.settings["advanced"]["expert"]["file_extension_strip_mode"])
     
+  def test_get_setting_via_paths_after_adding_and_removing_settings(self):
+    unused_ = self.settings["advanced/only_visible_layers"]
+    
+    expert_settings = group_.Group("expert")
+    self.settings["advanced"].add([expert_settings])
+    expert_settings.add([
+      {
+       "type": settings_.SettingTypes.integer,
+       "name": "file_extension_strip_mode",
+       "default_value": 0
+      }
+    ])
+    
+    self.assertEqual(
+      self.settings["advanced/expert/file_extension_strip_mode"],
+      expert_settings["file_extension_strip_mode"])
+    self.assertEqual(
+      self.settings["advanced"]["expert/file_extension_strip_mode"],
+      expert_settings["file_extension_strip_mode"])
+    
+    self.settings["advanced"].remove(["expert"])
+    
+    self.assertNotIn("advanced/expert/file_extension_strip_mode", self.settings)
+    with self.assertRaises(KeyError):
+      unused_ = self.settings["advanced/expert"]
+  
   def test_get_setting_via_paths_invalid_group(self):
     with self.assertRaises(KeyError):
       unused_ = self.settings["advanced/invalid_group/file_extension_strip_mode"]
@@ -505,6 +531,58 @@ class TestGroupHierarchical(unittest.TestCase):
     self.assertIn(self.settings["advanced/only_visible_layers"], walked_settings)
     self.assertIn(self.settings["advanced/overwrite_mode"], walked_settings)
   
+  def test_walk_nested_walks_over_same_group(self):
+    walked_settings = []
+    
+    for setting in self.settings.walk(include_groups=True):
+      walked_settings.append(
+        (setting, list(self.settings.walk(include_groups=True))))
+    
+    all_settings = list(self.settings.walk(include_groups=True))
+    
+    self.assertEqual(len(walked_settings), 5)
+    for unused_, walked_settings_in_nested_walk in walked_settings:
+      self.assertListEqual(walked_settings_in_nested_walk, all_settings)
+  
+  def test_walk_after_adding_and_removing_settings(self):
+    list(self.settings.walk())
+    
+    self.settings["advanced"].add([
+      {
+       "type": settings_.SettingTypes.integer,
+       "name": "file_extension_strip_mode",
+       "default_value": 0
+      }
+    ])
+    
+    self.assertIn(
+      self.settings["advanced/file_extension_strip_mode"], list(self.settings.walk()))
+    
+    setting = self.settings["advanced/file_extension_strip_mode"]
+    self.settings["advanced"].remove(["file_extension_strip_mode"])
+    
+    self.assertNotIn(setting, list(self.settings.walk()))
+  
+  def test_flatten_with_cache_key(self):
+    def _is_not_advanced(setting):
+      return setting.name != "advanced"
+    
+    flattened_settings = self.settings.flatten(
+      include_setting_func=_is_not_advanced, cache_key="not_advanced")
+    
+    self.assertEqual(flattened_settings, (self.settings["main/file_extension"],))
+    self.assertIs(
+      self.settings.flatten(
+        include_setting_func=_is_not_advanced, cache_key="not_advanced"),
+      flattened_settings)
+    
+    self.settings["main"].remove(["file_extension"])
+    
+    self.assertEqual(
+      self.settings.flatten(
+        include_setting_func=_is_not_advanced, cache_key="not_advanced"),
+      ())
+  
   def test_walk_ignore_settings_with_tag(self):
     self.settings["main/file_extension"].tags.add("ignore_reset")
     self.settings["advanced/overwrite_mode"].tags.update(
@@ -636,8 +714,92 @@ class TestGroupHierarchical(unittest.TestCase):
     return walked_settings, walk_callbacks
 
 
+class TestGroupBatchEvents(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = stubs_group.create_test_settings_hierarchical()
+    self.event_handler = mock.Mock()
+  
+  def test_batch_events_invokes_event_handler_once_at_end(self):
+    self.settings["main/file_extension"].connect_event(
+      "value-changed", self.event_handler)
+    
+    with self.settings.batch_events():
+      self.settings["main/file_extension"].set_value("png")
+      self.settings["main/file_extension"].set_value("jpg")
+      self.settings["main/file_extension"].reset()
+      
+      self.assertEqual(self.event_handler.call_count, 0)
+    
+    self.event_handler.assert_called_once_with(self.settings["main/file_extension"])
+  
+  def test_batch_events_invokes_event_handler_connected_to_multiple_settings_once(
+        self):
+    self.settings["main/file_extension"].connect_event(
+      "value-changed", self.event_handler)
+    self.settings["advanced/only_visible_layers"].connect_event(
+      "value-changed", self.event_handler)
+    
+    with self.settings.batch_events():
+      self.settings["main/file_extension"].set_value("png")
+      self.settings["advanced/only_visible_layers"].set_value(True)
+    
+    self.event_handler.assert_called_once_with(
+      self.settings["advanced/only_visible_layers"])
+  
+  def test_batch_events_does_not_postpone_before_set_value_events(self):
+    self.settings["main/file_extension"].connect_event(
+      "before-set-value", self.event_handler)
+    
+    with self.settings.batch_events():
+      self.settings["main/file_extension"].set_value("png")
+      
+      self.assertEqual(self.event_handler.call_count, 1)
+  
+  def test_batch_events_does_not_affect_settings_outside_group(self):
+    self.settings["main/file_extension"].connect_event(
+      "value-changed", self.event_handler)
+    
+    with self.settings["advanced"].batch_events():
+      self.settings["main/file_extension"].set_value("png")
+      
+      self.assertEqual(self.event_handler.call_count, 1)
+  
+  def test_batch_events_nested(self):
+    self.settings["main/file_extension"].connect_event(
+      "value-changed", self.event_handler)
+    
+    with self.settings.batch_events():
+      with self.settings["main"].batch_events():
+        self.settings["main/file_extension"].set_value("png")
+      
+      self.assertEqual(self.event_handler.call_count, 0)
+    
+    self.assertEqual(self.event_handler.call_count, 1)
+  
+  def test_batch_events_returns_changed_settings(self):
+    with self.settings.batch_events() as event_batch:
+      self.settings["main/file_extension"].set_value("png")
+      
+      self.assertListEqual(
+        event_batch.changed_settings, [self.settings["main/file_extension"]])
+  
+  def test_batch_events_updates_gui_once_at_end(self):
+    setting = stubs_setting.SettingWithGuiStub("file_extension_with_gui", "png")
+    setting.set_gui()
+    self.settings["main"].add([setting])
+    
+    with self.settings.batch_events():
+      setting.set_value("jpg")
+      setting.set_value("gif")
+      
+      self.assertEqual(setting.gui.element.value, "png")
+    
+    self.assertEqual(setting.gui.element.value, "gif")
+
+
 @mock.patch(
-  pgconstants.PYGIMPLIB_MODULE_PATH + ".setting.persistor.Persistor.save",
+  pgconstants.PYGIMPLIB_MODULE_PATH + ".setting.persistor.Persistor.save_multiple",
   return_value=(persistor_.Persistor.SUCCESS, ""))
 @mock.patch(
   pgconstants.PYGIMPLIB_MODULE_PATH + ".setting.persistor.Persistor.load",
@@ -657,7 +819,9 @@ class TestGroupLoadSave(unittest.TestCase):
     
     settings.save()
     self.assertEqual(mock_save.call_count, 1)
-    self.assertEqual([settings["only_visible_layers"]], mock_save.call_args[0][0])
+    self.assertEqual(
+      [[settings["only_visible_layers"]]],
+      [settings_per_call for settings_per_call, unused_ in mock_save.call_args[0][0]])
   
   @parameterized.parameterized.expand([
     ("default_sources",
@@ -691,23 +855,27 @@ class TestGroupLoadSave(unittest.TestCase):
         load_save_call_count,
         setting_names_in_calls,
         expected_setting_sources_in_calls):
-    self._test_load_save(
-      test_case_name_suffix,
-      setting_sources,
-      load_save_call_count,
-      setting_names_in_calls,
-      expected_setting_sources_in_calls,
-      "load",
-      mock_load)
-    
-    self._test_load_save(
-      test_case_name_suffix,
-      setting_sources,
-      load_save_call_count,
-      setting_names_in_calls,
-      expected_setting_sources_in_calls,
-      "save",
-      mock_save)
+    self.settings.load(setting_sources)
+    
+    self.assertEqual(mock_load.call_count, load_save_call_count)
+    
+    for i, (setting_names_per_call, setting_sources_per_call) in (
+          enumerate(zip(setting_names_in_calls, expected_setting_sources_in_calls))):
+      self.assertEqual(
+        mock_load.call_args_list[i][0][0],
+        [self.settings[name] for name in setting_names_per_call])
+      self.assertEqual(
+        mock_load.call_args_list[i][0][1],
+        setting_sources_per_call)
+    
+    self.settings.save(setting_sources)
+    
+    self.assertEqual(mock_save.call_count, 1)
+    self.assertEqual(
+      mock_save.call_args[0][0],
+      [([self.settings[name] for name in setting_names_per_call], setting_sources_per_call)
+       for setting_names_per_call, setting_sources_per_call
+       in zip(setting_names_in_calls, expected_setting_sources_in_calls)])
   
   def test_load_save_return_statuses(self, mock_load, mock_save):
     load_save_calls_return_values = [
@@ -719,7 +887,7 @@ class TestGroupLoadSave(unittest.TestCase):
     status, unused_ = self.settings.load()
     self.assertEqual(status, persistor_.Persistor.SUCCESS)
     
-    mock_save.side_effect = load_save_calls_return_values
+    mock_save.return_value = (persistor_.Persistor.SUCCESS, "")
     status, unused_ = self.settings.save()
     self.assertEqual(status, persistor_.Persistor.SUCCESS)
     
@@ -729,44 +897,15 @@ class TestGroupLoadSave(unittest.TestCase):
     status, unused_ = self.settings.load()
     self.assertEqual(status, persistor_.Persistor.NOT_ALL_SETTINGS_FOUND)
     
-    load_save_calls_return_values[1] = (
-      persistor_.Persistor.NOT_ALL_SETTINGS_FOUND, "")
-    mock_save.side_effect = load_save_calls_return_values
-    status, unused_ = self.settings.save()
-    self.assertEqual(status, persistor_.Persistor.NOT_ALL_SETTINGS_FOUND)
-    
     load_save_calls_return_values[2] = (
       persistor_.Persistor.READ_FAIL, "")
     mock_load.side_effect = load_save_calls_return_values
     status, unused_ = self.settings.load()
     self.assertEqual(status, persistor_.Persistor.READ_FAIL)
     
-    load_save_calls_return_values[2] = persistor_.Persistor.WRITE_FAIL, ""
-    mock_save.side_effect = load_save_calls_return_values
+    mock_save.return_value = (persistor_.Persistor.WRITE_FAIL, "")
     status, unused_ = self.settings.save()
     self.assertEqual(status, persistor_.Persistor.WRITE_FAIL)
-  
-  def _test_load_save(
-        self,
-        test_case_name_suffix,
-        setting_sources,
-        load_save_call_count,
-        setting_names_in_calls,
-        expected_setting_sources_in_calls,
-        load_save_func_name,
-        mock_object):
-    getattr(self.settings, load_save_func_name)(setting_sources)
-    
-    self.assertEqual(mock_object.call_count, load_save_call_count)
-    
-    for i, (setting_names_per_call, setting_sources_per_call) in (
-          enumerate(zip(setting_names_in_calls, expected_setting_sources_in_calls))):
-      self.assertEqual(
-        mock_object.call_args_list[i][0][0],
-        [self.settings[name] for name in setting_names_per_call])
-      self.assertEqual(
-        mock_object.call_args_list[i][0][1],
-        setting_sources_per_call)
 
 
 class TestGroupGui(unittest.TestCase):
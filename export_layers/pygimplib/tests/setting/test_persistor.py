@@ -66,6 +66,30 @@ class TestPersistor(unittest.TestCase):
     self.assertEqual(self.settings["file_extension"].value, "png")
     self.assertEqual(self.settings["only_visible_layers"].value, True)
   
+  def test_save_multiple_writes_each_source_once(
+        self, mock_persistent_source, mock_session_source):
+    settings = stubs_group.create_test_settings_hierarchical()
+    settings["main/file_extension"].set_value("png")
+    settings["advanced/only_visible_layers"].set_value(True)
+    
+    with mock.patch.object(
+           self.session_source, "_write_data",
+           wraps=self.session_source._write_data) as mock_write_data:
+      status, unused_ = persistor_.Persistor.save_multiple([
+        ([settings["main"]], [self.session_source]),
+        ([settings["advanced"]], [self.session_source, self.persistent_source])])
+    
+    self.assertEqual(status, persistor_.Persistor.SUCCESS)
+    self.assertEqual(mock_write_data.call_count, 1)
+    
+    settings["main/file_extension"].set_value("gif")
+    settings["advanced/only_visible_layers"].set_value(False)
+    
+    persistor_.Persistor.load([settings], [self.session_source])
+    
+    self.assertEqual(settings["main/file_extension"].value, "png")
+    self.assertEqual(settings["advanced/only_visible_layers"].value, True)
+  
   def test_load_combine_settings_from_multiple_sources(
         self, mock_persistent_source, mock_session_source):
     self.settings["file_extension"].set_value("png")
@@ -17,6 +17,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import collections
+import pickle
 import unittest
 
 import mock
@@ -25,6 +27,7 @@ from ... import constants as pgconstants
 
 from ...setting import settings as settings_
 from ...setting import sources as sources_
+from ...setting import _sources_records
 
 from .. import stubs_gimp
 from . import stubs_group
@@ -50,11 +53,11 @@ class TestSessionSource(unittest.TestCase):
     self.source.write(self.settings)
     
     self.assertEqual(
-      sources_.gimpshelf.shelf[self.source_name][
+      self.source.read_dict()[
         self.settings["file_extension"].get_path("root")],
       "png")
     self.assertEqual(
-      sources_.gimpshelf.shelf[self.source_name][
+      self.source.read_dict()[
         self.settings["only_visible_layers"].get_path("root")],
       True)
   
@@ -70,6 +73,49 @@ class TestSessionSource(unittest.TestCase):
     self.assertEqual(self.settings["file_extension"].value, "jpg")
     self.assertEqual(self.settings["only_visible_layers"].value, True)
   
+  def test_write_stores_data_as_setting_records(self, mock_session_source):
+    self.source.write(self.settings)
+    
+    self.assertTrue(
+      _sources_records.SettingRecords.is_encoded(
+        sources_.gimpshelf.shelf[self.source_name]))
+  
+  def test_write_unchanged_settings_does_not_write_to_source(
+        self, mock_session_source):
+    self.settings["file_extension"].set_value("png")
+    self.source.write(self.settings)
+    
+    with mock.patch.object(self.source, "_write_data") as mock_write_data:
+      self.source.write(self.settings)
+      self.assertEqual(mock_write_data.call_count, 0)
+      
+      self.settings["file_extension"].set_value("jpg")
+      self.source.write(self.settings)
+      self.assertEqual(mock_write_data.call_count, 1)
+  
+  def test_write_setting_value_modified_in_place(self, mock_session_source):
+    setting = settings_.Setting("dict", default_value={})
+    setting.value["key"] = "value"
+    self.source.write([setting])
+    
+    setting.value["key"] = "new value"
+    self.source.write([setting])
+    
+    self.assertEqual(
+      self.source.read_dict()[setting.get_path("root")],
+      {"key": "new value"})
+  
+  def test_write_with_flush_disabled(self, mock_session_source):
+    self.settings["file_extension"].set_value("png")
+    self.source.write([self.settings["file_extension"]], flush=False)
+    self.assertFalse(self.source.has_data())
+    
+    self.source.flush()
+    self.assertEqual(
+      self.source.read_dict()[
+        self.settings["file_extension"].get_path("root")],
+      "png")
+  
   def test_read(self, mock_session_source):
     data = {}
     data[self.settings["file_extension"].get_path("root")] = "png"
@@ -82,6 +128,28 @@ class TestSessionSource(unittest.TestCase):
     self.assertEqual(self.settings["file_extension"].value, "png")
     self.assertEqual(self.settings["only_visible_layers"].value, True)
   
+  def test_read_multiple_times_reads_source_only_once(self, mock_session_source):
+    self.source.write(self.settings)
+    
+    with mock.patch.object(
+           self.source, "_read_data", wraps=self.source._read_data) as mock_read_data:
+      self.source.read(self.settings)
+      self.source.read(self.settings)
+      self.assertEqual(mock_read_data.call_count, 0)
+  
+  def test_read_setting_value_is_not_shared_with_source(self, mock_session_source):
+    setting = settings_.Setting("dict", default_value={})
+    setting.value["key"] = "value"
+    self.source.write([setting])
+    self.source.read([setting])
+    
+    setting.value["key"] = "new value"
+    self.source.write([setting])
+    
+    self.assertEqual(
+      self.source.read_dict()[setting.get_path("root")],
+      {"key": "new value"})
+  
   def test_read_settings_not_found(self, mock_session_source):
     self.source.write([self.settings["file_extension"]])
     with self.assertRaises(sources_.SettingsNotFoundInSourceError):
@@ -187,6 +255,75 @@ class TestPersistentSource(unittest.TestCase):
     with self.assertRaises(sources_.SourceInvalidFormatError):
       self.source.read(self.settings)
   
+  def test_read_data_in_legacy_format(self, mock_persistent_source):
+    data = collections.OrderedDict([
+      (self.settings["file_extension"].get_path("root"), "jpg"),
+      (self.settings["only_visible_layers"].get_path("root"), True)])
+    sources_.gimp.parasite_attach(
+      sources_.gimp.Parasite(self.source_name, 0, pickle.dumps(data)))
+    
+    self.source.read(
+      [self.settings["file_extension"], self.settings["only_visible_layers"]])
+    
+    self.assertEqual(self.settings["file_extension"].value, "jpg")
+    self.assertEqual(self.settings["only_visible_layers"].value, True)
+  
+  def test_write_converts_data_in_legacy_format(self, mock_persistent_source):
+    data = collections.OrderedDict([
+      (self.settings["only_visible_layers"].get_path("root"), True)])
+    sources_.gimp.parasite_attach(
+      sources_.gimp.Parasite(self.source_name, 0, pickle.dumps(data)))
+    
+    self.settings["file_extension"].set_value("jpg")
+    self.source.write([self.settings["file_extension"]])
+    
+    self.assertTrue(
+      _sources_records.SettingRecords.is_encoded(
+        sources_.gimp.parasite_find(self.source_name).data))
+    self.assertDictEqual(
+      self.source.read_dict(),
+      {
+        self.settings["only_visible_layers"].get_path("root"): True,
+        self.settings["file_extension"].get_path("root"): "jpg",
+      })
+  
+  def test_read_decodes_only_records_of_read_settings(self, mock_persistent_source):
+    settings = stubs_group.create_test_settings_hierarchical()
+    self.source.write(settings.walk())
+    
+    with mock.patch(
+           pgconstants.PYGIMPLIB_MODULE_PATH
+           + ".setting.sources.gimp.directory",
+           new="gimp_directory",
+           create=True):
+      another_source = sources_.PersistentSource(self.source_name)
+    
+    with mock.patch(
+           pgconstants.PYGIMPLIB_MODULE_PATH + ".setting._sources_records.pickle.loads",
+           wraps=_sources_records.pickle.loads) as mock_pickle_loads:
+      another_source.read([settings["main/file_extension"]])
+      self.assertEqual(mock_pickle_loads.call_count, 1)
+  
+  def test_read_after_source_modified_by_another_instance(
+        self, mock_persistent_source):
+    self.settings["file_extension"].set_value("png")
+    self.source.write([self.settings["file_extension"]])
+    self.source.read([self.settings["file_extension"]])
+    
+    with mock.patch(
+           pgconstants.PYGIMPLIB_MODULE_PATH + ".setting.sources.gimp.directory",
+           new="gimp_directory",
+           create=True):
+      another_source = sources_.PersistentSource(self.source_name)
+    
+    self.settings["file_extension"].set_value("jpg")
+    another_source.write([self.settings["file_extension"]])
+    self.settings["file_extension"].set_value("gif")
+    
+    self.source.read([self.settings["file_extension"]])
+    
+    self.assertEqual(self.settings["file_extension"].value, "jpg")
+  
   def test_read_invalid_setting_value_set_to_default_value(self, mock_persistent_source):
     setting_with_invalid_value = settings_.IntSetting("int", default_value=-1)
     self.source.write([setting_with_invalid_value])
@@ -276,3 +413,74 @@ class TestSourceReadWriteDict(unittest.TestCase):
     self.assertEqual(
       self.settings["only_visible_layers"].value,
       self.settings["only_visible_layers"].default_value)
+
+
+class TestSettingRecords(unittest.TestCase):
+  
+  def setUp(self):
+    self.setting_records = _sources_records.SettingRecords.from_dict(
+      collections.OrderedDict([
+        ("main/file_extension", "png"),
+        ("main/overwrite_mode", "skip"),
+        ("advanced/only_visible_layers", True),
+      ]))
+  
+  def test_encode_decode(self):
+    setting_records = _sources_records.SettingRecords.decode(
+      self.setting_records.encode())
+    
+    self.assertEqual(setting_records["main/file_extension"], "png")
+    self.assertEqual(setting_records["advanced/only_visible_layers"], True)
+    self.assertListEqual(
+      list(setting_records.to_dict().items()),
+      list(self.setting_records.to_dict().items()))
+  
+  def test_encode_does_not_encode_unmodified_records_again(self):
+    setting_records = _sources_records.SettingRecords.decode(
+      self.setting_records.encode())
+    setting_records["main/file_extension"] = "jpg"
+    
+    with mock.patch(
+           pgconstants.PYGIMPLIB_MODULE_PATH + ".setting._sources_records.pickle.dumps",
+           wraps=_sources_records.pickle.dumps) as mock_pickle_dumps:
+      data = setting_records.encode()
+      self.assertEqual(mock_pickle_dumps.call_count, 1)
+    
+    self.assertEqual(
+      _sources_records.SettingRecords.decode(data)["main/file_extension"], "jpg")
+  
+  def test_delete_last_setting_in_record_removes_record(self):
+    del self.setting_records["advanced/only_visible_layers"]
+    
+    self.assertNotIn("advanced/only_visible_layers", self.setting_records)
+    self.assertEqual(len(self.setting_records), 2)
+    self.assertEqual(
+      len(_sources_records.SettingRecords.decode(self.setting_records.encode())), 2)
+  
+  def test_decode_truncated_data(self):
+    with self.assertRaises(_sources_records.SettingRecordsFormatError):
+      _sources_records.SettingRecords.decode(self.setting_records.encode()[:-1])
+  
+  def test_decode_newer_format_version(self):
+    data = self.setting_records.encode()
+    magic_length = len(_sources_records._MAGIC)
+    data = (
+      data[:magic_length]
+      + _sources_records._HEADER.pack(_sources_records.FORMAT_VERSION + 1, 2)
+      + data[magic_length + _sources_records._HEADER.size:])
+    
+    with self.assertRaises(_sources_records.SettingRecordsFormatError):
+      _sources_records.SettingRecords.decode(data)
+  
+  def test_corrupt_record_is_detected_on_access(self):
+    data = self.setting_records.encode()
+    # Replace the first byte of the pickled data of the last record.
+    record_data_length = len(self.setting_records._get_encoded_record("advanced"))
+    data = (
+      data[:-record_data_length] + b"\xff" + data[-record_data_length + 1:])
+    
+    setting_records = _sources_records.SettingRecords.decode(data)
+    
+    self.assertEqual(setting_records["main/file_extension"], "png")
+    with self.assertRaises(_sources_records.SettingRecordsFormatError):
+      setting_records["advanced/only_visible_layers"]
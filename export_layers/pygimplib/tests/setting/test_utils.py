@@ -298,6 +298,20 @@ class TestSettingPath(unittest.TestCase):
     self.assertEqual(
       utils_.get_setting_path(self.main_settings, "root"), "main")
   
+  def test_get_path_after_adding_group_to_another_group(self):
+    self.assertEqual(
+      utils_.get_setting_path(self.setting), "main/advanced/file_extension")
+    self.assertEqual(
+      utils_.get_setting_path(self.setting, "root"), "advanced/file_extension")
+    
+    all_settings = group_.Group("all")
+    all_settings.add([self.main_settings])
+    
+    self.assertEqual(
+      utils_.get_setting_path(self.setting), "all/main/advanced/file_extension")
+    self.assertEqual(
+      utils_.get_setting_path(self.setting, "root"), "main/advanced/file_extension")
+  
   def _test_get_path_with_relative_path(
         self, setting, relative_path_group, expected_path):
     self.assertEqual(
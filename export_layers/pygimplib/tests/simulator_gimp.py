@@ -0,0 +1,1069 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides an in-memory simulator of a subset of GIMP (modeled after
+GIMP 2.8) that can be used to test and benchmark image processing code (e.g.
+exporting layers) without GIMP running.
+
+Unlike `stubs_gimp`, images and layers hold actual pixel data as NumPy arrays
+and the simulated PDB procedures manipulate the pixel data. Only 8-bit RGBA
+pixels (non-premultiplied alpha) and the normal layer mode are supported. PDB
+procedures not defined in `PdbSimulator` raise `AttributeError`.
+
+Use `simulate_gimp()` to replace the `gimp` module and the `pdb` object in
+modules under test with the simulator.
+
+NumPy is required to use the simulator. If NumPy is not installed, `np` is
+`None` and tests relying on the simulator should be skipped.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import contextlib
+import importlib
+import inspect
+import io
+import itertools
+import os
+import struct
+import zlib
+
+import mock
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+import gimpenums
+
+from .. import constants as pgconstants
+from . import stubs_gimp
+
+
+class ImageSimulator(stubs_gimp.ParasiteFunctionsStubMixin):
+  
+  _image_id_counter = itertools.count(start=1)
+  
+  def __init__(self, width, height, base_type=gimpenums.RGB):
+    super().__init__()
+    
+    self.ID = next(self._image_id_counter)
+    self.width = width
+    self.height = height
+    self.base_type = base_type
+    self.layers = []
+    self.channels = []
+    self.vectors = []
+    self.active_layer = None
+    self.name = b""
+    self.filename = b""
+    self.uri = b""
+    self.resolution = (72.0, 72.0)
+    self.unit = 0
+    self.colormap = b""
+    self.valid = True
+
+
+class LayerSimulator(stubs_gimp.ParasiteFunctionsStubMixin):
+  """
+  This class simulates a GIMP layer. Pixels are stored in the `pixels`
+  attribute as a NumPy array of shape `(height, width, 4)` and type `uint8`.
+  """
+  
+  _item_id_counter = itertools.count(start=1)
+  
+  def __init__(
+        self,
+        image,
+        name,
+        width,
+        height,
+        type_=gimpenums.RGBA_IMAGE,
+        opacity=100.0,
+        mode=gimpenums.NORMAL_MODE):
+    super().__init__()
+    
+    self.ID = next(self._item_id_counter)
+    self.name = _encode_name(name)
+    self.image = image
+    self.parent = None
+    self.children = []
+    self.valid = True
+    self.visible = True
+    self.opacity = opacity
+    self.mode = mode
+    self.mask = None
+    self.apply_mask = False
+    self.has_alpha = type_ not in (
+      gimpenums.RGB_IMAGE, gimpenums.GRAY_IMAGE, gimpenums.INDEXED_IMAGE)
+    
+    self._offsets = (0, 0)
+    
+    self._pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    if not self.has_alpha:
+      self._pixels[..., 3] = 255
+  
+  @property
+  def pixels(self):
+    return self._pixels
+  
+  @pixels.setter
+  def pixels(self, pixels):
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    if pixels.ndim != 3 or pixels.shape[2] != 4:
+      raise ValueError(
+        "pixels must have shape (height, width, 4), got {}".format(pixels.shape))
+    
+    self._pixels = pixels
+  
+  @property
+  def width(self):
+    return self.pixels.shape[1]
+  
+  @property
+  def height(self):
+    return self.pixels.shape[0]
+  
+  @property
+  def offsets(self):
+    return self._offsets
+  
+  def set_offsets(self, offset_x, offset_y):
+    self.translate(offset_x - self.offsets[0], offset_y - self.offsets[1])
+  
+  def translate(self, offset_x, offset_y):
+    self._offsets = (self._offsets[0] + offset_x, self._offsets[1] + offset_y)
+  
+  @property
+  def bpp(self):
+    return 4 if self.has_alpha else 3
+  
+  @property
+  def is_indexed(self):
+    return False
+  
+  @property
+  def type(self):
+    return gimpenums.RGBA_IMAGE if self.has_alpha else gimpenums.RGB_IMAGE
+  
+  def get_pixel_rgn(self, x, y, width, height, dirty=True, shadow=False):
+    return PixelRegionSimulator(self, x, y, width, height)
+  
+  def flush(self):
+    pass
+  
+  def copy(self, image=None):
+    """
+    Return a copy of the layer not inserted in any image. If `image` is `None`,
+    the copy refers to the image of this layer.
+    """
+    layer_copy = LayerSimulator(
+      image if image is not None else self.image, self.name, 0, 0,
+      opacity=self.opacity, mode=self.mode)
+    
+    self._copy_attributes(layer_copy)
+    layer_copy._pixels = self._pixels.copy()
+    
+    return layer_copy
+  
+  def _copy_attributes(self, layer_copy):
+    layer_copy.visible = self.visible
+    layer_copy.has_alpha = self.has_alpha
+    layer_copy.apply_mask = self.apply_mask
+    layer_copy._offsets = self._offsets
+    layer_copy._parasites = dict(self._parasites)
+    
+    if self.mask is not None:
+      layer_copy.mask = self.mask.copy(layer_copy)
+
+
+class PixelRegionSimulator(object):
+  """
+  This class simulates a GIMP pixel region. Slicing the region returns pixels
+  as a string of bytes, e.g. `region[0:width, 0:height]`, and assigning to a
+  slice sets pixels. Layers without alpha channel yield and accept RGB pixels.
+  """
+  
+  def __init__(self, drawable, x, y, width, height):
+    self.drawable = drawable
+    self.x = x
+    self.y = y
+    self.w = width
+    self.h = height
+  
+  def __getitem__(self, key):
+    x_slice, y_slice = key
+    pixels = self.drawable.pixels[y_slice, x_slice, :self.drawable.bpp]
+    return np.ascontiguousarray(pixels).tobytes()
+  
+  def __setitem__(self, key, data):
+    x_slice, y_slice = key
+    pixels = self.drawable.pixels[y_slice, x_slice, :self.drawable.bpp]
+    pixels[...] = np.frombuffer(data, dtype=np.uint8).reshape(pixels.shape)
+
+
+class LayerGroupSimulator(LayerSimulator):
+  """
+  This class simulates a GIMP layer group. The size, offsets and pixels
+  (projection) of the group are computed from its child layers.
+  """
+  
+  def __init__(self, image, name=None, opacity=100.0, mode=gimpenums.NORMAL_MODE):
+    super().__init__(image, name, 1, 1, opacity=opacity, mode=mode)
+  
+  @property
+  def layers(self):
+    return self.children
+  
+  @layers.setter
+  def layers(self, layers):
+    self.children = layers
+  
+  @property
+  def pixels(self):
+    return _composite_layers(self.children, _get_bounds(self))
+  
+  @pixels.setter
+  def pixels(self, pixels):
+    raise AttributeError("pixels of a layer group cannot be set")
+  
+  @property
+  def width(self):
+    x1, unused_, x2, unused_ = _get_bounds(self)
+    return x2 - x1
+  
+  @property
+  def height(self):
+    unused_, y1, unused_, y2 = _get_bounds(self)
+    return y2 - y1
+  
+  @property
+  def offsets(self):
+    return _get_bounds(self)[:2]
+  
+  def translate(self, offset_x, offset_y):
+    super().translate(offset_x, offset_y)
+    
+    for child in self.children:
+      child.translate(offset_x, offset_y)
+  
+  def copy(self, image=None):
+    layer_group_copy = LayerGroupSimulator(
+      image if image is not None else self.image, self.name,
+      opacity=self.opacity, mode=self.mode)
+    
+    self._copy_attributes(layer_group_copy)
+    
+    for child in self.children:
+      child_copy = child.copy(layer_group_copy.image)
+      child_copy.parent = layer_group_copy
+      layer_group_copy.children.append(child_copy)
+    
+    return layer_group_copy
+
+
+class LayerMaskSimulator(object):
+  """
+  This class simulates a GIMP layer mask. Pixels are stored in the `pixels`
+  attribute as a NumPy array of shape `(height, width)` and type `uint8`.
+  """
+  
+  def __init__(self, layer, pixels):
+    self.layer = layer
+    self.pixels = pixels
+  
+  @property
+  def width(self):
+    return self.pixels.shape[1]
+  
+  @property
+  def height(self):
+    return self.pixels.shape[0]
+  
+  def copy(self, layer):
+    return LayerMaskSimulator(layer, self.pixels.copy())
+
+
+class PdbSimulator(object):
+  """
+  This class simulates PDB procedures operating on `ImageSimulator` and
+  `LayerSimulator` instances.
+  
+  `gimp_file_save()` can only save images in the PNG format. The list of saved
+  file paths (by `gimp_file_save()` or `file_png_save2()`) is stored in the
+  `saved_filepaths` attribute.
+  """
+  
+  def __init__(self):
+    self.saved_filepaths = []
+  
+  def __getitem__(self, procedure_name):
+    try:
+      return _PdbProcedureSimulator(
+        procedure_name, getattr(self, procedure_name.replace("-", "_")))
+    except AttributeError:
+      raise KeyError(procedure_name)
+  
+  def gimp_procedural_db_proc_exists(self, procedure_name):
+    return hasattr(self, procedure_name.replace("-", "_"))
+  
+  def gimp_context_push(self):
+    pass
+  
+  def gimp_context_pop(self):
+    pass
+  
+  def gimp_image_undo_freeze(self, image):
+    return True
+  
+  def gimp_image_undo_thaw(self, image):
+    return True
+  
+  def gimp_image_undo_group_start(self, image):
+    pass
+  
+  def gimp_image_undo_group_end(self, image):
+    pass
+  
+  def gimp_image_new(self, width, height, type_):
+    return ImageSimulator(width, height, type_)
+  
+  def gimp_image_duplicate(self, image):
+    image_copy = ImageSimulator(image.width, image.height, image.base_type)
+    image_copy.resolution = image.resolution
+    image_copy.unit = image.unit
+    image_copy.colormap = image.colormap
+    image_copy._parasites = dict(image._parasites)
+    
+    for layer in image.layers:
+      self.gimp_image_insert_layer(
+        image_copy, layer.copy(image_copy), None, len(image_copy.layers))
+    
+    return image_copy
+  
+  def gimp_image_delete(self, image):
+    for layer in image.layers:
+      _invalidate(layer)
+    
+    image.layers = []
+    image.valid = False
+  
+  def gimp_image_is_valid(self, image):
+    return image is not None and image.valid
+  
+  def gimp_image_get_resolution(self, image):
+    return image.resolution
+  
+  def gimp_image_set_resolution(self, image, x_resolution, y_resolution):
+    image.resolution = (x_resolution, y_resolution)
+  
+  def gimp_image_get_unit(self, image):
+    return image.unit
+  
+  def gimp_image_set_unit(self, image, unit):
+    image.unit = unit
+  
+  def gimp_image_get_colormap(self, image):
+    return len(image.colormap), image.colormap
+  
+  def gimp_image_set_colormap(self, image, num_bytes, colormap):
+    image.colormap = colormap
+  
+  def gimp_image_get_parasite_list(self, image):
+    parasite_names = image.parasite_list()
+    return len(parasite_names), parasite_names
+  
+  def gimp_image_parasite_attach(self, image, parasite):
+    image.parasite_attach(parasite)
+  
+  def gimp_item_is_group(self, item):
+    return isinstance(item, LayerGroupSimulator)
+  
+  def gimp_item_get_visible(self, item):
+    return item.visible
+  
+  def gimp_item_set_visible(self, item, visible):
+    item.visible = bool(visible)
+  
+  def gimp_item_delete(self, item):
+    if item in _get_container(item.image, item.parent):
+      raise RuntimeError("cannot delete item attached to an image")
+    
+    _invalidate(item)
+  
+  def gimp_layer_new(self, image, width, height, type_, name, opacity, mode):
+    return LayerSimulator(image, name, width, height, type_, opacity, mode)
+  
+  def gimp_layer_group_new(self, image):
+    return LayerGroupSimulator(image)
+  
+  def gimp_layer_new_from_drawable(self, drawable, dest_image):
+    return drawable.copy(dest_image)
+  
+  def gimp_layer_new_from_visible(self, image, dest_image, name):
+    layer = LayerSimulator(dest_image, name, 0, 0)
+    layer.pixels = _composite_layers(image.layers, (0, 0, image.width, image.height))
+    
+    return layer
+  
+  def gimp_layer_copy(self, layer, add_alpha):
+    layer_copy = layer.copy()
+    if add_alpha:
+      layer_copy.has_alpha = True
+    
+    return layer_copy
+  
+  def gimp_layer_set_offsets(self, layer, offset_x, offset_y):
+    layer.set_offsets(offset_x, offset_y)
+  
+  def gimp_image_insert_layer(self, image, layer, parent, position):
+    container = _get_container(image, parent)
+    
+    if position == -1:
+      if image.active_layer in container:
+        position = container.index(image.active_layer)
+      else:
+        position = 0
+    
+    container.insert(min(max(position, 0), len(container)), layer)
+    
+    _set_image(layer, image)
+    layer.parent = parent
+    image.active_layer = layer
+  
+  def gimp_image_remove_layer(self, image, layer):
+    _get_container(image, layer.parent).remove(layer)
+    _invalidate(layer)
+    
+    if image.active_layer is layer:
+      image.active_layer = image.layers[0] if image.layers else None
+  
+  def gimp_image_get_item_position(self, image, item):
+    return _get_container(image, item.parent).index(item)
+  
+  def gimp_image_reorder_item(self, image, item, parent, position):
+    _get_container(image, item.parent).remove(item)
+    
+    container = _get_container(image, parent)
+    container.insert(min(max(position, 0), len(container)), item)
+    item.parent = parent
+  
+  def gimp_image_merge_visible_layers(self, image, merge_type):
+    visible_layers = [layer for layer in image.layers if layer.visible]
+    
+    if not visible_layers:
+      raise RuntimeError("there are no visible layers to merge")
+    
+    if len(visible_layers) == 1 and not self.gimp_item_is_group(visible_layers[0]):
+      return visible_layers[0]
+    
+    if merge_type == gimpenums.EXPAND_AS_NECESSARY:
+      bounds = _get_union_bounds(visible_layers)
+    elif merge_type == gimpenums.CLIP_TO_IMAGE:
+      bounds = (0, 0, image.width, image.height)
+    elif merge_type == gimpenums.CLIP_TO_BOTTOM_LAYER:
+      bounds = _get_bounds(visible_layers[-1])
+    else:
+      raise NotImplementedError("merge type {} is not supported".format(merge_type))
+    
+    return self._merge_layers(image, visible_layers, bounds)
+  
+  def gimp_image_merge_down(self, image, merge_layer, merge_type):
+    container = _get_container(image, merge_layer.parent)
+    
+    layers_below = [
+      layer for layer in container[container.index(merge_layer) + 1:] if layer.visible]
+    if not layers_below:
+      raise RuntimeError("there is no visible layer to merge down to")
+    
+    layers_to_merge = [merge_layer, layers_below[0]]
+    
+    if merge_type == gimpenums.EXPAND_AS_NECESSARY:
+      bounds = _get_union_bounds(layers_to_merge)
+    elif merge_type == gimpenums.CLIP_TO_IMAGE:
+      bounds = (0, 0, image.width, image.height)
+    elif merge_type == gimpenums.CLIP_TO_BOTTOM_LAYER:
+      bounds = _get_bounds(layers_to_merge[-1])
+    else:
+      raise NotImplementedError("merge type {} is not supported".format(merge_type))
+    
+    return self._merge_layers(image, layers_to_merge, bounds)
+  
+  def gimp_image_resize(self, image, new_width, new_height, offset_x, offset_y):
+    image.width = new_width
+    image.height = new_height
+    
+    for layer in image.layers:
+      layer.translate(offset_x, offset_y)
+  
+  def gimp_image_resize_to_layers(self, image):
+    if not image.layers:
+      return
+    
+    x1, y1, x2, y2 = _get_union_bounds(image.layers)
+    self.gimp_image_resize(image, x2 - x1, y2 - y1, -x1, -y1)
+  
+  def gimp_image_scale(self, image, new_width, new_height):
+    """
+    Scale the image and all its layers. Pixels are resampled using the
+    nearest-neighbor interpolation regardless of the interpolation set in the
+    context.
+    """
+    scale_x = new_width / image.width
+    scale_y = new_height / image.height
+    
+    for layer in _walk_layers(image.layers):
+      if self.gimp_item_is_group(layer):
+        continue
+      
+      x1, y1, x2, y2 = _get_bounds(layer)
+      new_x1, new_y1 = int(round(x1 * scale_x)), int(round(y1 * scale_y))
+      new_size = (
+        max(int(round(x2 * scale_x)) - new_x1, 1),
+        max(int(round(y2 * scale_y)) - new_y1, 1))
+      
+      layer.pixels = _scale_pixels(layer.pixels, new_size)
+      if layer.mask is not None:
+        layer.mask.pixels = _scale_pixels(layer.mask.pixels, new_size)
+      
+      layer.set_offsets(new_x1, new_y1)
+    
+    image.width = new_width
+    image.height = new_height
+  
+  def gimp_layer_resize_to_image_size(self, layer):
+    if self.gimp_item_is_group(layer):
+      raise RuntimeError("cannot resize a layer group")
+    
+    layer.pixels = _crop_pixels(
+      layer.pixels, layer.offsets, (0, 0, layer.image.width, layer.image.height))
+    
+    if layer.mask is not None:
+      layer.mask.pixels = _crop_pixels(
+        layer.mask.pixels, layer.offsets, (0, 0, layer.image.width, layer.image.height))
+    
+    layer.set_offsets(0, 0)
+  
+  def gimp_layer_resize(self, layer, new_width, new_height, offset_x, offset_y):
+    if self.gimp_item_is_group(layer):
+      raise RuntimeError("cannot resize a layer group")
+    
+    new_offset_x = layer.offsets[0] - offset_x
+    new_offset_y = layer.offsets[1] - offset_y
+    bounds = (
+      new_offset_x, new_offset_y, new_offset_x + new_width, new_offset_y + new_height)
+    
+    layer.pixels = _crop_pixels(layer.pixels, layer.offsets, bounds)
+    if layer.mask is not None:
+      layer.mask.pixels = _crop_pixels(layer.mask.pixels, layer.offsets, bounds)
+    
+    layer.set_offsets(new_offset_x, new_offset_y)
+  
+  def plug_in_autocrop_layer(self, image, drawable, run_mode=None):
+    pixels = drawable.pixels
+    
+    if pixels[0, 0, 3] == 0:
+      content = pixels[..., 3] != 0
+    else:
+      content = np.any(pixels != pixels[0, 0], axis=2)
+    
+    rows = np.flatnonzero(np.any(content, axis=1))
+    columns = np.flatnonzero(np.any(content, axis=0))
+    
+    if not rows.size:
+      return
+    
+    offset_x, offset_y = drawable.offsets
+    bounds = (
+      offset_x + columns[0], offset_y + rows[0],
+      offset_x + columns[-1] + 1, offset_y + rows[-1] + 1)
+    
+    drawable.pixels = _crop_pixels(drawable.pixels, drawable.offsets, bounds)
+    if drawable.mask is not None:
+      drawable.mask.pixels = _crop_pixels(drawable.mask.pixels, drawable.offsets, bounds)
+    
+    drawable.set_offsets(bounds[0], bounds[1])
+  
+  def gimp_layer_create_mask(self, layer, mask_type):
+    if mask_type == gimpenums.ADD_WHITE_MASK:
+      mask_pixels = np.full((layer.height, layer.width), 255, dtype=np.uint8)
+    elif mask_type == gimpenums.ADD_BLACK_MASK:
+      mask_pixels = np.zeros((layer.height, layer.width), dtype=np.uint8)
+    elif mask_type == gimpenums.ADD_ALPHA_MASK:
+      mask_pixels = layer.pixels[..., 3].copy()
+    else:
+      raise NotImplementedError("mask type {} is not supported".format(mask_type))
+    
+    return LayerMaskSimulator(None, mask_pixels)
+  
+  def gimp_layer_add_mask(self, layer, mask):
+    if layer.mask is not None:
+      raise RuntimeError("layer already has a mask")
+    
+    mask.layer = layer
+    layer.mask = mask
+    layer.apply_mask = True
+  
+  def gimp_layer_remove_mask(self, layer, mode):
+    if mode == gimpenums.MASK_APPLY and layer.apply_mask:
+      pixels = layer.pixels.copy()
+      pixels[..., 3] = _to_uint8(
+        _to_float(pixels[..., 3]) * _to_float(layer.mask.pixels))
+      layer.pixels = pixels
+    
+    layer.mask = None
+    layer.apply_mask = False
+  
+  def gimp_layer_get_apply_mask(self, layer):
+    return layer.apply_mask
+  
+  def gimp_layer_set_apply_mask(self, layer, apply_mask):
+    layer.apply_mask = bool(apply_mask)
+  
+  def gimp_drawable_has_alpha(self, drawable):
+    return drawable.has_alpha
+  
+  def gimp_layer_flatten(self, layer):
+    pixels = _to_float(layer.pixels)
+    alpha = pixels[..., 3:]
+    pixels[..., :3] = pixels[..., :3] * alpha + (1.0 - alpha)
+    pixels[..., 3] = 1.0
+    
+    layer.pixels = _to_uint8(pixels)
+    layer.has_alpha = False
+  
+  def gimp_drawable_fill(self, drawable, fill_type):
+    if fill_type in (gimpenums.WHITE_FILL, gimpenums.BACKGROUND_FILL):
+      drawable.pixels[...] = 255
+    elif fill_type == gimpenums.FOREGROUND_FILL:
+      drawable.pixels[..., :3] = 0
+      drawable.pixels[..., 3] = 255
+    elif fill_type == gimpenums.TRANSPARENT_FILL:
+      drawable.pixels[...] = 0
+      if not drawable.has_alpha:
+        drawable.pixels[...] = 255
+    else:
+      raise NotImplementedError("fill type {} is not supported".format(fill_type))
+  
+  def gimp_file_save(self, image, drawable, filepath, raw_filepath, run_mode=None):
+    if os.path.splitext(filepath)[1].lower() != b".png":
+      raise RuntimeError(
+        "the simulator cannot save files in the format of '{}'".format(
+          filepath.decode(pgconstants.GIMP_CHARACTER_ENCODING)))
+    
+    self._save_png(drawable, filepath)
+  
+  def file_png_save2(
+        self, image, drawable, filepath, raw_filepath, interlace, compression, bkgd,
+        gama, offs, phys, time, comment, svtrans, run_mode=None):
+    self._save_png(drawable, filepath, compression)
+  
+  def gimp_file_load(self, filepath, raw_filepath, run_mode=None):
+    try:
+      pixels = read_png(filepath)
+    except (IOError, OSError, ValueError) as e:
+      raise RuntimeError(str(e))
+    
+    image = ImageSimulator(pixels.shape[1], pixels.shape[0])
+    image.filename = filepath
+    
+    layer = LayerSimulator(image, os.path.basename(filepath), 0, 0)
+    layer.pixels = pixels
+    self.gimp_image_insert_layer(image, layer, None, 0)
+    
+    return image
+  
+  def _save_png(self, drawable, filepath, compression=9):
+    try:
+      write_png(filepath, drawable.pixels, compression)
+    except (IOError, OSError) as e:
+      raise RuntimeError(str(e))
+    
+    self.saved_filepaths.append(filepath)
+  
+  def _merge_layers(self, image, layers, bounds):
+    bottom_layer = layers[-1]
+    
+    merged_layer = LayerSimulator(image, bottom_layer.name, 0, 0)
+    merged_layer.pixels = _composite_layers(layers, bounds)
+    merged_layer.set_offsets(bounds[0], bounds[1])
+    
+    container = _get_container(image, bottom_layer.parent)
+    position = container.index(bottom_layer)
+    
+    for layer in layers:
+      _invalidate(layer)
+    
+    container[position] = merged_layer
+    merged_layer.parent = bottom_layer.parent
+    
+    for layer in layers[:-1]:
+      container.remove(layer)
+    
+    image.active_layer = merged_layer
+    
+    return merged_layer
+
+
+class _PdbProcedureSimulator(object):
+  
+  def __init__(self, name, function):
+    self.proc_name = name
+    self._function = function
+  
+  def __call__(self, *args, **kwargs):
+    return self._function(*args, **kwargs)
+  
+  @property
+  def nparams(self):
+    # Exclude `self`.
+    return len(inspect.getargspec(self._function).args) - 1
+
+
+class GimpModuleSimulator(stubs_gimp.ParasiteFunctionsStubMixin):
+  
+  Parasite = stubs_gimp.ParasiteStub
+  Image = ImageSimulator
+  Item = LayerSimulator
+  Drawable = LayerSimulator
+  Layer = LayerSimulator
+  GroupLayer = LayerGroupSimulator
+  
+  version = (2, 8, 22)
+  
+  def __init__(self, pdb=None):
+    super().__init__()
+    
+    self.pdb = pdb if pdb is not None else PdbSimulator()
+
+
+@contextlib.contextmanager
+def simulate_gimp(module_names, gimp_module=None):
+  """
+  Replace the `gimp` module and the `pdb` object imported in the specified
+  modules with a `GimpModuleSimulator` instance and its `pdb` attribute,
+  respectively. Yield the `GimpModuleSimulator` instance.
+  
+  If `gimp_module` is `None`, a new `GimpModuleSimulator` instance is created.
+  
+  Use this function as a context manager:
+    
+    with simulate_gimp(["export_layers.exportlayers"]) as gimp_module:
+      # do stuff
+  """
+  if gimp_module is None:
+    gimp_module = GimpModuleSimulator()
+  
+  patchers = []
+  
+  for module_name in module_names:
+    module = importlib.import_module(module_name)
+    
+    if hasattr(module, "gimp"):
+      patchers.append(mock.patch.object(module, "gimp", new=gimp_module))
+    
+    if hasattr(module, "pdb"):
+      patchers.append(mock.patch.object(module, "pdb", new=gimp_module.pdb))
+  
+  for patcher in patchers:
+    patcher.start()
+  
+  try:
+    yield gimp_module
+  finally:
+    for patcher in reversed(patchers):
+      patcher.stop()
+
+
+#===============================================================================
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def write_png(filepath, pixels, compression=9):
+  """
+  Save RGBA pixels (NumPy array of shape `(height, width, 4)`) to the specified
+  file in the PNG format. `compression` is the zlib compression level.
+  """
+  height, width = pixels.shape[:2]
+  
+  scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+  scanlines[:, 1:] = pixels.reshape(height, width * 4)
+  
+  with io.open(filepath, "wb") as file_:
+    file_.write(_PNG_SIGNATURE)
+    file_.write(
+      _get_png_chunk(b"IHDR", struct.pack(b">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+    file_.write(_get_png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compression)))
+    file_.write(_get_png_chunk(b"IEND", b""))
+
+
+def read_png(filepath):
+  """
+  Load pixels from the specified PNG file as a NumPy array of shape
+  `(height, width, 4)`. Only non-interlaced 8-bit RGB and RGBA images are
+  supported.
+  
+  Raises `ValueError` if the file is not a PNG file or has an unsupported
+  format.
+  """
+  with io.open(filepath, "rb") as file_:
+    data = file_.read()
+  
+  if not data.startswith(_PNG_SIGNATURE):
+    raise ValueError("'{}' is not a PNG file".format(filepath))
+  
+  position = len(_PNG_SIGNATURE)
+  header = None
+  compressed_data_parts = []
+  
+  while position < len(data):
+    chunk_length, chunk_type = struct.unpack_from(b">I4s", data, position)
+    chunk_data = data[position + 8:position + 8 + chunk_length]
+    position += chunk_length + 12
+    
+    if chunk_type == b"IHDR":
+      header = struct.unpack(b">IIBBBBB", chunk_data)
+    elif chunk_type == b"IDAT":
+      compressed_data_parts.append(chunk_data)
+    elif chunk_type == b"IEND":
+      break
+  
+  if header is None:
+    raise ValueError("'{}' is missing a PNG header".format(filepath))
+  
+  width, height, bit_depth, color_type, unused_, unused_, interlace = header
+  
+  if bit_depth != 8 or color_type not in (2, 6) or interlace != 0:
+    raise ValueError("'{}' has an unsupported PNG format".format(filepath))
+  
+  num_channels = 4 if color_type == 6 else 3
+  
+  scanlines = np.frombuffer(
+    zlib.decompress(b"".join(compressed_data_parts)), dtype=np.uint8).reshape(
+      height, width * num_channels + 1)
+  
+  pixels = _unfilter_png_scanlines(scanlines, num_channels).reshape(
+    height, width, num_channels)
+  
+  if num_channels == 3:
+    pixels = np.dstack([pixels, np.full((height, width), 255, dtype=np.uint8)])
+  
+  return pixels
+
+
+def _get_png_chunk(chunk_type, chunk_data):
+  return b"".join([
+    struct.pack(b">I", len(chunk_data)),
+    chunk_type,
+    chunk_data,
+    struct.pack(b">I", zlib.crc32(chunk_type + chunk_data) & 0xffffffff)])
+
+
+def _unfilter_png_scanlines(scanlines, bytes_per_pixel):
+  rows = scanlines[:, 1:].astype(np.int32)
+  previous_row = np.zeros(rows.shape[1], dtype=np.int32)
+  
+  for row_index, filter_type in enumerate(scanlines[:, 0]):
+    row = rows[row_index]
+    
+    if filter_type == 1:
+      for i in range(bytes_per_pixel, len(row)):
+        row[i] = (row[i] + row[i - bytes_per_pixel]) & 0xff
+    elif filter_type == 2:
+      row[:] = (row + previous_row) & 0xff
+    elif filter_type == 3:
+      for i in range(len(row)):
+        left = row[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+        row[i] = (row[i] + (left + previous_row[i]) // 2) & 0xff
+    elif filter_type == 4:
+      for i in range(len(row)):
+        left = row[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+        upper_left = previous_row[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+        row[i] = (row[i] + _paeth_predictor(left, previous_row[i], upper_left)) & 0xff
+    elif filter_type != 0:
+      raise ValueError("invalid PNG filter type {}".format(filter_type))
+    
+    previous_row = row
+  
+  return rows.astype(np.uint8)
+
+
+def _paeth_predictor(left, upper, upper_left):
+  estimate = left + upper - upper_left
+  distance_left = abs(estimate - left)
+  distance_upper = abs(estimate - upper)
+  distance_upper_left = abs(estimate - upper_left)
+  
+  if distance_left <= distance_upper and distance_left <= distance_upper_left:
+    return left
+  elif distance_upper <= distance_upper_left:
+    return upper
+  else:
+    return upper_left
+
+
+#===============================================================================
+
+
+def _encode_name(name):
+  if name is None:
+    return b""
+  elif isinstance(name, type("")):
+    return name.encode(pgconstants.GIMP_CHARACTER_ENCODING)
+  else:
+    return name
+
+
+def _get_container(image, parent):
+  return parent.children if parent is not None else image.layers
+
+
+def _set_image(layer, image):
+  layer.image = image
+  for child in layer.children:
+    _set_image(child, image)
+
+
+def _invalidate(layer):
+  layer.valid = False
+  for child in layer.children:
+    _invalidate(child)
+
+
+def _walk_layers(layers):
+  for layer in layers:
+    yield layer
+    
+    for child in _walk_layers(layer.children):
+      yield child
+
+
+def _get_bounds(layer):
+  """
+  Return the bounding box of the layer as a tuple `(x1, y1, x2, y2)`. The
+  bounding box of a layer group encloses all of its children. An empty layer
+  group has a size of 1x1 pixels.
+  """
+  if isinstance(layer, LayerGroupSimulator):
+    if layer.children:
+      return _get_union_bounds(layer.children)
+    else:
+      return layer._offsets + (layer._offsets[0] + 1, layer._offsets[1] + 1)
+  else:
+    offset_x, offset_y = layer.offsets
+    return offset_x, offset_y, offset_x + layer.width, offset_y + layer.height
+
+
+def _get_union_bounds(layers):
+  bounds = [_get_bounds(layer) for layer in layers]
+  return (
+    min(bound[0] for bound in bounds),
+    min(bound[1] for bound in bounds),
+    max(bound[2] for bound in bounds),
+    max(bound[3] for bound in bounds))
+
+
+def _crop_pixels(pixels, offsets, bounds):
+  """
+  Return a copy of `pixels` located at `offsets` cropped or extended
+  (with transparent pixels) to `bounds`.
+  """
+  x1, y1, x2, y2 = bounds
+  offset_x, offset_y = offsets
+  
+  new_pixels = np.zeros((y2 - y1, x2 - x1) + pixels.shape[2:], dtype=pixels.dtype)
+  
+  src_x1 = max(x1 - offset_x, 0)
+  src_y1 = max(y1 - offset_y, 0)
+  src_x2 = min(x2 - offset_x, pixels.shape[1])
+  src_y2 = min(y2 - offset_y, pixels.shape[0])
+  
+  if src_x1 < src_x2 and src_y1 < src_y2:
+    dest_x1 = offset_x + src_x1 - x1
+    dest_y1 = offset_y + src_y1 - y1
+    new_pixels[
+      dest_y1:dest_y1 + src_y2 - src_y1, dest_x1:dest_x1 + src_x2 - src_x1] = (
+        pixels[src_y1:src_y2, src_x1:src_x2])
+  
+  return new_pixels
+
+
+def _scale_pixels(pixels, size):
+  """
+  Return a copy of `pixels` scaled to `size` (width, height) using the
+  nearest-neighbor interpolation.
+  """
+  width, height = size
+  rows = (np.arange(height) * pixels.shape[0] // height).astype(np.intp)
+  columns = (np.arange(width) * pixels.shape[1] // width).astype(np.intp)
+  
+  return pixels[rows[:, np.newaxis], columns]
+
+
+def _composite_layers(layers, bounds):
+  """
+  Composite visible layers (ordered from top to bottom as in
+  `gimp.Image.layers`) into pixels enclosed by `bounds`.
+  """
+  x1, y1, x2, y2 = bounds
+  result = np.zeros((y2 - y1, x2 - x1, 4), dtype=np.float32)
+  
+  for layer in reversed(layers):
+    if layer.visible:
+      _composite_layer(result, (x1, y1), layer)
+  
+  return _to_uint8(result)
+
+
+def _composite_layer(dest_pixels, dest_offsets, layer):
+  if layer.mode != gimpenums.NORMAL_MODE:
+    raise NotImplementedError("layer mode {} is not supported".format(layer.mode))
+  
+  dest_height, dest_width = dest_pixels.shape[:2]
+  bounds = (
+    dest_offsets[0], dest_offsets[1], dest_offsets[0] + dest_width,
+    dest_offsets[1] + dest_height)
+  
+  src_pixels = _to_float(_crop_pixels(layer.pixels, layer.offsets, bounds))
+  src_alpha = src_pixels[..., 3] * (layer.opacity / 100.0)
+  
+  if layer.mask is not None and layer.apply_mask:
+    src_alpha *= _to_float(_crop_pixels(layer.mask.pixels, layer.offsets, bounds))
+  
+  dest_alpha = dest_pixels[..., 3] * (1.0 - src_alpha)
+  result_alpha = src_alpha + dest_alpha
+  
+  with np.errstate(divide="ignore", invalid="ignore"):
+    result_rgb = (
+      (src_pixels[..., :3] * src_alpha[..., np.newaxis]
+       + dest_pixels[..., :3] * dest_alpha[..., np.newaxis])
+      / result_alpha[..., np.newaxis])
+  
+  dest_pixels[..., :3] = np.where(result_alpha[..., np.newaxis] > 0, result_rgb, 0.0)
+  dest_pixels[..., 3] = result_alpha
+
+
+def _to_float(pixels):
+  return pixels.astype(np.float32) / 255.0
+
+
+def _to_uint8(pixels):
+  return np.clip(np.round(pixels * 255.0), 0, 255).astype(np.uint8)
@@ -0,0 +1,152 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+
+from .. import constants as pgconstants
+from .. import fileformats as pgfileformats
+
+
+@mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".fileformats.pdb")
+class TestGetSaveProcedure(unittest.TestCase):
+  
+  def setUp(self):
+    pgfileformats.refresh()
+    
+    self.third_party_file_format = _find_third_party_file_format()
+    self.file_extension = self.third_party_file_format.file_extensions[0]
+  
+  def tearDown(self):
+    pgfileformats.refresh()
+  
+  def test_builtin_file_format_returns_default_save_procedure(self, mock_pdb):
+    self.assertEqual(
+      pgfileformats.get_save_procedure("png"),
+      pgfileformats.get_default_save_procedure())
+    self.assertFalse(mock_pdb.gimp_procedural_db_proc_exists.called)
+  
+  def test_unknown_file_extension_returns_default_save_procedure(self, mock_pdb):
+    self.assertEqual(
+      pgfileformats.get_save_procedure("unknown"),
+      pgfileformats.get_default_save_procedure())
+  
+  def test_third_party_file_format_is_checked_only_once(self, mock_pdb):
+    mock_pdb.gimp_procedural_db_proc_exists.return_value = True
+    
+    for unused_ in range(3):
+      self.assertEqual(
+        pgfileformats.get_save_procedure(self.file_extension),
+        self.third_party_file_format.save_procedure_func)
+    
+    self.assertEqual(mock_pdb.gimp_procedural_db_proc_exists.call_count, 1)
+  
+  def test_refresh_checks_third_party_file_format_again(self, mock_pdb):
+    mock_pdb.gimp_procedural_db_proc_exists.return_value = False
+    pgfileformats.get_save_procedure(self.file_extension)
+    
+    mock_pdb.gimp_procedural_db_proc_exists.return_value = True
+    self.assertFalse(self.third_party_file_format.is_installed())
+    
+    pgfileformats.refresh()
+    
+    self.assertTrue(self.third_party_file_format.is_installed())
+    self.assertEqual(mock_pdb.gimp_procedural_db_proc_exists.call_count, 2)
+
+
+@mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".fileformats.pdb")
+class TestGetSaveProcedureWithOptions(unittest.TestCase):
+  
+  def setUp(self):
+    pgfileformats.refresh()
+    
+    self.save_options = pgfileformats.create_save_options()
+    self.file_format = pgfileformats.file_formats_dict["png"]
+  
+  def tearDown(self):
+    pgfileformats.refresh()
+  
+  def test_save_options_are_passed_to_save_procedure(self, mock_pdb):
+    self._set_save_procedure_params(mock_pdb, len(self.file_format.save_options))
+    self.save_options["png/compression"].set_value(3)
+    
+    save_procedure = pgfileformats.get_save_procedure_with_options(
+      "png", self.save_options)
+    save_procedure("run_mode", "image", "layer", "filepath", "raw_filepath")
+    
+    mock_pdb.__getitem__.assert_called_with("file-png-save2")
+    mock_pdb.__getitem__.return_value.assert_called_once_with(
+      "image",
+      "layer",
+      "filepath",
+      "raw_filepath",
+      *[setting.value for setting in self.save_options["png"].walk()],
+      run_mode="run_mode")
+    self.assertEqual(mock_pdb.__getitem__.return_value.call_args[0][5], 3)
+  
+  def test_incompatible_save_procedure_returns_none(self, mock_pdb):
+    self._set_save_procedure_params(mock_pdb, len(self.file_format.save_options) - 1)
+    
+    self.assertIsNone(
+      pgfileformats.get_save_procedure_with_options("png", self.save_options))
+  
+  def test_file_format_without_save_options_returns_none(self, mock_pdb):
+    self._set_save_procedure_params(mock_pdb, 0)
+    
+    self.assertIsNone(
+      pgfileformats.get_save_procedure_with_options("xcf", self.save_options))
+    self.assertIsNone(
+      pgfileformats.get_save_procedure_with_options("unknown", self.save_options))
+  
+  def test_get_save_options_for_file_extension(self, mock_pdb):
+    self._set_save_procedure_params(
+      mock_pdb, len(pgfileformats.file_formats_dict["jpg"].save_options))
+    
+    self.assertEqual(
+      pgfileformats.get_save_options_for_file_extension("jpeg", self.save_options),
+      self.save_options["jpg"])
+    self.assertIsNone(
+      pgfileformats.get_save_options_for_file_extension("xcf", self.save_options))
+  
+  def test_create_save_options(self, mock_pdb):
+    for file_format in pgfileformats.file_formats:
+      if file_format.save_options:
+        self.assertEqual(
+          len(list(self.save_options[file_format.file_extensions[0]].walk())),
+          len(file_format.save_options))
+        self.assertTrue(all(
+          not setting.can_be_registered_to_pdb()
+          for setting in self.save_options[file_format.file_extensions[0]].walk()))
+  
+  @staticmethod
+  def _set_save_procedure_params(mock_pdb, num_save_options):
+    mock_pdb.gimp_procedural_db_proc_exists.return_value = True
+    mock_pdb.__getitem__.return_value.nparams = 5 + num_save_options
+
+
+def _find_third_party_file_format():
+  return next(
+    file_format for file_format in pgfileformats.file_formats
+    if file_format.is_third_party()
+    and file_format.file_extensions[0] in pgfileformats.file_formats_dict)
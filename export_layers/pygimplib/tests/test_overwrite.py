@@ -17,6 +17,9 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import os
+import shutil
+import tempfile
 import unittest
 
 import mock
@@ -94,3 +97,59 @@ class TestHandleOverwrite(unittest.TestCase):
     self.assertEqual(
       pgoverwrite.handle_overwrite(self.filepath, self.overwrite_chooser),
       (pgoverwrite.OverwriteModes.DO_NOTHING, self.filepath))
+
+
+class TestHandleOverwriteWithFileExtensions(unittest.TestCase):
+  
+  def setUp(self):
+    self.dirpath = tempfile.mkdtemp()
+    self.filepath = os.path.join(self.dirpath, "image.png")
+    self.uniquifier_position = len(self.filepath) - len(".png")
+  
+  def tearDown(self):
+    shutil.rmtree(self.dirpath)
+  
+  def test_handle_overwrite_only_other_file_exists(self):
+    self._create_file("image.webp")
+    
+    overwrite_chooser = pgoverwrite.NoninteractiveOverwriteChooser(
+      pgoverwrite.OverwriteModes.SKIP)
+    
+    self.assertEqual(
+      pgoverwrite.handle_overwrite(
+        self.filepath, overwrite_chooser, self.uniquifier_position, ["webp"]),
+      (pgoverwrite.OverwriteModes.SKIP, self.filepath))
+  
+  def test_handle_overwrite_rename_new_uses_same_uniquifier(self):
+    self._create_file("image.png")
+    self._create_file("image (1).webp")
+    
+    overwrite_chooser = pgoverwrite.NoninteractiveOverwriteChooser(
+      pgoverwrite.OverwriteModes.RENAME_NEW)
+    
+    self.assertEqual(
+      pgoverwrite.handle_overwrite(
+        self.filepath, overwrite_chooser, self.uniquifier_position, ["webp", "jpg"]),
+      (pgoverwrite.OverwriteModes.RENAME_NEW,
+       os.path.join(self.dirpath, "image (2).png")))
+  
+  def test_handle_overwrite_rename_existing_renames_all_existing_files(self):
+    self._create_file("image.png")
+    self._create_file("image.webp")
+    self._create_file("image (1).jpg")
+    
+    overwrite_chooser = pgoverwrite.NoninteractiveOverwriteChooser(
+      pgoverwrite.OverwriteModes.RENAME_EXISTING)
+    
+    self.assertEqual(
+      pgoverwrite.handle_overwrite(
+        self.filepath, overwrite_chooser, self.uniquifier_position, ["webp", "jpg"]),
+      (pgoverwrite.OverwriteModes.RENAME_EXISTING, self.filepath))
+    
+    self.assertEqual(
+      sorted(os.listdir(self.dirpath)),
+      ["image (1).jpg", "image (2).png", "image (2).webp"])
+  
+  def _create_file(self, filename):
+    with open(os.path.join(self.dirpath, filename), "w"):
+      pass
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import gimpenums
+
+from .. import constants as pgconstants
+from .. import pixels as pgpixels
+
+from . import simulator_gimp
+
+np = simulator_gimp.np
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGetAutocropBounds(unittest.TestCase):
+  
+  def test_transparent_border(self):
+    pixels = np.zeros((4, 5, 4), dtype=np.uint8)
+    pixels[1:3, 2:4] = (255, 0, 0, 255)
+    pixels[3, 0] = (0, 255, 0, 0)
+    
+    self.assertEqual(pgpixels.get_autocrop_bounds(pixels, True), (2, 1, 4, 3))
+  
+  def test_color_border(self):
+    pixels = np.full((4, 5, 3), 255, dtype=np.uint8)
+    pixels[2, 1] = (255, 255, 0)
+    pixels[3, 3] = (0, 0, 0)
+    
+    self.assertEqual(pgpixels.get_autocrop_bounds(pixels, False), (1, 2, 4, 4))
+  
+  def test_opaque_top_left_pixel_with_alpha_uses_color(self):
+    pixels = np.full((3, 3, 4), 255, dtype=np.uint8)
+    pixels[2, 2] = (255, 255, 255, 0)
+    
+    self.assertEqual(pgpixels.get_autocrop_bounds(pixels, True), (2, 2, 3, 3))
+  
+  def test_no_contents(self):
+    pixels = np.zeros((3, 3, 4), dtype=np.uint8)
+    pixels[1, 1] = (255, 0, 0, 0)
+    
+    self.assertIsNone(pgpixels.get_autocrop_bounds(pixels, True))
+    self.assertTrue(pgpixels.is_empty(pixels, True))
+    self.assertFalse(pgpixels.is_empty(pixels[..., :3], False))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestPremultiplyAlpha(unittest.TestCase):
+  
+  def test_premultiply_and_unpremultiply(self):
+    pixels = np.array(
+      [[[255, 128, 0, 255], [200, 100, 50, 128], [10, 20, 30, 0]]], dtype=np.uint8)
+    
+    premultiplied_pixels = pgpixels.premultiply_alpha(pixels)
+    
+    self.assertEqual(
+      premultiplied_pixels.tolist(),
+      [[[255, 128, 0, 255], [100, 50, 25, 128], [0, 0, 0, 0]]])
+    
+    unpremultiplied_pixels = pgpixels.unpremultiply_alpha(premultiplied_pixels)
+    
+    self.assertEqual(unpremultiplied_pixels[0, :2, 3].tolist(), [255, 128])
+    self.assertTrue(
+      np.all(np.abs(unpremultiplied_pixels[0, :2].astype(int) - pixels[0, :2]) <= 1))
+    self.assertEqual(unpremultiplied_pixels[0, 2].tolist(), [0, 0, 0, 0])
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestAutocropLayer(unittest.TestCase):
+  
+  def setUp(self):
+    self.gimp_module = simulator_gimp.GimpModuleSimulator()
+    self.pdb = self.gimp_module.pdb
+    
+    self.image = self.pdb.gimp_image_new(6, 6, gimpenums.RGB)
+  
+  def test_autocrop_layer_matches_autocrop_plugin(self):
+    layer = self._insert_layer()
+    layer.pixels[2:4, 1:3] = (255, 0, 0, 255)
+    layer_copy = self.pdb.gimp_layer_copy(layer, True)
+    
+    with simulator_gimp.simulate_gimp(
+           [pgconstants.PYGIMPLIB_MODULE_PATH + ".pixels"], self.gimp_module):
+      self.assertTrue(pgpixels.autocrop_layer(layer))
+    
+    self.pdb.plug_in_autocrop_layer(self.image, layer_copy)
+    
+    self.assertEqual(layer.offsets, (2, 3))
+    self.assertEqual(layer.offsets, layer_copy.offsets)
+    self.assertTrue(np.array_equal(layer.pixels, layer_copy.pixels))
+  
+  def test_autocrop_layer_without_contents(self):
+    layer = self._insert_layer()
+    
+    with simulator_gimp.simulate_gimp(
+           [pgconstants.PYGIMPLIB_MODULE_PATH + ".pixels"], self.gimp_module):
+      self.assertFalse(pgpixels.autocrop_layer(layer))
+    
+    self.assertEqual((layer.width, layer.height), (4, 4))
+    self.assertEqual(layer.offsets, (1, 1))
+  
+  def _insert_layer(self):
+    layer = simulator_gimp.LayerSimulator(self.image, "layer", 4, 4)
+    layer.set_offsets(1, 1)
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    return layer
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+
+import mock
+
+import gimpenums
+
+from .. import constants as pgconstants
+from .. import pngwriter as pgpngwriter
+
+from . import simulator_gimp
+
+np = simulator_gimp.np
+
+
+def _get_pixels(width, height):
+  pixels = np.zeros((height, width, 4), dtype=np.uint8)
+  pixels[..., 0] = np.arange(width)[np.newaxis, :] * 40
+  pixels[..., 1] = np.arange(height)[:, np.newaxis] * 60
+  pixels[..., 2] = 200
+  pixels[..., 3] = np.arange(width * height).reshape(height, width) * 15
+  
+  return pixels
+
+
+class TestEncodePng(unittest.TestCase):
+  
+  def test_encode_png_without_numpy_does_not_filter_scanlines(self):
+    data = b"".join(bytes(bytearray([i, i, i])) for i in range(6))
+    
+    with mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".pngwriter.np", None):
+      png_data = pgpngwriter.encode_png(data, 3, 2, 3)
+    
+    header = struct.unpack_from(b">IIBBBBB", png_data, 16)
+    self.assertEqual(header, (3, 2, 8, 2, 0, 0, 0))
+    
+    idat_length = struct.unpack_from(b">I", png_data, 33)[0]
+    scanlines = zlib.decompress(png_data[41:41 + idat_length])
+    
+    self.assertEqual(scanlines, b"\x00" + data[:9] + b"\x00" + data[9:])
+  
+  @unittest.skipIf(np is None, "NumPy is not installed")
+  def test_encode_png_with_adaptive_filtering(self):
+    for num_channels in [3, 4]:
+      pixels = _get_pixels(5, 4)
+      if num_channels == 3:
+        pixels[..., 3] = 255
+      
+      data = pixels[..., :num_channels].tobytes()
+      png_data = pgpngwriter.encode_png(data, 5, 4, num_channels)
+      
+      dirpath = tempfile.mkdtemp()
+      try:
+        filepath = os.path.join(dirpath, "image.png")
+        with io.open(filepath, "wb") as file_:
+          file_.write(png_data)
+        
+        self.assertTrue(np.array_equal(simulator_gimp.read_png(filepath), pixels))
+      finally:
+        shutil.rmtree(dirpath)
+  
+  @unittest.skipIf(np is None, "NumPy is not installed")
+  def test_encode_png_filters_scanlines_in_blocks_of_rows(self):
+    data = _get_pixels(5, 7).tobytes()
+    png_data = pgpngwriter.encode_png(data, 5, 7, 4)
+    
+    with mock.patch(
+           pgconstants.PYGIMPLIB_MODULE_PATH + ".pngwriter._FILTER_BLOCK_SIZE", 40):
+      with mock.patch(
+             pgconstants.PYGIMPLIB_MODULE_PATH + ".pngwriter._filter_rows_adaptive",
+             wraps=pgpngwriter._filter_rows_adaptive) as filter_rows_mock:
+        png_data_filtered_in_blocks = pgpngwriter.encode_png(data, 5, 7, 4)
+    
+    self.assertEqual(filter_rows_mock.call_count, 4)
+    self.assertEqual(png_data_filtered_in_blocks, png_data)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestPngWriter(unittest.TestCase):
+  
+  def setUp(self):
+    self.dirpath = tempfile.mkdtemp()
+    self.png_writer = pgpngwriter.PngWriter(num_threads=2, memory_budget=100)
+  
+  def tearDown(self):
+    self.png_writer.close()
+    shutil.rmtree(self.dirpath)
+  
+  def test_submit_and_wait(self):
+    pixels_list = [_get_pixels(width, 3) for width in range(1, 8)]
+    
+    for i, pixels in enumerate(pixels_list):
+      self.png_writer.submit(
+        self._get_filepath(i), pixels.tobytes(), pixels.shape[1], pixels.shape[0], 4)
+      self.assertLessEqual(
+        self.png_writer.pending_bytes, max(self.png_writer.memory_budget, pixels.size))
+    
+    self.png_writer.wait()
+    
+    self.assertEqual(self.png_writer.pending_bytes, 0)
+    
+    for i, pixels in enumerate(pixels_list):
+      self.assertTrue(
+        np.array_equal(simulator_gimp.read_png(self._get_filepath(i)), pixels))
+  
+  def test_submit_with_invalid_data_size(self):
+    with self.assertRaises(ValueError):
+      self.png_writer.submit(self._get_filepath(0), b"\x00" * 5, 2, 2, 1)
+  
+  def test_wait_raises_error_with_context(self):
+    filepath = os.path.join(self.dirpath, "nonexistent_dir", "image.png")
+    context = object()
+    
+    self.png_writer.submit(filepath, b"\x00" * 4, 2, 2, 1, context=context)
+    
+    with self.assertRaises(pgpngwriter.PngWriterError) as cm:
+      self.png_writer.wait()
+    
+    self.assertEqual(cm.exception.filepath, filepath)
+    self.assertIs(cm.exception.context, context)
+    self.assertListEqual(self.png_writer.pop_written_contexts(), [])
+    
+    self.png_writer.wait()
+  
+  def test_pop_written_contexts(self):
+    contexts = [object(), object()]
+    
+    for i, context in enumerate(contexts):
+      self.png_writer.submit(self._get_filepath(i), b"\x00" * 4, 2, 2, 1, context=context)
+    
+    self.png_writer.wait()
+    
+    self.assertSetEqual(set(self.png_writer.pop_written_contexts()), set(contexts))
+    self.assertListEqual(self.png_writer.pop_written_contexts(), [])
+  
+  def test_submit_after_close_raises_error(self):
+    self.png_writer.close()
+    
+    with self.assertRaises(ValueError):
+      self.png_writer.submit(self._get_filepath(0), b"\x00" * 4, 2, 2, 1)
+  
+  def _get_filepath(self, index):
+    return os.path.join(self.dirpath, "image{}.png".format(index))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGetDrawableData(unittest.TestCase):
+  
+  def test_get_drawable_data(self):
+    pdb = simulator_gimp.PdbSimulator()
+    image = pdb.gimp_image_new(3, 2, gimpenums.RGB)
+    layer = pdb.gimp_layer_new(
+      image, 3, 2, gimpenums.RGBA_IMAGE, "layer", 100.0, gimpenums.NORMAL_MODE)
+    layer.pixels = _get_pixels(3, 2)
+    
+    self.assertTrue(pgpngwriter.is_drawable_supported(layer))
+    self.assertEqual(
+      pgpngwriter.get_drawable_data(layer), (layer.pixels.tobytes(), 3, 2, 4))
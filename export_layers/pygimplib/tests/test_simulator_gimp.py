@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import gimpenums
+
+from .. import constants as pgconstants
+from .. import pdbutils as pgpdbutils
+
+from . import simulator_gimp
+
+np = simulator_gimp.np
+
+
+def _create_layer(image, name, color, size, offsets=(0, 0), opacity=100.0):
+  layer = simulator_gimp.LayerSimulator(image, name, size[0], size[1], opacity=opacity)
+  layer.pixels[...] = color
+  layer.set_offsets(*offsets)
+  
+  return layer
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestPdbSimulator(unittest.TestCase):
+  
+  def setUp(self):
+    self.pdb = simulator_gimp.PdbSimulator()
+    self.image = self.pdb.gimp_image_new(4, 4, gimpenums.RGB)
+  
+  def test_insert_and_remove_layer(self):
+    layer = _create_layer(self.image, "layer", (255, 0, 0, 255), (2, 2))
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    self.assertEqual(self.image.layers, [layer])
+    self.assertEqual(self.image.active_layer, layer)
+    
+    self.pdb.gimp_image_remove_layer(self.image, layer)
+    
+    self.assertEqual(self.image.layers, [])
+    self.assertFalse(layer.valid)
+  
+  def test_new_layer_from_drawable_copies_pixels(self):
+    layer = _create_layer(self.image, "layer", (255, 0, 0, 255), (2, 2), (1, 1))
+    layer_copy = self.pdb.gimp_layer_new_from_drawable(layer, self.image)
+    
+    layer_copy.pixels[...] = 0
+    
+    self.assertEqual(layer_copy.offsets, (1, 1))
+    self.assertEqual(layer_copy.name, b"layer")
+    self.assertTrue(np.all(layer.pixels == (255, 0, 0, 255)))
+  
+  def test_merge_visible_layers_composites_with_opacity(self):
+    bottom_layer = _create_layer(self.image, "bottom", (0, 0, 255, 255), (2, 2))
+    top_layer = _create_layer(
+      self.image, "top", (255, 0, 0, 255), (2, 2), (1, 1), opacity=50.0)
+    
+    self.pdb.gimp_image_insert_layer(self.image, bottom_layer, None, 0)
+    self.pdb.gimp_image_insert_layer(self.image, top_layer, None, 0)
+    
+    merged_layer = self.pdb.gimp_image_merge_visible_layers(
+      self.image, gimpenums.EXPAND_AS_NECESSARY)
+    
+    self.assertEqual(self.image.layers, [merged_layer])
+    self.assertEqual(merged_layer.name, b"bottom")
+    self.assertEqual(merged_layer.offsets, (0, 0))
+    self.assertEqual((merged_layer.width, merged_layer.height), (3, 3))
+    
+    self.assertEqual(tuple(merged_layer.pixels[0, 0]), (0, 0, 255, 255))
+    self.assertEqual(tuple(merged_layer.pixels[1, 1]), (128, 0, 128, 255))
+    self.assertEqual(tuple(merged_layer.pixels[2, 2]), (255, 0, 0, 128))
+    self.assertEqual(tuple(merged_layer.pixels[0, 2]), (0, 0, 0, 0))
+  
+  def test_merge_visible_layers_ignores_invisible_layers(self):
+    visible_layer = _create_layer(self.image, "visible", (0, 0, 255, 255), (2, 2))
+    invisible_layer = _create_layer(self.image, "invisible", (255, 0, 0, 255), (4, 4))
+    invisible_layer.visible = False
+    
+    self.pdb.gimp_image_insert_layer(self.image, visible_layer, None, 0)
+    self.pdb.gimp_image_insert_layer(self.image, invisible_layer, None, 0)
+    
+    merged_layer = self.pdb.gimp_image_merge_visible_layers(
+      self.image, gimpenums.EXPAND_AS_NECESSARY)
+    
+    self.assertEqual(merged_layer, visible_layer)
+    self.assertEqual(self.image.layers, [invisible_layer, visible_layer])
+  
+  def test_merge_layer_group_applies_mask(self):
+    layer_group = self.pdb.gimp_layer_group_new(self.image)
+    self.pdb.gimp_image_insert_layer(self.image, layer_group, None, 0)
+    
+    layer = _create_layer(self.image, "layer", (0, 255, 0, 255), (2, 1), (2, 3))
+    self.pdb.gimp_image_insert_layer(self.image, layer, layer_group, 0)
+    
+    mask = self.pdb.gimp_layer_create_mask(layer, gimpenums.ADD_WHITE_MASK)
+    mask.pixels[0, 1] = 0
+    self.pdb.gimp_layer_add_mask(layer, mask)
+    
+    self.assertEqual(layer_group.offsets, (2, 3))
+    self.assertEqual((layer_group.width, layer_group.height), (2, 1))
+    
+    merged_layer = self.pdb.gimp_image_merge_visible_layers(
+      self.image, gimpenums.EXPAND_AS_NECESSARY)
+    
+    self.assertFalse(self.pdb.gimp_item_is_group(merged_layer))
+    self.assertEqual(merged_layer.offsets, (2, 3))
+    self.assertEqual(tuple(merged_layer.pixels[0, 0]), (0, 255, 0, 255))
+    self.assertEqual(tuple(merged_layer.pixels[0, 1]), (0, 0, 0, 0))
+  
+  def test_resize_layer_to_image_size(self):
+    layer = _create_layer(self.image, "layer", (255, 0, 0, 255), (3, 3), (2, -1))
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    self.pdb.gimp_layer_resize_to_image_size(layer)
+    
+    self.assertEqual(layer.offsets, (0, 0))
+    self.assertEqual((layer.width, layer.height), (4, 4))
+    self.assertEqual(int(np.count_nonzero(layer.pixels[..., 3])), 4)
+    self.assertEqual(tuple(layer.pixels[1, 3]), (255, 0, 0, 255))
+  
+  def test_resize_image_moves_layers(self):
+    layer = _create_layer(self.image, "layer", (255, 0, 0, 255), (2, 2), (1, 1))
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    self.pdb.gimp_image_resize(self.image, 2, 2, -1, -1)
+    
+    self.assertEqual((self.image.width, self.image.height), (2, 2))
+    self.assertEqual(layer.offsets, (0, 0))
+  
+  def test_autocrop_layer(self):
+    layer = _create_layer(self.image, "layer", (0, 0, 0, 0), (4, 4), (1, 1))
+    layer.pixels[1:3, 2] = (255, 0, 0, 255)
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    self.pdb.plug_in_autocrop_layer(self.image, layer)
+    
+    self.assertEqual(layer.offsets, (3, 2))
+    self.assertEqual((layer.width, layer.height), (1, 2))
+  
+  def test_unsupported_procedure_raises_error(self):
+    with self.assertRaises(AttributeError):
+      self.pdb.plug_in_unsupported_procedure()
+    
+    self.assertFalse(
+      self.pdb.gimp_procedural_db_proc_exists("plug-in-unsupported-procedure"))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestPdbSimulatorFileSaveLoad(unittest.TestCase):
+  
+  def setUp(self):
+    self.pdb = simulator_gimp.PdbSimulator()
+    self.image = self.pdb.gimp_image_new(3, 2, gimpenums.RGB)
+    self.dirpath = tempfile.mkdtemp()
+  
+  def tearDown(self):
+    shutil.rmtree(self.dirpath)
+  
+  def test_save_and_load_png(self):
+    layer = _create_layer(self.image, "layer", (10, 20, 30, 40), (3, 2))
+    layer.pixels[1, 2] = (255, 255, 255, 255)
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    filepath = os.path.join(self.dirpath, "layer.png").encode(
+      pgconstants.GIMP_CHARACTER_ENCODING)
+    
+    self.pdb.gimp_file_save(
+      self.image, layer, filepath, os.path.basename(filepath),
+      run_mode=gimpenums.RUN_NONINTERACTIVE)
+    
+    self.assertEqual(self.pdb.saved_filepaths, [filepath])
+    
+    loaded_image = self.pdb.gimp_file_load(filepath, os.path.basename(filepath))
+    
+    self.assertEqual((loaded_image.width, loaded_image.height), (3, 2))
+    self.assertTrue(np.array_equal(loaded_image.layers[0].pixels, layer.pixels))
+  
+  def test_save_unsupported_file_format_raises_runtime_error(self):
+    layer = _create_layer(self.image, "layer", (10, 20, 30, 40), (3, 2))
+    self.pdb.gimp_image_insert_layer(self.image, layer, None, 0)
+    
+    filepath = os.path.join(self.dirpath, "layer.xcf").encode(
+      pgconstants.GIMP_CHARACTER_ENCODING)
+    
+    with self.assertRaises(RuntimeError):
+      self.pdb.gimp_file_save(self.image, layer, filepath, os.path.basename(filepath))
+    
+    self.assertFalse(os.path.exists(filepath))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestSimulateGimp(unittest.TestCase):
+  
+  def test_merge_layer_group_in_pdbutils(self):
+    with simulator_gimp.simulate_gimp(
+           [pgconstants.PYGIMPLIB_MODULE_PATH + ".pdbutils"]) as gimp_module:
+      pdb = gimp_module.pdb
+      image = pdb.gimp_image_new(4, 4, gimpenums.RGB)
+      
+      background_layer = _create_layer(image, "background", (0, 0, 0, 255), (4, 4))
+      pdb.gimp_image_insert_layer(image, background_layer, None, 0)
+      
+      layer_group = pdb.gimp_layer_group_new(image)
+      pdb.gimp_image_insert_layer(image, layer_group, None, 0)
+      
+      for i in range(2):
+        pdb.gimp_image_insert_layer(
+          image,
+          _create_layer(image, "layer", (255, 0, 0, 255), (1, 1), (i, i)),
+          layer_group,
+          0)
+      
+      merged_layer = pgpdbutils.merge_layer_group(layer_group)
+    
+    self.assertEqual(image.layers, [merged_layer, background_layer])
+    self.assertTrue(background_layer.visible)
+    self.assertEqual((merged_layer.width, merged_layer.height), (2, 2))
+    self.assertEqual(int(np.count_nonzero(merged_layer.pixels[..., 3])), 2)
+  
+  def test_group_composite_cache_in_pdbutils(self):
+    with simulator_gimp.simulate_gimp(
+           [pgconstants.PYGIMPLIB_MODULE_PATH + ".pdbutils"]) as gimp_module:
+      pdb = gimp_module.pdb
+      image = pdb.gimp_image_new(4, 4, gimpenums.RGB)
+      
+      outer_group = pdb.gimp_layer_group_new(image)
+      outer_group.opacity = 50.0
+      pdb.gimp_image_insert_layer(image, outer_group, None, 0)
+      
+      inner_group = pdb.gimp_layer_group_new(image)
+      inner_group.opacity = 50.0
+      pdb.gimp_image_insert_layer(image, inner_group, outer_group, 0)
+      
+      pdb.gimp_image_insert_layer(
+        image, _create_layer(image, "red", (255, 0, 0, 255), (2, 2)), inner_group, 0)
+      pdb.gimp_image_insert_layer(
+        image,
+        _create_layer(image, "green", (0, 255, 0, 255), (2, 2), (1, 1), opacity=50.0),
+        inner_group,
+        0)
+      pdb.gimp_image_insert_layer(
+        image, _create_layer(image, "blue", (0, 0, 255, 255), (2, 2), (2, 2)),
+        outer_group, 1)
+      
+      hidden_layer = _create_layer(image, "hidden", (255, 255, 255, 255), (4, 4))
+      hidden_layer.visible = False
+      pdb.gimp_image_insert_layer(image, hidden_layer, outer_group, 0)
+      
+      group_composite_cache = pgpdbutils.GroupCompositeCache()
+      
+      layer = group_composite_cache.insert_composite(image, outer_group, None, 0)
+      
+      self.assertIn(inner_group, group_composite_cache)
+      self.assertIn(outer_group, group_composite_cache)
+      self.assertGreater(group_composite_cache.size, 0)
+      
+      outer_group_copy = pdb.gimp_layer_new_from_drawable(outer_group, image)
+      pdb.gimp_image_insert_layer(image, outer_group_copy, None, 0)
+      expected_layer = pgpdbutils.merge_layer_group(outer_group_copy)
+      
+      self.assertEqual(layer.offsets, expected_layer.offsets)
+      self.assertTrue(np.array_equal(layer.pixels, expected_layer.pixels))
+      
+      group_composite_cache.remove(outer_group)
+      self.assertNotIn(outer_group, group_composite_cache)
+      
+      group_composite_cache.clear()
+      self.assertNotIn(inner_group, group_composite_cache)
+      self.assertEqual(group_composite_cache.size, 0)
+  
+  def test_group_composite_cache_discards_least_recently_used_composites(self):
+    with simulator_gimp.simulate_gimp(
+           [pgconstants.PYGIMPLIB_MODULE_PATH + ".pdbutils"]) as gimp_module:
+      pdb = gimp_module.pdb
+      image = pdb.gimp_image_new(4, 4, gimpenums.RGB)
+      
+      outer_group = pdb.gimp_layer_group_new(image)
+      pdb.gimp_image_insert_layer(image, outer_group, None, 0)
+      inner_group = pdb.gimp_layer_group_new(image)
+      pdb.gimp_image_insert_layer(image, inner_group, outer_group, 0)
+      pdb.gimp_image_insert_layer(
+        image, _create_layer(image, "red", (255, 0, 0, 255), (2, 2)), inner_group, 0)
+      
+      group_composite_cache = pgpdbutils.GroupCompositeCache(max_size=0)
+      
+      self.assertIsNotNone(group_composite_cache.get_composite(outer_group))
+      self.assertIn(outer_group, group_composite_cache)
+      self.assertNotIn(inner_group, group_composite_cache)
+      
+      group_composite_cache.clear()
@@ -136,6 +136,51 @@ def create_settings():
          pg.overwrite.OverwriteModes.RENAME_EXISTING)],
       "display_name": _("Overwrite mode (non-interactive run mode only)"),
     },
+    {
+      "type": pg.SettingTypes.array,
+      "name": "output_scales",
+      "element_type": pg.SettingTypes.float,
+      "element_default_value": 1.0,
+      "element_min_value": 0.01,
+      "default_value": (1.0,),
+      "min_size": 1,
+      "display_name": _("Output scales"),
+      "description": _("Scales at which each layer is exported (1.0 = original size)"),
+      "pdb_type": None,
+      "gui_type": None,
+    },
+    {
+      "type": pg.SettingTypes.enumerated,
+      "name": "output_scale_naming",
+      "default_value": "suffix",
+      "items": [
+        ("suffix", _("Append scale to filename (e.g. \"image@2x.png\")")),
+        ("subdirectory", _("Save to subdirectory (e.g. \"2x/image.png\")"))],
+      "display_name": _("Output scale naming"),
+      "pdb_type": None,
+      "gui_type": None,
+    },
+    {
+      "type": pg.SettingTypes.array,
+      "name": "additional_file_extensions",
+      "element_type": pg.SettingTypes.string,
+      "default_value": (),
+      "display_name": _("Additional file extensions"),
+      "description": _(
+        "File extensions of additional file formats to save each layer in"),
+      "pdb_type": None,
+      "gui_type": None,
+    },
+    {
+      "type": pg.SettingTypes.boolean,
+      "name": "use_builtin_png_writer",
+      "default_value": False,
+      "display_name": _("Use built-in PNG writer"),
+      "description": _(
+        "Save PNG images in background threads instead of the GIMP PNG plug-in"),
+      "pdb_type": None,
+      "gui_type": None,
+    },
     {
       "type": pg.SettingTypes.generic,
       "name": "available_tags",
@@ -152,6 +197,12 @@ def create_settings():
     },
   ])
   
+  settings["main"].add([
+    pg.fileformats.create_save_options(
+      setting_attributes={
+        "setting_sources": [pg.config.SESSION_SOURCE, pg.config.PERSISTENT_SOURCE]}),
+  ])
+  
   settings.add(settings_gui.create_gui_settings())
   
   settings["main"].add([operations.create(
@@ -21,6 +21,9 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from future.builtins import *
 
 import mock
+import os
+import shutil
+import tempfile
 import unittest
 
 from gimp import pdb
@@ -28,8 +31,10 @@ import gimpenums
 
 from export_layers import pygimplib as pg
 
+from export_layers import builtin_constraints
 from export_layers import builtin_procedures
 
+from export_layers.pygimplib.tests import simulator_gimp
 from export_layers.pygimplib.tests import stubs_gimp
 
 from .. import exportlayers
@@ -98,8 +103,9 @@ class TestAddOperationFromSettings(unittest.TestCase):
       blurb="Saves files in PNG file format")
   
   def test_add_operation_from_settings(self):
-    procedure = operations.add(
+    operations.add(
       self.procedures, builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    procedure = next(operations.walk_records(self.procedures))
     
     exportlayers.add_operation_from_settings(procedure, self.executor)
     
@@ -119,7 +125,8 @@ class TestAddOperationFromSettings(unittest.TestCase):
       self.procedure_stub, ((), ""), {"run_mode": gimpenums.RUN_NONINTERACTIVE})
   
   def _test_add_pdb_proc_as_operation(self, pdb_procedure, expected_args, expected_kwargs):
-    procedure = operations.add(self.procedures, pdb_procedure)
+    operations.add(self.procedures, pdb_procedure)
+    procedure = next(operations.walk_records(self.procedures))
     
     with mock.patch("export_layers.exportlayers.pdb") as pdb_mock:
       pdb_mock.__getitem__.return_value = pdb_procedure
@@ -132,3 +139,574 @@ class TestAddOperationFromSettings(unittest.TestCase):
     self.assertEqual(len(added_operation_items), 1)
     self.assertEqual(added_operation_items[0][1], expected_args)
     self.assertDictEqual(added_operation_items[0][2], expected_kwargs)
+
+
+_SIMULATED_MODULE_NAMES = [
+  "export_layers.exportlayers",
+  "export_layers.builtin_procedures",
+  pg.PYGIMPLIB_MODULE_PATH + ".fileformats",
+  pg.PYGIMPLIB_MODULE_PATH + ".itemtree",
+  pg.PYGIMPLIB_MODULE_PATH + ".pdbutils",
+  pg.PYGIMPLIB_MODULE_PATH + ".pixels",
+]
+
+
+@unittest.skipIf(simulator_gimp.np is None, "NumPy is not installed")
+class TestLayerExporterWithSimulator(unittest.TestCase):
+  
+  def setUp(self):
+    self.output_dirpath = tempfile.mkdtemp()
+    
+    self.gimp_module = simulator_gimp.GimpModuleSimulator()
+    self.pdb = self.gimp_module.pdb
+    
+    self.image = self.pdb.gimp_image_new(4, 4, gimpenums.RGB)
+    
+    self.background_layer = self._insert_layer("background", (255, 255, 255, 255), (4, 4))
+    self.layer_group = self.pdb.gimp_layer_group_new(self.image)
+    self.layer_group.name = b"group"
+    self.pdb.gimp_image_insert_layer(self.image, self.layer_group, None, 0)
+    self.blue_layer = self._insert_layer(
+      "blue", (0, 0, 255, 255), (4, 1), (0, 3), parent=self.layer_group)
+    self.red_layer = self._insert_layer("red", (255, 0, 0, 255), (2, 2), (1, 1))
+    
+    self.settings = settings_plugin.create_settings()
+    self.settings["main/output_directory"].set_value(self.output_dirpath)
+    
+    pg.fileformats.refresh()
+  
+  def tearDown(self):
+    shutil.rmtree(self.output_dirpath)
+    
+    pg.fileformats.refresh()
+  
+  def test_export_with_layer_size(self):
+    self._export()
+    
+    self.assertEqual(
+      self.pdb.saved_filepaths,
+      [self._get_filepath("red.png"),
+       self._get_filepath("group", "blue.png"),
+       self._get_filepath("background.png")])
+    
+    self._assert_pixels_equal(
+      self._get_filepath("red.png"), self.red_layer.pixels)
+    self._assert_pixels_equal(
+      self._get_filepath("group", "blue.png"), self.blue_layer.pixels)
+  
+  def test_export_does_not_create_groups_for_operations(self):
+    self._export()
+    
+    self.assertFalse(self.settings["main/procedures/added"])
+    self.assertFalse(self.settings["main/constraints/added"])
+  
+  def test_export_with_image_size(self):
+    operations.remove(self.settings["main/procedures"], "use_layer_size")
+    
+    self._export()
+    
+    expected_pixels = simulator_gimp.np.zeros((4, 4, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[1:3, 1:3] = (255, 0, 0, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+  
+  def test_export_with_background(self):
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    self.red_layer.opacity = 50.0
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    
+    self._export()
+    
+    expected_pixels = simulator_gimp.np.zeros((2, 2, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[...] = (255, 128, 128, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+    self.assertEqual(len(self.image.layers), 3)
+    self.assertTrue(all(layer.valid for layer in self.image.layers))
+  
+  def test_export_with_layer_size_merges_within_layer_bounds(self):
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    
+    with mock.patch.object(
+           self.pdb, "gimp_image_merge_visible_layers",
+           wraps=self.pdb.gimp_image_merge_visible_layers) as merge_visible_layers_mock:
+      self._export()
+    
+    self.assertTrue(all(
+      call_args[0][1] == gimpenums.CLIP_TO_IMAGE
+      for call_args in merge_visible_layers_mock.call_args_list))
+    
+    expected_pixels = simulator_gimp.np.zeros((2, 2, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[...] = (255, 0, 0, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+  
+  def test_export_with_background_before_layer_size_aligns_background(self):
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    self.background_layer.pixels[:, :2] = (0, 255, 0, 255)
+    self.red_layer.opacity = 50.0
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    operations.reorder(self.settings["main/procedures"], "insert_background_layers", 0)
+    
+    self._export()
+    
+    expected_pixels = simulator_gimp.np.zeros((2, 2, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[:, 0] = (128, 128, 0, 255)
+    expected_pixels[:, 1] = (255, 128, 128, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+  
+  def test_export_with_background_inserts_cropped_background_copies(self):
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    self.background_layer.pixels[3] = (0, 255, 0, 255)
+    self.red_layer.opacity = 50.0
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    
+    with mock.patch.object(
+           self.pdb, "gimp_layer_copy",
+           wraps=self.pdb.gimp_layer_copy) as layer_copy_mock:
+      self._export()
+    
+    self.assertEqual(layer_copy_mock.call_count, 1)
+    
+    expected_pixels = simulator_gimp.np.zeros((2, 2, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[...] = (255, 128, 128, 255)
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+    
+    expected_pixels = simulator_gimp.np.zeros((1, 4, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[...] = (0, 0, 255, 255)
+    self._assert_pixels_equal(self._get_filepath("group", "blue.png"), expected_pixels)
+  
+  def test_export_with_autocrop_background_autocrops_background_once(self):
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    self.background_layer.pixels[1:3, 0:3] = (0, 255, 0, 255)
+    self.red_layer.set_offsets(0, 0)
+    self.red_layer.opacity = 50.0
+    
+    for procedure_name in ["insert_background_layers", "autocrop_background"]:
+      operations.add(
+        self.settings["main/procedures"],
+        builtin_procedures.BUILTIN_PROCEDURES[procedure_name])
+    
+    with mock.patch(
+           pg.PYGIMPLIB_MODULE_PATH + ".pixels.get_autocrop_bounds",
+           wraps=pg.pixels.get_autocrop_bounds) as get_autocrop_bounds_mock:
+      self._export()
+    
+    self.assertEqual(get_autocrop_bounds_mock.call_count, 1)
+    
+    expected_pixels = simulator_gimp.np.zeros((2, 2, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[0] = (255, 0, 0, 128)
+    expected_pixels[1] = (128, 128, 0, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+  
+  def test_export_with_autocrop_background_does_not_reapply_procedures_to_background(
+        self):
+    self._test_export_with_autocrop_background_and_darken_background()
+  
+  def test_export_with_autocrop_background_without_pixels_uses_autocrop_plugin(self):
+    with mock.patch(
+           pg.PYGIMPLIB_MODULE_PATH + ".pixels.is_available", return_value=False):
+      with mock.patch.object(
+             self.pdb, "plug_in_autocrop_layer",
+             wraps=self.pdb.plug_in_autocrop_layer) as autocrop_mock:
+        self._test_export_with_autocrop_background_and_darken_background()
+    
+    self.assertEqual(autocrop_mock.call_count, 1)
+  
+  def _test_export_with_autocrop_background_and_darken_background(self):
+    def darken_background(image, layer, layer_exporter):
+      layer_exporter.inserted_tagged_layers["background"].pixels[..., :3] //= 2
+    
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    self.background_layer.pixels[1:3, 0:3] = (0, 200, 0, 255)
+    
+    operations.remove(self.settings["main/procedures"], "use_layer_size")
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    operations.add(
+      self.settings["main/procedures"],
+      {
+        "name": "darken_background",
+        "function": darken_background,
+        "display_name": "Darken background",
+      })
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["autocrop_background"])
+    
+    self._export()
+    
+    for filepath in [
+          self._get_filepath("red.png"), self._get_filepath("group", "blue.png")]:
+      pixels = simulator_gimp.read_png(filepath)
+      
+      self.assertListEqual(list(pixels[1, 0]), [0, 100, 0, 255])
+      self.assertListEqual(list(pixels[0, 0]), [0, 0, 0, 0])
+  
+  def test_export_layer_groups_composites_each_group_once(self):
+    self.layer_group.opacity = 50.0
+    inner_layer_group = self.pdb.gimp_layer_group_new(self.image)
+    inner_layer_group.name = b"inner"
+    inner_layer_group.opacity = 50.0
+    self.pdb.gimp_image_insert_layer(self.image, inner_layer_group, self.layer_group, 0)
+    self._insert_layer(
+      "green", (0, 255, 0, 255), (2, 2), (1, 1), parent=inner_layer_group)
+    
+    operations.add(
+      self.settings["main/constraints"],
+      builtin_constraints.BUILTIN_CONSTRAINTS["include_layer_groups"])
+    self.settings["main/overwrite_mode"].set_item("replace")
+    
+    with mock.patch.object(
+           pg.pdbutils.GroupCompositeCache, "insert_composite",
+           return_value=None):
+      self._export()
+    
+    expected_filepaths = [
+      self._get_filepath("group.png"), self._get_filepath("group", "inner.png")]
+    expected_pixels_list = [
+      simulator_gimp.read_png(filepath) for filepath in expected_filepaths]
+    
+    with mock.patch.object(
+           pg.pdbutils.GroupCompositeCache, "_create_composite",
+           autospec=True,
+           side_effect=pg.pdbutils.GroupCompositeCache._create_composite) as create_mock:
+      self._export()
+    
+    self.assertEqual(create_mock.call_count, 2)
+    
+    for filepath, expected_pixels in zip(expected_filepaths, expected_pixels_list):
+      self._assert_pixels_equal(filepath, expected_pixels)
+  
+  def test_export_with_custom_procedure_merges_entire_layers(self):
+    layer_exporter = exportlayers.LayerExporter(
+      gimpenums.RUN_NONINTERACTIVE, self.image, self.settings["main"])
+    layer_exporter.add_procedure(
+      pg.utils.empty_func, [operations.DEFAULT_PROCEDURES_GROUP])
+    
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      with mock.patch.object(
+             self.pdb, "gimp_image_merge_visible_layers",
+             wraps=self.pdb.gimp_image_merge_visible_layers) as merge_visible_layers_mock:
+        layer_exporter.export()
+    
+    self.assertTrue(all(
+      call_args[0][1] == gimpenums.EXPAND_AS_NECESSARY
+      for call_args in merge_visible_layers_mock.call_args_list))
+    self._assert_pixels_equal(self._get_filepath("red.png"), self.red_layer.pixels)
+  
+  def test_export_with_autocrop_background_does_not_call_autocrop_plugin(self):
+    self.background_layer.pixels[1:3, 0:3] = (0, 255, 0, 255)
+    
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    operations.remove(self.settings["main/procedures"], "use_layer_size")
+    for procedure_name in ["insert_background_layers", "autocrop_background"]:
+      operations.add(
+        self.settings["main/procedures"],
+        builtin_procedures.BUILTIN_PROCEDURES[procedure_name])
+    
+    with mock.patch.object(self.pdb, "plug_in_autocrop_layer") as autocrop_mock:
+      self._export()
+    
+    self.assertFalse(autocrop_mock.called)
+    
+    expected_pixels = simulator_gimp.np.zeros((4, 4, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[1:3, 0:3] = (0, 255, 0, 255)
+    expected_pixels[1:3, 1:3] = (255, 0, 0, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), expected_pixels)
+  
+  def test_export_noninteractive_uses_save_options(self):
+    with mock.patch.object(self.pdb, "gimp_file_save") as gimp_file_save_mock:
+      self._export(gimpenums.RUN_NONINTERACTIVE)
+    
+    self.assertFalse(gimp_file_save_mock.called)
+    self.assertEqual(len(self.pdb.saved_filepaths), 3)
+  
+  def test_export_with_last_values_uses_save_options(self):
+    save_options_editor = mock.Mock(return_value=True)
+    
+    with mock.patch.object(self.pdb, "gimp_file_save") as gimp_file_save_mock:
+      self._export(
+        gimpenums.RUN_WITH_LAST_VALS, save_options_editor=save_options_editor)
+    
+    self.assertFalse(gimp_file_save_mock.called)
+    self.assertFalse(save_options_editor.called)
+    self.assertEqual(len(self.pdb.saved_filepaths), 3)
+  
+  def test_export_interactive_edits_save_options_once_and_uses_them(self):
+    save_options_editor = mock.Mock(return_value=True)
+    
+    with mock.patch.object(self.pdb, "gimp_file_save") as gimp_file_save_mock:
+      self._export(gimpenums.RUN_INTERACTIVE, save_options_editor=save_options_editor)
+    
+    save_options_editor.assert_called_once_with(self.settings["main/save_options/png"])
+    self.assertFalse(gimp_file_save_mock.called)
+    self.assertEqual(len(self.pdb.saved_filepaths), 3)
+  
+  def test_export_interactive_cancel_editing_save_options_cancels_export(self):
+    with self.assertRaises(exportlayers.ExportLayersCancelError):
+      self._export(
+        gimpenums.RUN_INTERACTIVE, save_options_editor=mock.Mock(return_value=False))
+    
+    self.assertFalse(self.pdb.saved_filepaths)
+  
+  def test_export_with_output_scales_with_suffix(self):
+    self.settings["main/output_scales"].set_value((1.0, 2.0, 0.5))
+    
+    self._export()
+    
+    self.assertEqual(
+      self.pdb.saved_filepaths[:3],
+      [self._get_filepath("red@2x.png"),
+       self._get_filepath("red.png"),
+       self._get_filepath("red@0.5x.png")])
+    self.assertEqual(len(self.pdb.saved_filepaths), 9)
+    
+    expected_pixels = simulator_gimp.np.zeros((4, 4, 4), dtype=simulator_gimp.np.uint8)
+    expected_pixels[...] = (255, 0, 0, 255)
+    
+    self._assert_pixels_equal(self._get_filepath("red@2x.png"), expected_pixels)
+    self._assert_pixels_equal(self._get_filepath("red.png"), self.red_layer.pixels)
+    self._assert_pixels_equal(
+      self._get_filepath("red@0.5x.png"), expected_pixels[:1, :1])
+    self._assert_pixels_equal(
+      self._get_filepath("group", "blue@2x.png"),
+      simulator_gimp.np.tile(self.blue_layer.pixels, (2, 2, 1)))
+  
+  def test_export_with_output_scales_to_subdirectories(self):
+    self.settings["main/output_scales"].set_value((2.0,))
+    self.settings["main/output_scale_naming"].set_item("subdirectory")
+    
+    self._export()
+    
+    self.assertEqual(
+      self.pdb.saved_filepaths,
+      [self._get_filepath("2x", "red.png"),
+       self._get_filepath("2x", "group", "blue.png"),
+       self._get_filepath("2x", "background.png")])
+    self.assertEqual(len(self.image.layers), 3)
+  
+  def test_export_with_output_scales_processes_each_layer_once(self):
+    self.settings["main/output_scales"].set_value((1.0, 2.0, 3.0))
+    
+    with mock.patch.object(
+           self.pdb, "gimp_image_merge_visible_layers",
+           wraps=self.pdb.gimp_image_merge_visible_layers) as merge_visible_layers_mock:
+      self._export()
+    
+    self.assertEqual(merge_visible_layers_mock.call_count, 3)
+    self.assertEqual(len(self.pdb.saved_filepaths), 9)
+  
+  def test_export_with_additional_file_extensions(self):
+    self.settings["main/additional_file_extensions"].set_value(("webp", ".PNG", "jpg"))
+    
+    with mock.patch.object(self.pdb, "gimp_file_save") as gimp_file_save_mock:
+      self._export(gimpenums.RUN_WITH_LAST_VALS)
+    
+    self.assertEqual(self.pdb.saved_filepaths[0], self._get_filepath("red.png"))
+    self.assertEqual(len(self.pdb.saved_filepaths), 3)
+    self.assertEqual(
+      [call_args[0][2] for call_args in gimp_file_save_mock.call_args_list][:2],
+      [self._get_filepath("red.webp"), self._get_filepath("red.jpg")])
+    self.assertEqual(gimp_file_save_mock.call_count, 6)
+  
+  def test_export_with_additional_file_extensions_renames_all_files(self):
+    self.settings["main/additional_file_extensions"].set_value(("webp",))
+    self.settings["main/overwrite_mode"].set_item("rename_new")
+    
+    with open(self._get_filepath("red.webp"), "w"):
+      pass
+    
+    with mock.patch.object(self.pdb, "gimp_file_save") as gimp_file_save_mock:
+      self._export(gimpenums.RUN_WITH_LAST_VALS)
+    
+    self.assertEqual(self.pdb.saved_filepaths[0], self._get_filepath("red (1).png"))
+    self.assertEqual(
+      gimp_file_save_mock.call_args_list[0][0][2], self._get_filepath("red (1).webp"))
+  
+  def test_export_with_builtin_png_writer(self):
+    self.settings["main/use_builtin_png_writer"].set_value(True)
+    
+    self._export()
+    
+    self.assertEqual(self.pdb.saved_filepaths, [])
+    
+    self._assert_pixels_equal(self._get_filepath("red.png"), self.red_layer.pixels)
+    self._assert_pixels_equal(
+      self._get_filepath("group", "blue.png"), self.blue_layer.pixels)
+    self._assert_pixels_equal(
+      self._get_filepath("background.png"), self.background_layer.pixels)
+  
+  def test_export_with_builtin_png_writer_raises_export_layers_error(self):
+    self.settings["main/use_builtin_png_writer"].set_value(True)
+    
+    with mock.patch(
+           pg.PYGIMPLIB_MODULE_PATH + ".pngwriter._write_png",
+           side_effect=IOError("disk full")):
+      with self.assertRaises(exportlayers.ExportLayersError) as cm:
+        self._export()
+    
+    self.assertIn("disk full", str(cm.exception))
+    self.assertIsNotNone(cm.exception.layer_name)
+  
+  def test_export_with_builtin_png_writer_excludes_unwritten_layers_from_exported(self):
+    self.settings["main/use_builtin_png_writer"].set_value(True)
+    
+    layer_exporter = exportlayers.LayerExporter(
+      gimpenums.RUN_NONINTERACTIVE, self.image, self.settings["main"])
+    
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      with mock.patch(
+             pg.PYGIMPLIB_MODULE_PATH + ".pngwriter._write_png",
+             side_effect=IOError("disk full")):
+        with self.assertRaises(exportlayers.ExportLayersError):
+          layer_exporter.export()
+    
+    self.assertListEqual(layer_exporter.exported_layers, [])
+    
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_exporter.export()
+    
+    self.assertEqual(len(layer_exporter.exported_layers), 3)
+    self.assertTrue(layer_exporter.has_exported_layer(self.red_layer))
+  
+  def test_export_with_builtin_png_writer_and_unsupported_options_uses_png_plugin(self):
+    self.settings["main/use_builtin_png_writer"].set_value(True)
+    self.settings["main/save_options/png/interlace"].set_value(True)
+    
+    self._export()
+    
+    self.assertEqual(len(self.pdb.saved_filepaths), 3)
+  
+  def test_export_with_toggle_visibility_produces_same_output_as_copy_layers(self):
+    self._move_blue_layer_to_top_level()
+    
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_tree = pg.itemtree.LayerTree(self.image, name=pg.config.SOURCE_NAME)
+      layer_tree[self.background_layer.ID].add_tag("background")
+    
+    self.background_layer.pixels[:, :2] = (0, 255, 0, 255)
+    self.background_layer.pixels[3] = (255, 255, 0, 255)
+    self.red_layer.opacity = 50.0
+    self.blue_layer.opacity = 50.0
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    operations.add(
+      self.settings["main/constraints"],
+      builtin_constraints.BUILTIN_CONSTRAINTS["only_layers_without_tags"])
+    self.settings["main/overwrite_mode"].set_item("replace")
+    
+    filepaths = [self._get_filepath("red.png"), self._get_filepath("blue.png")]
+    
+    for use_layer_size, background_position in [(True, 0), (True, -1), (False, 0)]:
+      operations.get_operation(
+        self.settings["main/procedures"], "use_layer_size")["enabled"].set_value(
+          use_layer_size)
+      operations.reorder(
+        self.settings["main/procedures"], "insert_background_layers", background_position)
+      
+      layer_exporter = self._export(engine=exportlayers.ExportEngines.COPY_LAYERS)
+      self.assertEqual(
+        layer_exporter.export_engine, exportlayers.ExportEngines.COPY_LAYERS)
+      
+      expected_pixels_list = [simulator_gimp.read_png(filepath) for filepath in filepaths]
+      
+      with mock.patch.object(
+             self.pdb, "gimp_layer_new_from_drawable",
+             wraps=self.pdb.gimp_layer_new_from_drawable) as new_from_drawable_mock:
+        layer_exporter = self._export(engine=exportlayers.ExportEngines.TOGGLE_VISIBILITY)
+      
+      self.assertEqual(
+        layer_exporter.export_engine, exportlayers.ExportEngines.TOGGLE_VISIBILITY)
+      self.assertFalse(new_from_drawable_mock.called)
+      
+      for filepath, expected_pixels in zip(filepaths, expected_pixels_list):
+        self._assert_pixels_equal(filepath, expected_pixels)
+    
+    self.assertEqual(len(self.image.layers), 3)
+    self.assertTrue(all(layer.valid for layer in self.image.layers))
+  
+  def test_export_chooses_engine_automatically(self):
+    layer_exporter = self._export()
+    self.assertEqual(layer_exporter.export_engine, exportlayers.ExportEngines.COPY_LAYERS)
+    
+    self._move_blue_layer_to_top_level()
+    for i in range(10):
+      self._insert_layer("layer{}".format(i), (255, 0, 0, 255), (4, 4))
+    
+    layer_exporter = self._export()
+    self.assertEqual(
+      layer_exporter.export_engine, exportlayers.ExportEngines.TOGGLE_VISIBILITY)
+    self._assert_pixels_equal(self._get_filepath("red.png"), self.red_layer.pixels)
+  
+  def test_export_forcing_toggle_visibility_with_layer_groups_raises_error(self):
+    with self.assertRaises(ValueError):
+      self._export(engine=exportlayers.ExportEngines.TOGGLE_VISIBILITY)
+  
+  def _move_blue_layer_to_top_level(self):
+    self.pdb.gimp_image_reorder_item(self.image, self.blue_layer, None, 1)
+    self.pdb.gimp_image_remove_layer(self.image, self.layer_group)
+  
+  def _insert_layer(self, name, color, size, offsets=(0, 0), parent=None):
+    layer = simulator_gimp.LayerSimulator(self.image, name, size[0], size[1])
+    layer.pixels[...] = color
+    layer.set_offsets(*offsets)
+    self.pdb.gimp_image_insert_layer(self.image, layer, parent, 0)
+    
+    return layer
+  
+  def _export(
+        self,
+        run_mode=gimpenums.RUN_NONINTERACTIVE,
+        engine=None,
+        save_options_editor=None):
+    with simulator_gimp.simulate_gimp(_SIMULATED_MODULE_NAMES, self.gimp_module):
+      layer_exporter = exportlayers.LayerExporter(
+        run_mode, self.image, self.settings["main"],
+        save_options_editor=save_options_editor)
+      layer_exporter.export(engine=engine)
+    
+    return layer_exporter
+  
+  def _get_filepath(self, *path_components):
+    return os.path.join(self.output_dirpath, *path_components).encode(
+      pg.GIMP_CHARACTER_ENCODING)
+  
+  def _assert_pixels_equal(self, filepath, expected_pixels):
+    self.assertTrue(
+      simulator_gimp.np.array_equal(simulator_gimp.read_png(filepath), expected_pixels))
@@ -197,8 +197,12 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
       if order is not None:
         operations.reorder(settings["main/procedures"], procedure_name, order)
     
+    added_procedure_names = [
+      procedure.name
+      for procedure in operations.walk_records(settings["main/procedures"])]
+    
     for procedure_name in procedure_names_to_remove:
-      if procedure_name in settings["main/procedures/added"]:
+      if procedure_name in added_procedure_names:
         operations.remove(settings["main/procedures"], procedure_name)
     
     layer_exporter = exportlayers.LayerExporter(
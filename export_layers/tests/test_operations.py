@@ -168,23 +168,58 @@ class TestCreateOperations(unittest.TestCase):
     
     self.assertDictEqual(
       _find_in_added_data(operations_, initial_operation_name), initial_operation_dict)
-    self.assertIn(initial_operation_dict["name"], operations_["added"])
+    self.assertNotIn(initial_operation_dict["name"], operations_["added"])
     self.assertIsNot(
       _find_in_added_data(operations_, initial_operation_name), initial_operation_dict)
     
-    self.assertSetEqual(operations_["added"][initial_operation_name].tags, set(tags))
+    operation = operations.get_operation(operations_, initial_operation_name)
+    
+    self.assertIn(initial_operation_dict["name"], operations_["added"])
+    self.assertSetEqual(operation.tags, set(tags))
     
     for attribute_name, value in additional_operation_attributes.items():
-      self.assertEqual(
-        operations_["added"][initial_operation_name][attribute_name].value, value)
+      self.assertEqual(operation[attribute_name].value, value)
     
-    self.assertNotIn("type", operations_["added"][initial_operation_name])
+    self.assertNotIn("type", operation)
     
     self.assertIn("type", _find_in_added_data(operations_, initial_operation_name))
     self.assertEqual(
       initial_operation_dict["type"],
       _find_in_added_data(operations_, initial_operation_name)["type"])
   
+  @parameterized.parameterized.expand([
+    ("procedure", "procedures", test_procedures, "autocrop"),
+    ("constraint_with_subfilter", "constraints", test_constraints, "include_layers"),
+    ("constraint_without_subfilter",
+     "constraints",
+     test_constraints,
+     "only_visible_layers"),
+  ])
+  def test_create_records_return_default_values_without_creating_groups(
+        self, test_case_name_suffix, name, test_operations_list, initial_operation_name):
+    operations_ = operations.create(
+      name, [get_operation_data(test_operations_list)[initial_operation_name]])
+    
+    record = next(operations.walk_records(operations_))
+    setting_paths = [
+      "function",
+      "enabled",
+      "display_name",
+      "operation_groups",
+      "orig_name",
+      "subfilter",
+      "arguments/offset_x",
+      "arguments/offset_y"]
+    
+    record_values = [record.get_value(path) for path in setting_paths]
+    
+    self.assertFalse(operations_["added"])
+    
+    operation = operations.get_operation(operations_, initial_operation_name)
+    
+    self.assertListEqual(
+      record_values, [operation.get_value(path) for path in setting_paths])
+  
   def test_create_initial_operation_with_invalid_type_raises_error(self):
     initial_operation_dict = get_operation_data(test_procedures)["autocrop"]
     initial_operation_dict["type"] = "invalid_type"
@@ -224,6 +259,20 @@ class TestManageOperations(unittest.TestCase):
       _find_in_added_data(self.procedures, "autocrop"), self.autocrop_dict)
     self.assertEqual(operation, self.procedures["added/autocrop"])
   
+  def test_add_arguments_gui_not_initialized_with_parent_group(self):
+    operation = operations.add(self.procedures, self.autocrop_dict)
+    
+    with mock.patch.object(
+           pg.setting.Setting, "set_gui", autospec=True) as mock_set_gui:
+      self.procedures.initialize_gui()
+    
+    settings_with_initialized_gui = [
+      call_args[0][0] for call_args in mock_set_gui.call_args_list]
+    
+    self.assertIn(operation["enabled"], settings_with_initialized_gui)
+    for setting in operation["arguments"]:
+      self.assertNotIn(setting, settings_with_initialized_gui)
+  
   def test_add_passing_invalid_object_raises_error(self):
     with self.assertRaises(TypeError):
       operations.add(self.procedures, "invalid_object")
@@ -288,7 +337,8 @@ class TestManageOperations(unittest.TestCase):
       operation = operations.add(self.procedures, self.test_procedures[operation_name])
       
       self.assertIs(invoked_event_args[-1][0], self.procedures)
-      self.assertIs(invoked_event_args[-1][1], operation)
+      self.assertIsInstance(invoked_event_args[-1][1], operations.OperationRecord)
+      self.assertIs(invoked_event_args[-1][1].get_operation(), operation)
       self.assertDictEqual(invoked_event_args[-1][2], self.autocrop_dict)
       self.assertIsNot(invoked_event_args[-1][2], self.autocrop_dict)
   
@@ -429,8 +479,8 @@ class TestManageOperations(unittest.TestCase):
     operations.add(procedures, self.test_procedures["autocrop_background"])
     operations.clear(procedures)
     
-    self.assertIn("autocrop", procedures["added"])
-    self.assertEqual(len(procedures["added"]), 1)
+    self.assertListEqual(
+      [operation.name for operation in operations.walk(procedures)], ["autocrop"])
     self.assertNotIn("autocrop_background", procedures)
     
     self.assertEqual(len(procedures["_added_data"].value), 1)
@@ -560,7 +610,7 @@ class TestLoadSaveOperations(unittest.TestCase):
     self.procedures = operations.create("procedures")
   
   @mock.patch(
-    pg.PYGIMPLIB_MODULE_PATH + ".setting.persistor.Persistor.save",
+    pg.PYGIMPLIB_MODULE_PATH + ".setting.persistor.Persistor.save_multiple",
     return_value=(pg.setting.Persistor.SUCCESS, ""))
   @mock.patch(
     pg.PYGIMPLIB_MODULE_PATH + ".setting.persistor.Persistor.load",
@@ -575,9 +625,11 @@ class TestLoadSaveOperations(unittest.TestCase):
     self.assertIn(self.procedures["_added_data"], mock_load.call_args[0][0])
     self.assertIn(self.procedures["_added_data_values"], mock_load.call_args[0][0])
     self.assertEqual(mock_save.call_count, 1)
-    self.assertEqual(len(mock_save.call_args[0][0]), 2)
-    self.assertIn(self.procedures["_added_data"], mock_save.call_args[0][0])
-    self.assertIn(self.procedures["_added_data_values"], mock_save.call_args[0][0])
+    self.assertEqual(len(mock_save.call_args[0][0]), 1)
+    self.assertEqual(len(mock_save.call_args[0][0][0][0]), 2)
+    self.assertIn(self.procedures["_added_data"], mock_save.call_args[0][0][0][0])
+    self.assertIn(
+      self.procedures["_added_data_values"], mock_save.call_args[0][0][0][0])
   
   def test_added_data_values_are_cleared_before_save(
         self,
@@ -623,10 +675,14 @@ class TestLoadSaveOperations(unittest.TestCase):
           added_data_before_save, self.procedures["_added_data"].value):
       self.assertDictEqual(dict_before_save, dict_after_save)
     
-    self.assertEqual(len(self.procedures["added"]), len(operation_names_to_add))
+    self.assertFalse(self.procedures["added"])
+    
+    added_operations = list(operations.walk(self.procedures))
+    
+    self.assertEqual(len(added_operations), len(operation_names_to_add))
     
     for added_setting, dict_after_save in zip(
-          self.procedures["added"], self.procedures["_added_data"].value):
+          added_operations, self.procedures["_added_data"].value):
       self.assertEqual(added_setting.name, dict_after_save["name"])
   
   def test_values_are_preserved_after_load(
@@ -646,16 +702,80 @@ class TestLoadSaveOperations(unittest.TestCase):
     self.procedures.save()
     self.procedures.load()
     
+    autocrop_background = operations.get_operation(
+      self.procedures, "autocrop_background")
+    autocrop_foreground = operations.get_operation(
+      self.procedures, "autocrop_foreground")
+    autocrop = operations.get_operation(self.procedures, "autocrop")
+    
+    self.assertEqual(autocrop_background["enabled"].value, True)
+    self.assertEqual(autocrop_background["operation_groups"].value, ["background"])
+    self.assertEqual(autocrop_foreground["enabled"].value, True)
+    self.assertEqual(autocrop_foreground["operation_groups"].value, ["foreground"])
+    self.assertEqual(autocrop["arguments/offset_x"].value, 20)
+    self.assertEqual(autocrop["arguments/offset_y"].value, 10)
+  
+  def test_records_return_loaded_values_without_creating_groups(
+        self, mock_persistent_source, mock_session_source):
+    for operation_dict in self.test_procedures.values():
+      operations.add(self.procedures, operation_dict)
+    
+    self.procedures["added/autocrop_background/enabled"].set_value(True)
+    self.procedures["added/autocrop/arguments/offset_x"].set_value(20)
+    
+    self.procedures.save()
+    self.procedures.load()
+    
+    records = {
+      record.name: record for record in operations.walk_records(self.procedures)}
+    
+    self.assertEqual(records["autocrop_background"].get_value("enabled"), True)
+    self.assertEqual(records["autocrop"].get_argument_values(), [20, 0])
+    self.assertEqual(records["autocrop"].get_value("nonexistent_setting", 5), 5)
+    self.assertSetEqual(records["autocrop"].tags, set(["operation", "procedure"]))
+    self.assertFalse(self.procedures["added"])
+  
+  def test_values_of_operations_without_groups_are_preserved_on_save(
+        self, mock_persistent_source, mock_session_source):
+    for operation_dict in self.test_procedures.values():
+      operations.add(self.procedures, operation_dict)
+    
+    self.procedures["added/autocrop/arguments/offset_x"].set_value(20)
+    
+    self.procedures.save()
+    self.procedures.load()
+    
+    operations.get_operation(
+      self.procedures, "autocrop_background")["enabled"].set_value(True)
+    
+    self.procedures.save()
+    self.procedures.load()
+    
     self.assertEqual(
-      self.procedures["added/autocrop_background/enabled"].value, True)
-    self.assertEqual(
-      self.procedures["added/autocrop_background/operation_groups"].value, ["background"])
-    self.assertEqual(
-      self.procedures["added/autocrop_foreground/enabled"].value, True)
+      operations.get_operation(
+        self.procedures, "autocrop")["arguments/offset_x"].value, 20)
     self.assertEqual(
-      self.procedures["added/autocrop_foreground/operation_groups"].value, ["foreground"])
-    self.assertEqual(self.procedures["added/autocrop/arguments/offset_x"].value, 20)
-    self.assertEqual(self.procedures["added/autocrop/arguments/offset_y"].value, 10)
+      operations.get_operation(
+        self.procedures, "autocrop_background")["enabled"].value, True)
+  
+  def test_remove_operation_without_group_removes_its_values(
+        self, mock_persistent_source, mock_session_source):
+    for operation_dict in self.test_procedures.values():
+      operations.add(self.procedures, operation_dict)
+    
+    self.procedures["added/autocrop/arguments/offset_x"].set_value(20)
+    
+    self.procedures.save()
+    self.procedures.load()
+    
+    operations.remove(self.procedures, "autocrop")
+    operation = operations.add(self.procedures, self.test_procedures["autocrop"])
+    
+    self.assertEqual(operation.name, "autocrop")
+    self.assertEqual(operation["arguments/offset_x"].value, 0)
+    
+    for key in self.procedures["_added_data_values"].value:
+      self.assertNotIn("autocrop/", key)
   
   def test_added_data_values_is_filled_before_save_and_reset_on_clear(
         self, mock_persistent_source, mock_session_source):
@@ -685,10 +805,8 @@ class TestLoadSaveOperations(unittest.TestCase):
     
     procedures.load()
     
-    self.assertEqual(len(procedures["added"]), 1)
-    self.assertIn("autocrop", procedures["added"])
-    self.assertNotIn("autocrop_background", procedures["added"])
-    self.assertNotIn("autocrop_foreground", procedures["added"])
+    self.assertListEqual(
+      [operation.name for operation in operations.walk(procedures)], ["autocrop"])
   
   def test_load_if_added_data_found_overrides_initial_operations(
         self, mock_persistent_source, mock_session_source):
@@ -702,10 +820,9 @@ class TestLoadSaveOperations(unittest.TestCase):
     procedures.save()
     procedures.load()
     
-    self.assertEqual(len(procedures["added"]), 2)
-    self.assertNotIn("autocrop", procedures["added"])
-    self.assertIn("autocrop_background", procedures["added"])
-    self.assertIn("autocrop_foreground", procedures["added"])
+    self.assertListEqual(
+      [operation.name for operation in operations.walk(procedures)],
+      ["autocrop_background", "autocrop_foreground"])
 
 
 class TestManagePdbProceduresAsOperations(unittest.TestCase):
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+import parameterized
+
+from export_layers import pygimplib as pg
+
+from ..gui import previews_controller
+
+
+class _PreviewStub(object):
+  
+  def __init__(self, name, updates):
+    self.name = name
+    self._updates = updates
+  
+  def update(self, **kwargs):
+    self._updates.append((self.name, kwargs))
+
+
+@mock.patch(pg.PYGIMPLIB_MODULE_PATH + ".invocation.timeout_remove_strict")
+@mock.patch(pg.PYGIMPLIB_MODULE_PATH + ".invocation.timeout_add_strict")
+class TestPreviewUpdateScheduler(unittest.TestCase):
+  
+  def setUp(self):
+    self.updates = []
+    
+    self.name_preview = _PreviewStub("name_preview", self.updates)
+    self.image_preview = _PreviewStub("image_preview", self.updates)
+    
+    self.scheduler = previews_controller.PreviewUpdateScheduler(
+      [self.name_preview, self.image_preview], 50)
+  
+  def test_schedule_update_postpones_update(
+        self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    self.scheduler.schedule_update(self.name_preview)
+    
+    mock_timeout_add_strict.assert_called_once_with(
+      50, self.scheduler._update_previews)
+    self.assertListEqual(self.updates, [])
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(self.updates, [("name_preview", {})])
+    self.assertEqual(self.scheduler.num_dropped_updates, 0)
+  
+  def test_schedule_update_each_request_restarts_delay(
+        self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    self.scheduler.schedule_update(self.name_preview)
+    self.scheduler.schedule_update(self.image_preview)
+    
+    self.assertEqual(mock_timeout_add_strict.call_count, 2)
+  
+  @parameterized.parameterized.expand([
+    ("reset_items_then_normal_update",
+     {"reset_items": True}, {}, {"reset_items": True}),
+    ("normal_update_then_reset_items",
+     {}, {"reset_items": True}, {"reset_items": True}),
+    ("update_existing_contents_only_then_normal_update",
+     {"update_existing_contents_only": True}, {}, {}),
+    ("normal_update_then_update_existing_contents_only",
+     {}, {"update_existing_contents_only": True}, {}),
+    ("update_existing_contents_only_then_reset_items",
+     {"update_existing_contents_only": True}, {"reset_items": True},
+     {"reset_items": True}),
+    ("same_kind_of_update",
+     {"update_existing_contents_only": True},
+     {"update_existing_contents_only": True},
+     {"update_existing_contents_only": True}),
+  ])
+  def test_schedule_update_merges_requests_for_same_preview(
+        self,
+        mock_timeout_add_strict,
+        mock_timeout_remove_strict,
+        test_case_name_suffix,
+        first_update_kwargs,
+        second_update_kwargs,
+        expected_update_kwargs):
+    self.scheduler.schedule_update(self.name_preview, **first_update_kwargs)
+    self.scheduler.schedule_update(self.name_preview, **second_update_kwargs)
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(self.updates, [("name_preview", expected_update_kwargs)])
+    self.assertEqual(self.scheduler.num_dropped_updates, 1)
+  
+  def test_schedule_update_updates_previews_in_specified_order(
+        self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    other_preview = _PreviewStub("other_preview", self.updates)
+    
+    self.scheduler.schedule_update(other_preview)
+    self.scheduler.schedule_update(self.image_preview)
+    self.scheduler.schedule_update(self.name_preview)
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(
+      [name for name, unused_ in self.updates],
+      ["name_preview", "image_preview", "other_preview"])
+    self.assertEqual(self.scheduler.num_dropped_updates, 0)
+  
+  def test_schedule_update_during_update_is_postponed_to_next_update(
+        self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    orig_update = self.name_preview.update
+    
+    def _update_and_schedule_another_update(**kwargs):
+      orig_update(**kwargs)
+      self.scheduler.schedule_update(self.image_preview, reset_items=True)
+    
+    self.name_preview.update = _update_and_schedule_another_update
+    
+    self.scheduler.schedule_update(self.name_preview)
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(self.updates, [("name_preview", {})])
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(
+      self.updates, [("name_preview", {}), ("image_preview", {"reset_items": True})])
+  
+  def test_cancel_update(self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    self.scheduler.schedule_update(self.name_preview)
+    self.scheduler.schedule_update(self.image_preview)
+    
+    self.scheduler.cancel_update(self.name_preview)
+    
+    self.assertEqual(self.scheduler.num_dropped_updates, 1)
+    self.assertFalse(mock_timeout_remove_strict.called)
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(self.updates, [("image_preview", {})])
+  
+  def test_cancel_update_last_pending_update_removes_scheduled_update(
+        self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    self.scheduler.schedule_update(self.name_preview)
+    
+    self.scheduler.cancel_update(self.name_preview)
+    
+    mock_timeout_remove_strict.assert_called_once_with(self.scheduler._update_previews)
+    self.assertEqual(self.scheduler.num_dropped_updates, 1)
+  
+  def test_cancel_update_without_pending_update(
+        self, mock_timeout_add_strict, mock_timeout_remove_strict):
+    self.scheduler.schedule_update(self.image_preview)
+    
+    self.scheduler.cancel_update(self.name_preview)
+    
+    self.assertEqual(self.scheduler.num_dropped_updates, 0)
+    self.assertFalse(mock_timeout_remove_strict.called)
+    
+    self._run_scheduled_update(mock_timeout_add_strict)
+    
+    self.assertListEqual(self.updates, [("image_preview", {})])
+  
+  def _run_scheduled_update(self, mock_timeout_add_strict):
+    unused_, callback = mock_timeout_add_strict.call_args[0]
+    self.assertFalse(callback())
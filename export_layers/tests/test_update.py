@@ -22,6 +22,11 @@ from future.builtins import *
 
 import collections
 
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+
 import pygtk
 pygtk.require("2.0")
 import gtk
@@ -33,6 +38,7 @@ import parameterized
 
 from export_layers import pygimplib as pg
 
+from export_layers.pygimplib.setting import _sources_records
 from export_layers.pygimplib.tests import stubs_gimp
 
 from .. import update
@@ -178,7 +184,54 @@ class TestUpdate(unittest.TestCase):
     self.assertEqual(
       self.settings["main/test_setting"].load()[0],
       pg.setting.Persistor.SUCCESS)
+
+
+@mock.patch(
+  pg.PYGIMPLIB_MODULE_PATH + ".setting.sources.gimpshelf.shelf",
+  new_callable=stubs_gimp.ShelfStub)
+@mock.patch(
+  pg.PYGIMPLIB_MODULE_PATH + ".setting.sources.gimp",
+  new_callable=stubs_gimp.GimpModuleStub)
+class TestConvertSettingSourcesToRecordsFormat(unittest.TestCase):
+  
+  def setUp(self):
+    self.data = {"main/file_extension": "jpg", "gui/dialog_size": (640, 480)}
+    self.session_source_key = pg.config.SOURCE_NAME.encode(pg.GIMP_CHARACTER_ENCODING)
+  
+  def test_convert_setting_sources_to_records_format(
+        self, mock_persistent_source, mock_session_source):
+    mock_session_source[self.session_source_key] = dict(self.data)
+    mock_persistent_source.parasite_attach(
+      stubs_gimp.ParasiteStub(pg.config.SOURCE_NAME, 0, pickle.dumps(self.data)))
+    
+    update._convert_setting_sources_to_records_format()
+    
+    self.assertTrue(
+      _sources_records.SettingRecords.is_encoded(
+        mock_session_source[self.session_source_key]))
+    self.assertTrue(
+      _sources_records.SettingRecords.is_encoded(
+        mock_persistent_source.parasite_find(pg.config.SOURCE_NAME).data))
+    
+    self.assertDictEqual(pg.config.SESSION_SOURCE.read_dict(), self.data)
+    self.assertDictEqual(pg.config.PERSISTENT_SOURCE.read_dict(), self.data)
   
+  def test_convert_setting_sources_to_records_format_skips_invalid_source(
+        self, mock_persistent_source, mock_session_source):
+    mock_session_source[self.session_source_key] = dict(self.data)
+    mock_persistent_source.parasite_attach(
+      stubs_gimp.ParasiteStub(pg.config.SOURCE_NAME, 0, b"invalid data"))
+    
+    update._convert_setting_sources_to_records_format()
+    
+    self.assertTrue(
+      _sources_records.SettingRecords.is_encoded(
+        mock_session_source[self.session_source_key]))
+    self.assertEqual(
+      mock_persistent_source.parasite_find(pg.config.SOURCE_NAME).data, b"invalid data")
+    
+    self.assertDictEqual(pg.config.SESSION_SOURCE.read_dict(), self.data)
+
 
 class TestHandleUpdate(unittest.TestCase):
   
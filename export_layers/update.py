@@ -30,14 +30,8 @@ import os
 import shutil
 import types
 
-import pygtk
-pygtk.require("2.0")
-import gtk
-
 from export_layers import pygimplib as pg
 
-from export_layers.gui import messages
-
 
 MIN_VERSION_WITHOUT_CLEAN_REINSTALL = pg.version.Version.parse("3.3")
 
@@ -84,6 +78,13 @@ def update(settings, prompt_on_clear=False):
     return UPDATE
   
   if prompt_on_clear:
+    # Prompting happens only in interactive runs, hence importing GTK here.
+    import pygtk
+    pygtk.require("2.0")
+    import gtk
+    
+    from export_layers.gui import messages
+    
     response = messages.display_message(
       _("Due to significant changes in the plug-in, settings need to be reset. Proceed?"),
       gtk.MESSAGE_WARNING,
@@ -246,9 +247,24 @@ def _update_to_3_3_1(settings):
   settings["main/layer_filename_pattern"].save()
 
 
+def _convert_setting_sources_to_records_format():
+  # Settings stored by older versions as a single pickled dictionary can still
+  # be read, but converting them right away ensures that subsequent loads decode
+  # only the groups being loaded.
+  for source in [pg.config.SESSION_SOURCE, pg.config.PERSISTENT_SOURCE]:
+    try:
+      data_dict = source.read_dict()
+    except pg.setting.SourceInvalidFormatError:
+      continue
+    
+    if data_dict is not None:
+      source.write_dict(data_dict)
+
+
 def _update_to_3_4(settings):
   _remove_obsolete_pygimplib_files()
   _remove_obsolete_plugin_files()
+  _convert_setting_sources_to_records_format()
 
 
 _UPDATE_HANDLERS = collections.OrderedDict([
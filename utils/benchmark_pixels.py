@@ -0,0 +1,123 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This script compares the time it takes to autocrop layers via the
+`plug-in-autocrop-layer` procedure and via the NumPy pixel backend
+(`pygimplib.pixels`).
+
+To run the benchmark, open up the Python-Fu console (Filters -> Python-Fu ->
+Console) and run the following commands:
+
+import sys
+sys.path.append(<directory path to the plug-in>)
+from utils import benchmark_pixels
+benchmark_pixels.main()
+
+The benchmark creates a temporary image for each layer size containing a layer
+with an opaque rectangle surrounded by transparent pixels. Pass `layer_sizes`
+and `num_runs` to `main()` to adjust the benchmark.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sys
+import time
+
+PLUGINS_DIRPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_autocrop_time(image, layer, autocrop_func, num_runs):
+  """
+  Return the average time in seconds it takes `autocrop_func` to autocrop a copy
+  of `layer` inserted in `image`. `autocrop_func` accepts the image and the layer
+  copy.
+  """
+  from gimp import pdb
+  
+  total_time = 0.0
+  
+  for unused_ in range(num_runs):
+    layer_copy = pdb.gimp_layer_copy(layer, True)
+    pdb.gimp_image_insert_layer(image, layer_copy, None, 0)
+    
+    start_time = time.time()
+    autocrop_func(image, layer_copy)
+    total_time += time.time() - start_time
+    
+    pdb.gimp_image_remove_layer(image, layer_copy)
+  
+  return total_time / num_runs
+
+
+def create_image(width, height):
+  """
+  Create an image containing a single layer of the specified size with an
+  opaque rectangle in the middle. Return the image and the layer.
+  """
+  from gimp import pdb
+  import gimpenums
+  
+  image = pdb.gimp_image_new(width, height, gimpenums.RGB)
+  layer = pdb.gimp_layer_new(
+    image, width, height, gimpenums.RGBA_IMAGE, "layer", 100.0, gimpenums.NORMAL_MODE)
+  pdb.gimp_image_insert_layer(image, layer, None, 0)
+  
+  pdb.gimp_image_select_rectangle(
+    image, gimpenums.CHANNEL_OP_REPLACE, width // 4, height // 4, width // 2, height // 2)
+  pdb.gimp_edit_fill(layer, gimpenums.FOREGROUND_FILL)
+  pdb.gimp_selection_none(image)
+  
+  return image, layer
+
+
+def main(layer_sizes=((64, 64), (512, 512), (2048, 2048)), num_runs=10):
+  if PLUGINS_DIRPATH not in sys.path:
+    sys.path.append(PLUGINS_DIRPATH)
+  
+  from gimp import pdb
+  
+  from export_layers import pygimplib as pg
+  
+  if not pg.pixels.is_available():
+    print("NumPy is not installed, the pixel backend cannot be benchmarked.")
+    return
+  
+  print("{:>12}  {:>12}  {:>12}".format("layer size", "PDB", "pixels"))
+  
+  for width, height in layer_sizes:
+    image, layer = create_image(width, height)
+    
+    try:
+      pdb_time = measure_autocrop_time(
+        image, layer, pdb.plug_in_autocrop_layer, num_runs)
+      pixels_time = measure_autocrop_time(
+        image, layer, lambda image, layer: pg.pixels.autocrop_layer(layer), num_runs)
+    finally:
+      pdb.gimp_image_delete(image)
+    
+    print(
+      "{:>12}  {:>9.1f} ms  {:>9.1f} ms".format(
+        "{}x{}".format(width, height), pdb_time * 1000, pixels_time * 1000))
+
+
+if __name__ == "__main__":
+  main()
@@ -76,13 +76,16 @@ GITHUB_PAGE_DIRPATH = os.path.join(PLUGINS_DIRPATH, "docs", "gh-pages")
 README_RELATIVE_FILEPATH = os.path.join("docs", "sections", "index.html")
 README_RELATIVE_OUTPUT_FILEPATH = os.path.join("Readme.html")
 
+EXTERNAL_LIBS_RELATIVE_DIRPATH = os.path.join(pg.config.PLUGIN_NAME, "pygimplib", "_lib")
+
 
 def make_installers(
       input_dirpath=PLUGINS_DIRPATH,
       installer_dirpath=OUTPUT_DIRPATH_DEFAULT,
       force_if_dirty=False,
       installers=None,
-      generate_docs=True):
+      generate_docs=True,
+      bundle_libs=False):
   _path_dirs.make_dirs(installer_dirpath)
   
   temp_repo_files_dirpath = tempfile.mkdtemp()
@@ -113,6 +116,9 @@ def make_installers(
   
   _copy_files_to_temp_filepaths(input_filepaths, temp_filepaths)
   
+  if bundle_libs:
+    _bundle_external_libs(temp_dirpath, temp_filepaths, relative_filepaths)
+  
   _set_permissions(temp_dirpath, 0o755)
   
   _create_installers(
@@ -269,6 +275,60 @@ def _copy_files_to_temp_filepaths(filepaths, temp_filepaths):
     shutil.copy2(src_filepath, temp_filepath)
 
 
+def _bundle_external_libs(temp_dirpath, temp_filepaths, relative_filepaths):
+  """
+  Replace the directory containing external libraries with a single ZIP archive
+  containing precompiled modules. pygimplib imports external libraries from
+  the archive if it exists, which avoids accessing many small files on each
+  plug-in startup.
+  
+  `temp_filepaths` and `relative_filepaths` are modified in place.
+  """
+  lib_dirpath = os.path.join(temp_dirpath, EXTERNAL_LIBS_RELATIVE_DIRPATH)
+  if not os.path.isdir(lib_dirpath):
+    return
+  
+  bundle_filepath = lib_dirpath + ".zip"
+  
+  _create_external_libs_bundle(lib_dirpath, bundle_filepath)
+  
+  lib_relative_dirpath_prefix = EXTERNAL_LIBS_RELATIVE_DIRPATH + os.sep
+  
+  for i in reversed(range(len(relative_filepaths))):
+    if relative_filepaths[i].startswith(lib_relative_dirpath_prefix):
+      del relative_filepaths[i]
+      del temp_filepaths[i]
+  
+  shutil.rmtree(lib_dirpath)
+  
+  temp_filepaths.append(bundle_filepath)
+  relative_filepaths.append(os.path.relpath(bundle_filepath, temp_dirpath))
+
+
+def _create_external_libs_bundle(lib_dirpath, bundle_filepath):
+  """
+  Create a ZIP archive importable via `zipimport` from each external library in
+  `lib_dirpath`. Modules and packages of all libraries are placed in the root of
+  the archive so that a single entry in `sys.path` suffices. Modules are stored
+  as compiled `.pyc` files and uncompressed to minimize the import overhead.
+  """
+  with zipfile.PyZipFile(bundle_filepath, "w", zipfile.ZIP_STORED) as bundle_file:
+    for lib_name in sorted(os.listdir(lib_dirpath)):
+      lib_path = os.path.join(lib_dirpath, lib_name)
+      if not os.path.isdir(lib_path):
+        continue
+      
+      for filename in sorted(os.listdir(lib_path)):
+        filepath = os.path.join(lib_path, filename)
+        
+        if (filename.endswith(".py")
+            or os.path.isfile(os.path.join(filepath, "__init__.py"))):
+          bundle_file.writepy(filepath)
+        elif os.path.isfile(filepath) and not filename.endswith((".pyc", ".pyo")):
+          # Keep license files of external libraries without clashing names.
+          bundle_file.write(filepath, os.path.join("licenses", lib_name, filename))
+
+
 def _create_user_docs(dirpath):
   create_user_docs.main(GITHUB_PAGE_DIRPATH, dirpath)
 
@@ -434,6 +494,15 @@ def main():
     default=True,
     help="do not generate documentation",
     dest="generate_docs")
+  parser.add_argument(
+    "-b",
+    "--bundle-libs",
+    action="store_true",
+    default=False,
+    help=(
+      "bundle external libraries of pygimplib into a single ZIP archive of "
+      "precompiled modules to speed up plug-in startup"),
+    dest="bundle_libs")
   
   parsed_args = parser.parse_args(sys.argv[1:])
   make_installers(**dict(parsed_args.__dict__))
@@ -0,0 +1,200 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This script measures the time it takes to start the plug-in, i.e. to load the
+main plug-in file, and reports the time spent importing each module.
+
+The measurement must be performed in a fresh Python process, since modules
+already imported are not imported again. To measure the startup time, open up
+the Python-Fu console (Filters -> Python-Fu -> Console) right after starting
+GIMP and run the following commands:
+
+import sys
+sys.path.append(<directory path to the plug-in>)
+from utils import measure_startup_time
+measure_startup_time.main()
+
+By default, only the startup of non-interactive runs is measured. To include
+modules imported when displaying the plug-in dialog, pass
+`additional_modules=["export_layers.gui.main"]` to `main()`.
+
+To compare the startup time of the plug-in with external libraries bundled in
+a zip archive against loose files, install the plug-in from an installer
+created by `make_installers.py` with and without the `--bundle-libs` option.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import __builtin__
+import collections
+import os
+import runpy
+import sys
+import time
+
+
+PLUGINS_DIRPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN_FILEPATH = os.path.join(PLUGINS_DIRPATH, "export_layers.py")
+
+
+class ImportTimer(object):
+  """
+  This class measures the time spent importing each module while the timer is
+  active.
+  
+  For each newly imported module, the cumulative time (including nested
+  imports) and self time (excluding nested imports) is recorded.
+  """
+  
+  def __init__(self):
+    self.import_times = collections.OrderedDict()
+    
+    self._orig_import = None
+    self._nested_imports_durations = []
+  
+  def start(self):
+    self._orig_import = __builtin__.__import__
+    __builtin__.__import__ = self._timed_import
+  
+  def stop(self):
+    __builtin__.__import__ = self._orig_import
+  
+  def _timed_import(self, name, globals_=None, locals_=None, fromlist=None, level=-1):
+    module_names_not_imported = [
+      module_name
+      for module_name in _get_possible_module_names(name, globals_, fromlist, level)
+      if sys.modules.get(module_name) is None]
+    
+    self._nested_imports_durations.append(0.0)
+    
+    start_time = time.time()
+    
+    try:
+      return self._orig_import(name, globals_, locals_, fromlist, level)
+    finally:
+      duration = time.time() - start_time
+      nested_imports_duration = self._nested_imports_durations.pop()
+      
+      if self._nested_imports_durations:
+        self._nested_imports_durations[-1] += duration
+      
+      imported_module_names = [
+        module_name for module_name in module_names_not_imported
+        if sys.modules.get(module_name) is not None]
+      
+      if imported_module_names:
+        self.import_times[", ".join(imported_module_names)] = (
+          duration, duration - nested_imports_duration)
+
+
+def _get_possible_module_names(name, globals_, fromlist, level):
+  package_name = _get_package_name(globals_)
+  
+  if level > 0:
+    if package_name is None:
+      return []
+    
+    base_package_name = package_name.rsplit(".", level - 1)[0]
+    module_names = [base_package_name + "." + name if name else base_package_name]
+  elif level < 0 and package_name:
+    # Python 2 attempts an implicit relative import first.
+    module_names = [package_name + "." + name, name]
+  else:
+    module_names = [name]
+  
+  if fromlist:
+    module_names.extend([
+      module_name + "." + item
+      for module_name in list(module_names)
+      for item in fromlist if item != "*"])
+  
+  return module_names
+
+
+def _get_package_name(globals_):
+  if not globals_:
+    return None
+  
+  if globals_.get("__package__") is not None:
+    return globals_["__package__"]
+  
+  module_name = globals_.get("__name__")
+  if module_name is None:
+    return None
+  
+  if "__path__" in globals_:
+    return module_name
+  else:
+    return module_name.rpartition(".")[0] or None
+
+
+def measure_startup_time(plugin_filepath=PLUGIN_FILEPATH, additional_modules=None):
+  """
+  Load the plug-in file and import `additional_modules`, if specified. Return
+  the total time in seconds and an `ImportTimer` instance containing import
+  times of individual modules.
+  """
+  import_timer = ImportTimer()
+  
+  start_time = time.time()
+  import_timer.start()
+  
+  try:
+    # The plug-in is not registered as `pg.main()` is only called when the file
+    # is run as the main module.
+    runpy.run_path(plugin_filepath, run_name="__measure_startup_time__")
+    
+    for module_name in (additional_modules or []):
+      __import__(module_name)
+  finally:
+    import_timer.stop()
+  
+  return time.time() - start_time, import_timer
+
+
+def print_import_times(total_time, import_timer, max_modules=30, stream=sys.stdout):
+  """
+  Print the total startup time and at most `max_modules` modules that took the
+  longest to import (including nested imports) to `stream`.
+  """
+  print("Total startup time: {:.1f} ms".format(total_time * 1000), file=stream)
+  print("{:>12}  {:>12}  {}".format("cumulative", "self", "module"), file=stream)
+  
+  import_times_sorted = sorted(
+    import_timer.import_times.items(), key=lambda item: item[1][0], reverse=True)
+  
+  for module_name, (cumulative_time, self_time) in import_times_sorted[:max_modules]:
+    print(
+      "{:>9.1f} ms  {:>9.1f} ms  {}".format(
+        cumulative_time * 1000, self_time * 1000, module_name),
+      file=stream)
+
+
+def main(plugin_filepath=PLUGIN_FILEPATH, additional_modules=None, max_modules=30):
+  if PLUGINS_DIRPATH not in sys.path:
+    sys.path.append(PLUGINS_DIRPATH)
+  
+  total_time, import_timer = measure_startup_time(plugin_filepath, additional_modules)
+  print_import_times(total_time, import_timer, max_modules)
+
+
+if __name__ == "__main__":
+  main(additional_modules=sys.argv[1:])